@@ -1 +1,33 @@
-from sql_blocks.sql_blocks import *
+from sql_blocks import sql_blocks as _core
+
+# --- only what is already loaded (see LAZY_MODULES):
+globals().update({name: getattr(_core, name) for name in _core.CORE_NAMES})
+
+LAZY_MODULES = {
+    'sql_blocks.execution': ('ConnectionPool', 'parameterize'),
+    'sql_blocks.engine': ('LocalEngine',),
+    'sql_blocks.cache': ('ResultCache',),
+    'sql_blocks.batching': ('BatchLoader', 'AsyncBatchLoader'),
+    'sql_blocks.parse_cache': ('ParseCache',),
+    'sql_blocks.lint': ('Linter', 'Severity'),
+    **_core.LAZY_MODULES,
+}
+
+
+def __getattr__(name: str):
+    """
+    PEP 562: the parsers, translators, rules, engine...
+    are imported on the first use of one of their names.
+    """
+    for module, names in LAZY_MODULES.items():
+        if name in names:
+            from importlib import import_module
+            value = getattr(import_module(module), name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+# --- the names of the modules above (LocalEngine, ParseCache...) are not in `import *`
+#     -- it would load all of them:
+__all__ = list(_core.__all__)
@@ -0,0 +1,264 @@
+"""
+GROUP BY for the LocalEngine (requires numpy):
+
+    The group keys are factorized into integer ids,
+    the aggregates are computed by `bincount` and `ufunc.reduceat`
+    over those ids and HAVING filters the resulting arrays.
+    Over a columnar table, the WHERE conditions `field <op> literal`
+    are masks of the arrays (before grouping).
+"""
+import re
+from sql_blocks.sql_blocks import WHERE
+from sql_blocks.engine import COMPARISON, AGGREGATE_FUNCTIONS, Expression, compare
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+LITERAL_COMPARISON = r"\s*(<>|!=|>=|<=|=|<|>)\s*(-?\d+(?:[.]\d+)?|'(?:[^']|'')*')\s*$"
+HAVING_REGEX = re.compile(   # --- a single aggregate (no nested parentheses) and a literal
+    r"^\s*(\w+)\s*[(][^()]*[)]" + LITERAL_COMPARISON, re.DOTALL
+)
+WHERE_REGEX = re.compile(    # --- a field and a literal
+    r"^\s*([A-Za-z_]\w*(?:[.]\w+)?)" + LITERAL_COMPARISON, re.DOTALL
+)
+REDUCE_FUNC = {'SUM': 'add', 'AVG': 'add', 'MIN': 'minimum', 'MAX': 'maximum'}
+
+
+class Column:
+    """
+    The values of a field (or expression) for all the rows:
+        data = numpy array
+        valid = mask of the values that are not NULL
+    """
+    def __init__(self, data, valid, numeric: bool, decode=None):
+        self.data = data
+        self.valid = valid
+        self.numeric = numeric
+        self.decode = decode or (lambda value: value)
+
+    @classmethod
+    def from_list(cls, values: list) -> 'Column':
+        data = np.array(values, dtype=object)
+        valid = np.not_equal(data, None).astype(bool)
+        kinds = {type(value) for value in data[valid]}
+        for dtype, types in ((np.int64, {int}), (np.float64, {int, float})):
+            if kinds and kinds <= types:
+                converted = np.zeros(len(values), dtype=dtype)
+                converted[valid] = data[valid].astype(dtype)
+                return cls(converted, valid, True, lambda value: value.item())
+        return cls(data, valid, False)
+
+    @classmethod
+    def from_columnar(cls, kind: str, values, words: list, nulls=None) -> 'Column':
+        """
+        From ColumnarTable.array: strings (and mixed types) are dictionary codes.
+        """
+        if kind == 'mixed':  # --- the same conversion of the rows
+            return cls.from_list([None if code < 0 else words[code] for code in values.tolist()])
+        if kind == 'str':
+            return cls(values, values >= 0, False, lambda code: words[code])
+        if kind == 'float':
+            return cls(values, ~np.isnan(values), True, lambda value: value.item())
+        valid = np.ones(len(values), dtype=bool) if nulls is None else ~nulls
+        return cls(values, valid, True, lambda value: value.item())
+
+    def value(self, pos: int):
+        if not self.valid[pos]:
+            return None
+        return self.decode( self.data[pos] )
+
+    def factorize(self) -> tuple:
+        """
+        Returns (codes, count) -- NULL is one more group.
+        """
+        if self.data.dtype == object:
+            index = {}
+            codes = np.fromiter(
+                (index.setdefault(value, len(index)) for value in self.data),
+                dtype=np.int64, count=len(self.data)
+            )
+            return codes, len(index)
+        uniques, codes = np.unique(self.data[self.valid], return_inverse=True)
+        result = np.full(len(self.data), len(uniques), dtype=np.int64)
+        result[self.valid] = codes.reshape(-1)
+        return result, len(uniques) + 1
+
+
+def where_mask(kind: str, values, words: list, nulls, op: callable, literal):
+    """
+    The rows of a ColumnarTable.array where `op(value, literal)` is true
+    -- None for a number compared to a text (the rows compare them as texts).
+    """
+    if words is not None:   # --- str and mixed: each word is compared once
+        found = np.array([bool(compare(op, word, literal)) for word in words] + [False], dtype=bool)
+        return found[values]    # --- NULL (code -1) is the last one
+    if isinstance(literal, str):
+        return None
+    result = op(values, literal)
+    if kind == 'float':
+        return result & ~np.isnan(values)
+    return result if nulls is None else result & ~nulls
+
+
+def group_ids(size: int, columns: list) -> tuple:
+    """
+    Returns (the group of each row, group count).
+    """
+    ids, count = np.zeros(size, dtype=np.int64), 1
+    for column in columns:
+        codes, total = column.factorize()
+        uniques, ids = np.unique(ids * total + codes, return_inverse=True)
+        ids, count = ids.reshape(-1), len(uniques)
+    return ids, count
+
+
+def aggregate(name: str, column: Column, ids, count: int):
+    """
+    One value per group (None for the groups without values).
+    column = None: COUNT(*)
+    """
+    if column is None:
+        return np.bincount(ids, minlength=count).astype(object)
+    ids = ids[column.valid]
+    counts = np.bincount(ids, minlength=count)
+    if name == 'COUNT':
+        return counts.astype(object)
+    result = np.full(count, None, dtype=object)
+    present = np.flatnonzero(counts)
+    if not len(present):
+        return result
+    data = column.data[column.valid]
+    if column.numeric and data.dtype.kind == 'f' and name in ('SUM', 'AVG'):
+        totals = np.bincount(ids, weights=data, minlength=count)[present]
+    else:
+        if not column.numeric:
+            data = np.array([column.decode(value) for value in data], dtype=object)
+        order = np.argsort(ids, kind='stable')
+        starts = np.concatenate( ([0], np.cumsum(counts[present])[:-1]) )
+        totals = getattr(np, REDUCE_FUNC[name]).reduceat(data[order], starts)
+    if name == 'AVG':
+        totals = totals / counts[present]
+    result[present] = totals.tolist() if column.numeric else list(totals)
+    return result
+
+
+class Aggregation:
+    """
+    The GROUP BY step of a Plan:
+    its output has one row per group, with the fields of the groups
+    and the aggregates (by the keys registered in `plan.aggregates`).
+    """
+    def __init__(self, plan, group_texts: list, having_texts: list):
+        if np is None:
+            raise ImportError('GROUP BY in the LocalEngine requires numpy.')
+        self.plan = plan
+        self.groups = [plan.compile(text) for text in group_texts]
+        self.refs = sorted( set().union(*[expr.refs for expr in self.groups]) )
+        self.vector_having, self.row_having = [], []
+        for text in having_texts:
+            count = len(plan.aggregates)
+            func = plan.compile(text, grouped=True).func
+            found = HAVING_REGEX.match(text)
+            if found and found.group(1).upper() in AGGREGATE_FUNCTIONS and len(plan.aggregates) == count+1:
+                _, op, literal = found.groups()
+                value = Expression(literal, plan.scope).func(None)
+                self.vector_having.append( (plan.aggregates[-1][2], COMPARISON[op], value) )
+            else:
+                self.row_having.append(func)
+
+    # ---- Input: ----------------------
+    def columnar_input(self):
+        """
+        Memory-mapped columns of a single table,
+        filtered by the masks of the WHERE conditions: no row is built.
+        """
+        source, *others = self.plan.sources
+        is_field = lambda func: hasattr(func, 'key')
+        if others or not all([
+            hasattr(source.table, 'array'),
+            all(is_field(expr.func) for expr in self.groups),
+            all(arg is None or is_field(arg) for _, arg, _ in self.plan.aggregates),
+        ]):
+            return None
+        array = lambda key: source.table.array(key.split('.', 1)[1])
+        selected = None
+        for text in self.plan.query.values.get(WHERE, []):
+            found = WHERE_REGEX.match(text)
+            if not found:
+                return None
+            name, op, literal = found.groups()
+            mask = where_mask(
+                *array( self.plan.scope.resolve(name) ), COMPARISON[op],
+                Expression(literal, self.plan.scope).func(None)
+            )
+            if mask is None:
+                return None
+            selected = mask if selected is None else selected & mask
+        def column(key: str) -> Column:
+            kind, values, words, nulls = array(key)
+            if selected is not None:
+                values = values[selected]
+                nulls = None if nulls is None else nulls[selected]
+            return Column.from_columnar(kind, values, words, nulls)
+        return (
+            source.table.row_count if selected is None else int(selected.sum()),
+            [column(expr.func.key) for expr in self.groups],
+            [None if arg is None else column(arg.key) for _, arg, _ in self.plan.aggregates],
+            {key: column(key) for key in self.refs},
+        )
+
+    def row_input(self, rows):
+        funcs = [expr.func for expr in self.groups]
+        args = [arg for _, arg, _ in self.plan.aggregates]
+        groups, values = [[] for _ in funcs], [[] for _ in args]
+        refs = {key: [] for key in self.refs}
+        size = 0
+        for row in rows:
+            size += 1
+            for found, func in zip(groups, funcs):
+                found.append( func(row) )
+            for found, arg in zip(values, args):
+                if arg is not None:
+                    found.append( arg(row) )
+            for key, found in refs.items():
+                found.append( row[key] )
+        return (
+            size,
+            [Column.from_list(found) for found in groups],
+            [
+                None if arg is None else Column.from_list(found)
+                for found, arg in zip(values, args)
+            ],
+            {key: Column.from_list(found) for key, found in refs.items()},
+        )
+
+    # ---- Output: ---------------------
+    def rows(self) -> list:
+        size, groups, args, refs = self.columnar_input() or self.row_input( self.plan.rows() )
+        if size == 0 and groups:
+            return []
+        ids, count = group_ids(size, groups)
+        values = {
+            key: aggregate(name, column, ids, count)
+            for (name, _, key), column in zip(self.plan.aggregates, args)
+        }
+        selected = np.ones(count, dtype=bool)
+        for key, op, literal in self.vector_having:
+            found = values[key]
+            valid = np.not_equal(found, None).astype(bool)
+            condition = np.zeros(count, dtype=bool)
+            condition[valid] = op(np.array(found[valid].tolist()), literal)
+            selected &= condition
+        first = np.full(count, size, dtype=np.int64)
+        np.minimum.at(first, ids, np.arange(size, dtype=np.int64))
+        result = []
+        for group in np.flatnonzero(selected).tolist():
+            row = {key: column.value(first[group]) for key, column in refs.items()}
+            for key, found in values.items():
+                row[key] = found[group]
+            if all(func(row) for func in self.row_having):
+                result.append(row)
+        return result
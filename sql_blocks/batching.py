@@ -0,0 +1,238 @@
+"""
+Batching of many small queries (dataloader style):
+
+    loader = BatchLoader(pool)
+    a = loader.load( Select('Customer c', id=eq(1)) )
+    b = loader.load( Select('Customer c', id=eq(2)) )
+    loader.dispatch()   # --- one query: ... WHERE c.id IN (1, 2)
+    a.result(), b.result()
+
+The queries with the same shape (same parameterized SQL) are merged:
+    * point lookups (a single `field = value`) into `field IN (...)`;
+    * the others into a UNION ALL, one branch per query;
+with a tag column that sends each row back to its caller.
+"""
+import re
+import asyncio
+import threading
+from copy import copy
+from concurrent.futures import Future
+from sql_blocks.sql_blocks import Select, CTE, SELECT, WHERE, GROUP_BY, ORDER_BY, LIMIT
+from sql_blocks.execution import LITERAL_REGEX, parameterize
+
+
+TAG = '_tag'
+POINT_REGEX = re.compile(r'^\s*(\w+(?:[.]\w+)?)\s*=\s*({})\s*$'.format(LITERAL_REGEX.pattern))
+
+
+def clone(query: Select) -> Select:
+    result = copy(query)
+    result.values = {key: list(values) for key, values in query.values.items()}
+    return result
+
+
+def point_lookup(query: Select) -> tuple:
+    """
+    Returns (position of the condition, field) when the only value
+    of the query is in a `field = value` condition -- or None.
+    """
+    if isinstance(query, CTE) or any(query.values.get(key) for key in (GROUP_BY, LIMIT)):
+        return None
+    _, params = parameterize(query)
+    if len(params) != 1:
+        return None
+    for pos, condition in enumerate( query.values.get(WHERE, []) ):
+        found = POINT_REGEX.match(condition)
+        if found:
+            return pos, found.group(1)
+    return None
+
+
+def can_union(query: Select) -> bool:
+    return not isinstance(query, CTE) and not any(
+        query.values.get(key) for key in (ORDER_BY, LIMIT)
+    )
+
+
+def tagged(query: Select, tag: str) -> Select:
+    result = clone(query)
+    fields = result.values.get(SELECT) or ['*']
+    result.values[SELECT] = [f'{tag} AS {TAG}'] + fields
+    return result
+
+
+def split_tag(row) -> tuple:
+    """
+    (tag, row without the tag) -- for tuples or dicts.
+    """
+    if isinstance(row, dict):
+        row = dict(row)
+        return row.pop(TAG), row
+    return row[0], tuple(row[1:])
+
+
+class Batch:
+    """
+    The pending queries of one shape and how to merge them.
+    """
+    def __init__(self, queries: list):
+        self.queries = queries
+        self.keys = [parameterize(query)[1] for query in queries]
+        self.point = point_lookup(queries[0])
+
+    def merged(self) -> Select:
+        if self.point:
+            pos, field = self.point
+            literals = []
+            for query in self.queries:
+                literal = POINT_REGEX.match(query.values[WHERE][pos]).group(2)
+                if literal not in literals:
+                    literals.append(literal)
+            result = tagged(self.queries[0], field)
+            result.values[WHERE][pos] = '{} IN ({})'.format(field, ', '.join(literals))
+            return result
+        distinct = list( dict.fromkeys(self.keys) )
+        return CTE('Batch', [
+            tagged(self.queries[self.keys.index(key)], str(i))
+            for i, key in enumerate(distinct)
+        ])
+
+    def split(self, rows: list) -> list:
+        """
+        The rows of each query, in the order of `queries`.
+        """
+        found = {}
+        for row in rows:
+            tag, row = split_tag(row)
+            found.setdefault(tag, []).append(row)
+        if self.point:
+            return [list( found.get(key[0], []) ) for key in self.keys]
+        distinct = list( dict.fromkeys(self.keys) )
+        return [list( found.get(distinct.index(key), []) ) for key in self.keys]
+
+    def run(self, executor) -> list:
+        if len(self.queries) == 1:
+            return [list( executor.execute(self.queries[0]) )]
+        if not self.point and not can_union(self.queries[0]):
+            return [list( executor.execute(query) ) for query in self.queries]
+        return self.split( executor.execute(self.merged()) )
+
+
+def batches(queries: list) -> list:
+    """
+    Groups the queries by shape: [(positions, Batch)...]
+    """
+    shapes = {}
+    for pos, query in enumerate(queries):
+        sql, _ = parameterize(query)
+        shapes.setdefault(sql, []).append(pos)
+    return [
+        (positions, Batch([queries[pos] for pos in positions]))
+        for positions in shapes.values()
+    ]
+
+
+class BatchLoader:
+    """
+    Collects queries and runs each shape once:
+        max_batch = dispatches when this count of queries is pending
+        window = seconds to wait for more queries after the first one
+                 (None = only when `dispatch` is called)
+    """
+    def __init__(self, executor, max_batch: int=100, window: float=None):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.window = window
+        self.pending = []
+        self.dispatches = 0
+        self.__timer = None
+        self.__lock = threading.Lock()
+
+    def load(self, query: Select) -> Future:
+        future = Future()
+        with self.__lock:
+            self.pending.append( (query, future) )
+            full = len(self.pending) >= self.max_batch
+            if not full and self.window is not None and self.__timer is None:
+                self.__timer = threading.Timer(self.window, self.dispatch)
+                self.__timer.daemon = True
+                self.__timer.start()
+        if full:
+            self.dispatch()
+        return future
+
+    def load_many(self, queries: list) -> list:
+        futures = [self.load(query) for query in queries]
+        self.dispatch()
+        return [future.result() for future in futures]
+
+    def dispatch(self):
+        with self.__lock:
+            pending, self.pending = self.pending, []
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+        if not pending:
+            return
+        queries = [query for query, _ in pending]
+        for positions, batch in batches(queries):
+            self.dispatches += 1
+            try:
+                results = batch.run(self.executor)
+            except Exception as error:
+                for pos in positions:
+                    if not pending[pos][1].done():
+                        pending[pos][1].set_exception(error)
+                continue
+            for pos, rows in zip(positions, results):
+                if not pending[pos][1].done():
+                    pending[pos][1].set_result(rows)
+
+
+class AsyncBatchLoader:
+    """
+    The queries awaited in the same tick of the event loop
+    are run together (in a thread, as the executors are blocking):
+        rows = await loader.load(query)
+    """
+    def __init__(self, executor, max_batch: int=100):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.pending = []
+        self.dispatches = 0
+        self.__scheduled = False
+
+    def load(self, query: Select) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append( (query, future) )
+        if len(self.pending) >= self.max_batch:
+            self.__start()
+        elif not self.__scheduled:
+            self.__scheduled = True
+            loop.call_soon(self.__start)
+        return future
+
+    async def load_many(self, queries: list) -> list:
+        return await asyncio.gather(*[self.load(query) for query in queries])
+
+    def __start(self):
+        self.__scheduled = False
+        pending, self.pending = self.pending, []
+        if pending:
+            asyncio.get_running_loop().create_task( self.dispatch(pending) )
+
+    async def dispatch(self, pending: list):
+        queries = [query for query, _ in pending]
+        for positions, batch in batches(queries):
+            self.dispatches += 1
+            try:
+                results = await asyncio.to_thread(batch.run, self.executor)
+            except Exception as error:
+                for pos in positions:
+                    if not pending[pos][1].done():
+                        pending[pos][1].set_exception(error)
+                continue
+            for pos, rows in zip(positions, results):
+                if not pending[pos][1].done():
+                    pending[pos][1].set_result(rows)
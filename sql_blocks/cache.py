@@ -0,0 +1,176 @@
+"""
+Result cache in front of an executor (ConnectionPool, LocalEngine...):
+
+    cache = ResultCache(pool, max_size=256, ttl=60)
+    rows = query.execute(cache)
+    ...
+    cache.invalidate('Product')   # --- after changing the table
+"""
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from sql_blocks.sql_blocks import Select, CTE, FROM, WHERE
+from sql_blocks.execution import parameterize
+
+
+TABLE_REGEX = re.compile(r'(?:\bFROM|\bJOIN|^\s*,)\s+([^\s(),]+)', re.IGNORECASE)
+FILE_EXTENSION = '.csv'     # --- the default of LocalEngine.table_path
+
+
+def table_tag(name: str) -> str:
+    """
+    'Airport', 'Airport.csv' and 'data/Airport.csv' --> 'airport'
+    """
+    name = name.strip('\'"').lower()
+    if name.endswith(FILE_EXTENSION):
+        name = os.path.basename(name)[:-len(FILE_EXTENSION)]
+    return name
+
+
+def query_tables(query: Select) -> set:
+    """
+    The tables of FROM (including JOINs), of the subqueries
+    of WHERE (SelectIN) and of the queries of a CTE.
+    """
+    result = set()
+    first, *others = query.values.get(FROM, [])
+    if first:
+        result.add( query.aka().strip('\'"') )
+    for text in others + query.values.get(WHERE, []):
+        result |= {name.strip('\'"') for name in TABLE_REGEX.findall(text)}
+    if isinstance(query, CTE):
+        for item in query.query_list:
+            result |= query_tables(item)
+        result = {name for name in result if table_tag(name) != table_tag(query.table_name)}
+    return result
+
+
+class CacheEntry:
+    def __init__(self, rows: list, tables: set, files: dict, expires: float):
+        self.rows = rows
+        self.tables = tables
+        self.files = files      # --- path: (mtime, size) when it was read
+        self.expires = expires
+
+
+class ResultCache:
+    """
+    Results by the parameterized SQL + bound values (LRU).
+        max_size = maximum count of results
+        ttl = seconds for a result to expire (None = until evicted)
+    Each result is tagged with its tables:
+    `invalidate(table)` drops only the results that read it
+    and, for file tables (LocalEngine), a change of the file does the same
+    -- the file `Airport.csv` is the table `Airport`.
+    """
+    def __init__(self, executor, max_size: int=128, ttl: float=None, clock: callable=time.monotonic):
+        self.executor = executor
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.tags = {}          # --- table: keys of the entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(query: Select) -> tuple:
+        return parameterize(query)
+
+    def file_signatures(self, tables: set) -> dict:
+        table_path = getattr(self.executor, 'table_path', None)
+        if table_path is None:
+            return {}
+        result = {}
+        for table in tables:
+            path = table_path(table)
+            if path and os.path.exists(path):
+                info = os.stat(path)
+                result[path] = (info.st_mtime_ns, info.st_size)
+        return result
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        for path, signature in entry.files.items():
+            try:
+                info = os.stat(path)
+            except OSError:
+                return True
+            if (info.st_mtime_ns, info.st_size) != signature:
+                return True
+        return False
+
+    def __remove(self, key: tuple):
+        entry = self.entries.pop(key)
+        for table in entry.tables:
+            keys = self.tags.get(table, set())
+            keys.discard(key)
+            if not keys:
+                self.tags.pop(table, None)
+
+    def get(self, key: tuple) -> list:
+        with self.__lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self.is_stale(entry):
+                    self.__remove(key)
+                    self.invalidations += 1
+                    entry = None
+                elif entry.expires is not None and self.clock() >= entry.expires:
+                    self.__remove(key)
+                    self.evictions += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry.rows
+
+    def put(self, key: tuple, rows: list, tables: set, files: dict):
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self.__lock:
+            if key in self.entries:
+                self.__remove(key)
+            self.entries[key] = CacheEntry(rows, tables, files, expires)
+            for table in tables:
+                self.tags.setdefault(table, set()).add(key)
+            while len(self.entries) > self.max_size:
+                self.__remove( next(iter(self.entries)) )
+                self.evictions += 1
+
+    def execute(self, query: Select) -> list:
+        key = self.key(query)
+        rows = self.get(key)
+        if rows is None:
+            tables = query_tables(query)
+            files = self.file_signatures(tables)  # --- before reading them
+            rows = list( self.executor.execute(query) )
+            self.put(key, rows, {table_tag(name) for name in tables}, files)
+        return list(rows)
+
+    def stream(self, query: Select, batch_size: int=100):
+        return iter( self.execute(query) )
+
+    def invalidate(self, table: str) -> int:
+        """
+        Drops the results that read `table`; returns how many.
+        """
+        with self.__lock:
+            keys = list( self.tags.get(table_tag(table), []) )
+            for key in keys:
+                self.__remove(key)
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,221 @@
+"""
+Columnar cache for file tables:
+
+    Flyght.csv  -->  Flyght.csv.cols/
+                        manifest.json
+                        0.npy, 0.dict.npy, 1.npy ...
+
+One `.npy` per column, read with memory mapping and rebuilt when the source changes:
+    int   = int64 (+ `.null.npy`, a mask of the NULLs)
+    float = float64 (NaN as NULL)
+    str   = dictionary codes + `.dict.npy`
+    mixed = dictionary codes + `.dict.json` -- keeps the type of each value
+The values come back with the same types of the CSV scan.
+"""
+import os
+import json
+from sql_blocks.engine import CSVTable, bloom_checks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MANIFEST_VERSION = 2
+CHUNK_SIZE = 65536
+NULL_CODE = -1
+
+
+def source_signature(path: str) -> dict:
+    info = os.stat(path)
+    return {'mtime': info.st_mtime_ns, 'size': info.st_size}
+
+
+class ColumnarTable:
+    def __init__(self, source: str, folder: str=''):
+        if np is None:
+            raise ImportError('The columnar cache requires numpy.')
+        self.source = source
+        self.folder = folder or source + '.cols'
+        self.manifest = self.read_manifest()
+        if not self.is_valid():
+            self.manifest = self.build()
+        self.columns = [col['name'] for col in self.manifest['columns']]
+        self.__arrays = {}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.folder, 'manifest.json')
+
+    def read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def is_valid(self) -> bool:
+        return all([
+            self.manifest.get('version') == MANIFEST_VERSION,
+            self.manifest.get('source') == source_signature(self.source),
+        ])
+
+    @property
+    def row_count(self) -> int:
+        return self.manifest['rows']
+
+    def estimate(self) -> int:
+        return self.row_count
+
+    # ---- Conversion: -----------------
+    def build(self) -> dict:
+        """
+        Two passes over the CSV: the first one infers the types,
+        the second writes each column straight into its `.npy` file.
+        """
+        signature = source_signature(self.source)
+        csv_table = CSVTable(self.source)
+        names = csv_table.columns
+        types = {name: set() for name in names}
+        nulls = {name: False for name in names}
+        rows = 0
+        for row in csv_table.scan('', names):
+            rows += 1
+            for name in names:
+                value = row['.' + name]
+                if value is None:
+                    nulls[name] = True
+                else:
+                    types[name].add( type(value) )
+        os.makedirs(self.folder, exist_ok=True)
+        columns, arrays, masks, dictionaries = [], {}, {}, {}
+        def create(file_name: str, dtype):
+            return np.lib.format.open_memmap(
+                os.path.join(self.folder, file_name),
+                mode='w+', dtype=dtype, shape=(rows,)
+            )
+        for name in names:
+            # --- int, float, str (only NULLs = int) or mixed:
+            kind = 'mixed' if len(types[name]) > 1 else next(iter(types[name]), int).__name__
+            pos = len(columns)
+            column = {'name': name, 'type': kind, 'file': f'{pos}.npy'}
+            dtype = {'int': np.int64, 'float': np.float64}.get(kind, np.int32)
+            arrays[name] = create(column['file'], dtype)
+            if kind == 'int' and nulls[name]:
+                column['nulls'] = f'{pos}.null.npy'
+                masks[name] = create(column['nulls'], np.bool_)
+            elif kind in ('str', 'mixed'):
+                column['dictionary'] = f'{pos}.dict.' + ('npy' if kind == 'str' else 'json')
+                dictionaries[name] = {}
+            columns.append(column)
+        buffers = {name: [] for name in names}
+        start = 0
+        def flush(start: int) -> int:
+            size = 0
+            for name, values in buffers.items():
+                size = len(values)
+                if name in masks:
+                    masks[name][start: start+size] = [v is None for v in values]
+                    values = [0 if v is None else v for v in values]
+                arrays[name][start: start+size] = values
+                buffers[name] = []
+            return start + size
+        for row in csv_table.scan('', names):
+            for name in names:
+                value = row['.' + name]
+                codes = dictionaries.get(name)
+                if codes is not None:   # --- (type, value): 1 and '1' are different words
+                    value = NULL_CODE if value is None else codes.setdefault(
+                        (type(value), value), len(codes)
+                    )
+                elif value is None and name not in masks:
+                    value = np.nan
+                buffers[name].append(value)
+            if len(buffers[names[0]]) >= CHUNK_SIZE:
+                start = flush(start)
+        if names:
+            flush(start)
+        for column in columns:
+            name = column['name']
+            arrays[name].flush()
+            if name in masks:
+                masks[name].flush()
+            words = [value for _, value in dictionaries.get(name, [])]
+            if column['type'] == 'str':
+                np.save(
+                    os.path.join(self.folder, column['dictionary']),
+                    np.array(words or [''], dtype=str)
+                )
+            elif column['type'] == 'mixed':
+                with open(os.path.join(self.folder, column['dictionary']), 'w') as file:
+                    json.dump(words, file)
+        manifest = {
+            'version': MANIFEST_VERSION, 'source': signature,
+            'rows': rows, 'columns': columns,
+        }
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(manifest, file)
+        os.replace(temp_path, self.manifest_path)
+        return manifest
+
+    # ---- Reading: --------------------
+    def array(self, name: str):
+        """
+        The memory-mapped column: (type, values, words, nulls)
+        -- values are codes of the words, for str and mixed.
+        """
+        if name not in self.__arrays:
+            column = self.manifest['columns'][ self.columns.index(name) ]
+            load = lambda key: np.load(
+                os.path.join(self.folder, column[key]), mmap_mode='r'
+            )
+            words, nulls = None, None
+            if column['type'] == 'str':
+                words = load('dictionary').tolist()
+            elif column['type'] == 'mixed':
+                with open(os.path.join(self.folder, column['dictionary'])) as file:
+                    words = json.load(file)
+            if 'nulls' in column:
+                nulls = load('nulls')
+            self.__arrays[name] = (column['type'], load('file'), words, nulls)
+        return self.__arrays[name]
+
+    def values(self, name: str, start: int, end: int) -> list:
+        kind, values, words, nulls = self.array(name)
+        chunk = values[start:end].tolist()
+        if words is not None:
+            return [None if code == NULL_CODE else words[code] for code in chunk]
+        if kind == 'float':
+            return [None if v != v else v for v in chunk]
+        if nulls is not None:
+            return [None if null else v for v, null in zip(chunk, nulls[start:end].tolist())]
+        return chunk
+
+    def scan(self, alias: str, columns: list, predicate=None, blooms: list=()):
+        keys = [f'{alias}.{col}' for col in columns]
+        checks = [
+            ([columns.index(self.columns[i]) for i in indexes], bloom)
+            for indexes, bloom in bloom_checks(self.columns, blooms)
+        ]
+        for start in range(0, self.row_count, CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            chunks = [self.values(col, start, end) for col in columns]
+            size = min(end, self.row_count) - start
+            for i in range(size):
+                if checks and not all(
+                    tuple(chunks[pos][i] for pos in positions) in bloom
+                    for positions, bloom in checks
+                ):
+                    continue
+                row = {key: chunk[i] for key, chunk in zip(keys, chunks)}
+                if predicate is None or predicate(row):
+                    yield row
+
+
+def convert(path: str, folder: str='') -> ColumnarTable:
+    """
+    Creates (or refreshes) the columnar cache of a CSV file.
+    """
+    return ColumnarTable(path, folder)
@@ -0,0 +1,1220 @@
+"""
+Runs Select objects over CSV files, without a database:
+
+    engine = LocalEngine('data/')
+    rows = Select('Flyght.csv f', departure=eq('JFK'), arrival=Field).execute(engine)
+"""
+import os
+import re
+import csv
+import math
+import mmap
+import operator
+from itertools import islice
+from sql_blocks.sql_blocks import (
+    Select, CTE, Recursive, SELECT, FROM, WHERE, GROUP_BY, ORDER_BY, LIMIT, WINDOW, JoinType
+)
+
+
+# ---- Expressions: ---------------------------------------
+TOKEN_REGEX = re.compile(r'''\s*(?:
+    (?P<string>'(?:[^']|'')*'|"[^"]*")
+  | (?P<number>\d+(?:[.]\d*)?|[.]\d+)
+  | (?P<name>[A-Za-z_]\w*(?:[.](?:\w+|[*]))?)
+  | (?P<symbol><>|!=|>=|<=|[|][|]|[-+*/%=<>(),])
+)''', re.VERBOSE)
+COMPARISON = {
+    '=': operator.eq, '<>': operator.ne, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+ARITHMETIC = {
+    '+': operator.add, '-': operator.sub, '||': lambda a, b: f'{a}{b}',
+    '*': operator.mul, '/': operator.truediv, '%': operator.mod,
+}
+SCALAR_FUNCTIONS = {
+    'ROUND': lambda value, digits=0: round(value, digits),
+    'ABS': abs,
+    'UPPER': lambda value: value.upper(),
+    'LOWER': lambda value: value.lower(),
+    'LENGTH': len,
+    'SUBSTRING': lambda value, start, size=None: value[start-1: None if size is None else start-1+size],
+    'SUBSTR': lambda value, start, size=None: value[start-1: None if size is None else start-1+size],
+    'YEAR': lambda value: int(str(value)[:4]),
+}
+AGGREGATE_FUNCTIONS = ('AVG', 'MIN', 'MAX', 'SUM', 'COUNT')
+
+
+def constant(value):
+    func = lambda row: value
+    func.const = True
+    return func
+
+def compare(op: callable, a, b):
+    if a is None or b is None:
+        return None
+    try:
+        return op(a, b)
+    except TypeError:
+        return op(str(a), str(b))
+
+def null_first(value) -> tuple:
+    """
+    Sort key for values of any type (NULLs first).
+    """
+    if value is None:
+        return (0,)
+    return (1, isinstance(value, str), value)
+
+def like_regex(pattern: str) -> re.Pattern:
+    return re.compile(
+        ''.join(
+            '.*' if char == '%' else '.' if char == '_' else re.escape(char)
+            for char in pattern
+        ), re.DOTALL
+    )
+
+
+class Scope:
+    """
+    Resolves field names to the keys of the rows ("alias.field").
+    """
+    def __init__(self, tables: dict):
+        self.tables = tables    # --- alias: column list
+        self.names = {}         # --- extra names (ex.: output aliases)
+        self.used = set()       # --- keys referenced by the expressions
+
+    def resolve(self, name: str) -> str:
+        if name in self.names:
+            return self.names[name]
+        if '.' in name:
+            alias, field = name.split('.')
+            columns = self.tables.get(alias)
+            if columns is None:
+                raise ValueError(f'Unknown alias `{alias}`.')
+            found = [col for col in columns if col.lower() == field.lower()]
+        else:
+            found = [
+                (alias, col) for alias, columns in self.tables.items()
+                for col in columns if col.lower() == name.lower()
+            ]
+            if len(found) > 1:
+                raise ValueError(f'Ambiguous field `{name}`.')
+            if found:
+                alias, *found = found[0]
+        if not found:
+            raise ValueError(f'Unknown field `{name}`.')
+        return f'{alias}.{found[0]}'
+
+    def expand(self, alias: str='') -> list:
+        return [
+            f'{a}.{col}' for a, columns in self.tables.items()
+            for col in columns if a == alias or not alias
+        ]
+
+
+class Expression:
+    """
+    Compiles SQL expressions into functions of a row:
+        func = Expression("a.age >= 45 AND a.name LIKE 'J%'", scope).func
+    """
+    def __init__(
+        self, text: str, scope: Scope, engine=None,
+        aggregates: list=None, windows: list=None
+    ):
+        self.text = text
+        self.scope = scope
+        self.engine = engine
+        self.aggregates = aggregates  # --- (function, argument, key) of the GROUP BY
+        self.windows = windows        # --- WindowFunction list
+        self.refs = set()
+        self.tokens = self.tokenize(text)
+        self.pos = 0
+        self.func = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise SyntaxError(f'Unexpected `{self.peek()}` in: {text}')
+
+    @staticmethod
+    def tokenize(text: str) -> list:
+        tokens, pos = [], 0
+        text = text.rstrip()
+        while pos < len(text):
+            found = TOKEN_REGEX.match(text, pos)
+            if not found:
+                raise SyntaxError(f'Invalid expression: {text[pos:]}')
+            tokens.append( (found.lastgroup, found.group(found.lastgroup), found.end()) )
+            pos = found.end()
+        return tokens
+
+    def peek(self, offset: int=0) -> str:
+        pos = self.pos + offset
+        if pos >= len(self.tokens):
+            return ''
+        kind, value, _ = self.tokens[pos]
+        return value.upper() if kind == 'name' else value
+
+    def take(self, *expected) -> str:
+        value = self.peek()
+        if expected and value not in expected:
+            raise SyntaxError(f'Expected {expected} in: {self.text}')
+        self.pos += 1
+        return value
+
+    # ---- Logical operators: ----------
+    def parse_or(self):
+        funcs = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            funcs.append( self.parse_and() )
+        if len(funcs) == 1:
+            return funcs[0]
+        def sql_or(row):
+            result = False
+            for func in funcs:
+                value = func(row)
+                if value:
+                    return True
+                if value is None:
+                    result = None
+            return result
+        return sql_or
+
+    def parse_and(self):
+        funcs = [self.parse_not()]
+        while self.peek() == 'AND':
+            self.take()
+            funcs.append( self.parse_not() )
+        if len(funcs) == 1:
+            return funcs[0]
+        def sql_and(row):
+            result = True
+            for func in funcs:
+                value = func(row)
+                if value is None:
+                    result = None
+                elif not value:
+                    return False
+            return result
+        return sql_and
+
+    def parse_not(self):
+        if self.peek() != 'NOT':
+            return self.parse_predicate()
+        self.take()
+        func = self.parse_not()
+        def sql_not(row):
+            value = func(row)
+            return None if value is None else not value
+        return sql_not
+
+    # ---- Predicates: -----------------
+    def parse_predicate(self):
+        func = self.parse_additive()
+        negate = False
+        if self.peek() == 'NOT' and self.peek(1) in ('LIKE', 'IN', 'BETWEEN'):
+            self.take()
+            negate = True
+        op = self.peek()
+        if op in COMPARISON:
+            self.take()
+            other, op = self.parse_additive(), COMPARISON[op]
+            result = lambda row: compare(op, func(row), other(row))
+        elif op == 'LIKE':
+            self.take()
+            result = self.like(func, self.parse_additive())
+        elif op == 'IN':
+            self.take()
+            result = self.inside(func)
+        elif op == 'BETWEEN':
+            self.take()
+            start = self.parse_additive()
+            self.take('AND')
+            end = self.parse_additive()
+            result = self.between(func, start, end)
+        elif op == 'IS':
+            self.take()
+            negate = self.peek() == 'NOT'
+            if negate:
+                self.take()
+            self.take('NULL')
+            result = lambda row: func(row) is None
+        else:
+            return func
+        if not negate:
+            return result
+        def negative(row):
+            value = result(row)
+            return None if value is None else not value
+        return negative
+
+    @staticmethod
+    def like(func, pattern):
+        if getattr(pattern, 'const', False):
+            regex = like_regex(pattern(None))
+            return lambda row: compare(
+                lambda v, _: regex.fullmatch(str(v)) is not None, func(row), True
+            )
+        return lambda row: compare(
+            lambda v, p: like_regex(p).fullmatch(str(v)) is not None,
+            func(row), pattern(row)
+        )
+
+    @staticmethod
+    def between(func, start, end):
+        def sql_between(row):
+            value, low, high = func(row), start(row), end(row)
+            if None in (value, low, high):
+                return None
+            return compare(operator.ge, value, low) and compare(operator.le, value, high)
+        return sql_between
+
+    def inside(self, func):
+        if self.peek(1) == 'SELECT':
+            values = self.subquery()
+            return lambda row: compare(operator.contains, values(), func(row))
+        self.take('(')
+        items = [self.parse_additive()]
+        while self.peek() == ',':
+            self.take()
+            items.append( self.parse_additive() )
+        self.take(')')
+        if all(getattr(item, 'const', False) for item in items):
+            values = frozenset(item(None) for item in items)
+            return lambda row: compare(operator.contains, values, func(row))
+        return lambda row: compare(
+            operator.contains, {item(row) for item in items}, func(row)
+        )
+
+    def subquery(self) -> callable:
+        start = self.tokens[self.pos][2]
+        depth = 0
+        while True:
+            value = self.take()
+            if not value:
+                raise SyntaxError(f'Missing `)` in: {self.text}')
+            depth += {'(': 1, ')': -1}.get(value, 0)
+            if depth == 0:
+                break
+        end = self.tokens[self.pos-1][2] - 1
+        query = Select.parse(self.text[start:end])[0]
+        cache = []
+        def values() -> set:
+            if not cache:
+                cache.append({row[0] for row in self.engine.plan(query)})
+            return cache[0]
+        return values
+
+    # ---- Arithmetic: -----------------
+    def parse_additive(self):
+        func = self.parse_term()
+        while self.peek() in ('+', '-', '||'):
+            func = self.arithmetic(ARITHMETIC[self.take()], func, self.parse_term())
+        return func
+
+    def parse_term(self):
+        func = self.parse_unary()
+        while self.peek() in ('*', '/', '%'):
+            func = self.arithmetic(ARITHMETIC[self.take()], func, self.parse_unary())
+        return func
+
+    @staticmethod
+    def arithmetic(op: callable, left, right):
+        def calc(row):
+            a, b = left(row), right(row)
+            if a is None or b is None:
+                return None
+            return op(a, b)
+        return calc
+
+    def parse_unary(self):
+        if self.peek() == '-':
+            self.take()
+            func = self.parse_unary()
+            return lambda row: None if func(row) is None else -func(row)
+        return self.parse_primary()
+
+    def parse_primary(self):
+        if self.pos >= len(self.tokens):
+            raise SyntaxError(f'Incomplete expression: {self.text}')
+        kind, value, _ = self.tokens[self.pos]
+        self.pos += 1
+        if kind == 'string':
+            return constant(value[1:-1].replace("''", "'"))
+        if kind == 'number':
+            return constant(float(value) if '.' in value else int(value))
+        if value == '(':
+            func = self.parse_or()
+            self.take(')')
+            return func
+        if kind != 'name':
+            raise SyntaxError(f'Unexpected `{value}` in: {self.text}')
+        word = value.upper()
+        if word in ('NULL', 'TRUE', 'FALSE'):
+            return constant({'NULL': None, 'TRUE': True, 'FALSE': False}[word])
+        if self.peek() == '(':
+            return self.function(word)
+        key = self.scope.resolve(value)
+        self.refs.add(key)
+        self.scope.used.add(key)
+        func = lambda row: row[key]
+        func.key = key
+        return func
+
+    def function(self, name: str):
+        self.take('(')
+        args = []
+        while self.peek() != ')':
+            if self.peek() == '*':
+                self.take()
+                args.append( constant('*') )
+            else:
+                args.append( self.parse_or() )
+            if self.peek() == ',':
+                self.take()
+        self.take(')')
+        if self.peek() == 'OVER':
+            return self.window(name, args)
+        if name in AGGREGATE_FUNCTIONS:
+            return self.aggregate(name, args)
+        if name == 'COALESCE':
+            def coalesce(row):
+                for arg in args:
+                    value = arg(row)
+                    if value is not None:
+                        return value
+            return coalesce
+        if name not in SCALAR_FUNCTIONS:
+            raise ValueError(f'Function {name} is not supported.')
+        func = SCALAR_FUNCTIONS[name]
+        def call(row):
+            values = [arg(row) for arg in args]
+            if values and values[0] is None:
+                return None
+            return func(*values)
+        return call
+
+    def aggregate(self, name: str, args: list):
+        """
+        Registers the aggregate in `self.aggregates`:
+        the grouped rows carry its result by the key "#<position>".
+        """
+        if self.aggregates is None:
+            raise ValueError(f'Aggregate function {name} is not allowed here.')
+        if len(args) > 1:
+            raise SyntaxError(f'{name} expects one argument in: {self.text}')
+        arg = args[0] if args else None
+        if getattr(arg, 'const', False) and arg(None) == '*':
+            arg = None
+        if arg is None and name != 'COUNT':
+            raise SyntaxError(f'{name} without argument in: {self.text}')
+        key = f'#{len(self.aggregates)}'
+        self.aggregates.append( (name, arg, key) )
+        return lambda row: row[key]
+
+    # ---- Window functions: -----------
+    def window(self, name: str, args: list):
+        """
+        name(args) OVER(PARTITION BY ... ORDER BY ... ROWS ...)
+        is registered in `self.windows`, as the aggregates.
+        """
+        from sql_blocks.window import WindowFunction, WINDOW_FUNCTIONS
+        if self.windows is None:
+            raise ValueError(f'Window function {name} is not allowed here.')
+        if name not in WINDOW_FUNCTIONS:
+            raise ValueError(f'Window function {name} is not supported.')
+        self.take('OVER')
+        self.take('(')
+        start = self.pos
+        partition, order, frame = [], [], None
+        if self.peek() == 'PARTITION':
+            self.take()
+            self.take('BY')
+            partition = [func for func, _ in self.expression_list()]
+        if self.peek() == 'ORDER':
+            self.take()
+            self.take('BY')
+            order = self.expression_list()
+        spec = tuple(value.upper() for _, value, _ in self.tokens[start:self.pos])
+        if self.peek() == 'ROWS':
+            self.take()
+            if self.peek() == 'BETWEEN':
+                self.take()
+                first = self.window_bound()
+                self.take('AND')
+                frame = (first, self.window_bound())
+            else:
+                frame = (self.window_bound(), 0)
+        elif self.peek() == 'RANGE':
+            raise ValueError(f'RANGE frames are not supported: {self.text}')
+        self.take(')')
+        if getattr(args[0] if args else None, 'const', False) and args[0](None) == '*':
+            args = []
+        key = f'${len(self.windows)}'
+        self.windows.append(
+            WindowFunction(name, args, partition, order, frame, spec, key)
+        )
+        return lambda row: row[key]
+
+    def expression_list(self) -> list:
+        """
+        Returns [(func, descending)...]
+        """
+        result = []
+        while True:
+            func = self.parse_additive()
+            descending = False
+            if self.peek() in ('ASC', 'DESC'):
+                descending = self.take() == 'DESC'
+            result.append( (func, descending) )
+            if self.peek() != ',':
+                return result
+            self.take()
+
+    def window_bound(self):
+        """
+        Offset from the current row (None = UNBOUNDED).
+        """
+        if self.peek() == 'UNBOUNDED':
+            self.take()
+            self.take('PRECEDING', 'FOLLOWING')
+            return None
+        if self.peek() == 'CURRENT':
+            self.take()
+            self.take('ROW')
+            return 0
+        count = int( self.take() )
+        if self.take('PRECEDING', 'FOLLOWING') == 'PRECEDING':
+            return -count
+        return count
+# ---------------------------------------------------------
+
+
+# ---- Tables: --------------------------------------------
+NUMERIC_START = set('-+.0123456789') | set(b'-+.0123456789')
+
+def parse_value(raw):
+    if not raw:
+        return None
+    if raw[0] in NUMERIC_START:
+        try:
+            return int(raw)
+        except ValueError:
+            try:
+                return float(raw)
+            except ValueError:
+                pass
+    return raw.decode() if isinstance(raw, bytes) else raw
+
+
+class BloomFilter:
+    def __init__(self, keys, error_rate: float=0.01):
+        keys = [key for key in keys if None not in key]
+        count = max(len(keys), 1)
+        self.size = max(64, int(-count * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / count * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+        for key in keys:
+            self.add(key)
+
+    def positions(self, key: tuple):
+        value = hash(key)
+        h1, h2 = value & 0xFFFFFFFF, (value >> 32) & 0xFFFFFFFF | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: tuple):
+        for pos in self.positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: tuple) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7))
+            for pos in self.positions(key)
+        )
+
+
+def bloom_checks(columns: list, blooms: list) -> list:
+    """
+    [(field names, BloomFilter)...] --> [(field positions, BloomFilter)...]
+    """
+    return [
+        ([columns.index(col) for col in names], bloom)
+        for names, bloom in blooms
+    ]
+
+
+class CSVTable:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            self.columns = [col.strip() for col in next(csv.reader(file), [])]
+
+    def estimate(self) -> int:
+        """
+        Row count estimated by the size of the first lines.
+        """
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as file:
+            sample = file.read(65536)
+        lines = sample.count(b'\n')
+        if size <= len(sample):
+            return max(lines - 1, 0)
+        return int( size / (len(sample) / max(lines, 1)) )
+
+    @staticmethod
+    def split_line(line: bytes, data: mmap.mmap) -> list:
+        line = line.rstrip(b'\r\n')
+        if b'"' not in line:
+            return line.split(b',')
+        while line.count(b'"') % 2:  # --- Line break inside quotes
+            next_line = data.readline()
+            if not next_line:
+                break
+            line += b'\n' + next_line.rstrip(b'\r\n')
+        return next( csv.reader([line.decode()]) )
+
+    def scan(self, alias: str, columns: list, predicate=None, blooms: list=()):
+        """
+        Memory-maps the file and converts only the `columns` of each line.
+        Lines whose keys are not in the `blooms` are skipped before that.
+        """
+        positions = [
+            (f'{alias}.{col}', self.columns.index(col))
+            for col in columns
+        ]
+        checks = bloom_checks(self.columns, blooms)
+        with open(self.path, 'rb') as file:
+            if os.fstat( file.fileno() ).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                data.readline()  # --- header
+                for line in iter(data.readline, b''):
+                    fields = self.split_line(line, data)
+                    if fields == [b''] or fields == []:
+                        continue
+                    if checks and not all(
+                        tuple(
+                            parse_value(fields[i]) if i < len(fields) else None
+                            for i in indexes
+                        ) in bloom for indexes, bloom in checks
+                    ):
+                        continue
+                    row = {
+                        key: parse_value(fields[i]) if i < len(fields) else None
+                        for key, i in positions
+                    }
+                    if predicate is None or predicate(row):
+                        yield row
+
+
+class MemoryTable:
+    def __init__(self, columns: list, rows: list):
+        self.columns = columns
+        self.rows = rows
+
+    def estimate(self) -> int:
+        return len(self.rows)
+
+    def scan(self, alias: str, columns: list, predicate=None, blooms: list=()):
+        positions = [
+            (f'{alias}.{col}', self.columns.index(col))
+            for col in columns
+        ]
+        checks = bloom_checks(self.columns, blooms)
+        for record in self.rows:
+            if checks and not all(
+                tuple(record[i] for i in indexes) in bloom
+                for indexes, bloom in checks
+            ):
+                continue
+            row = {key: record[i] for key, i in positions}
+            if predicate is None or predicate(row):
+                yield row
+# ---------------------------------------------------------
+
+
+JOIN_REGEX = re.compile(
+    r'^\s*(?:(LEFT|RIGHT|FULL|INNER)\s+)?JOIN\s+(\S+)\s+(\w+)\s+ON\s+(.*)$',
+    re.IGNORECASE | re.DOTALL
+)
+COMMA_REGEX = re.compile(r'^\s*,\s*(\S+)\s+(\w+)\s*$')
+EQUI_JOIN_REGEX = re.compile(
+    r'^\s*[(]?\s*([A-Za-z_]\w*[.]\w+)\s*=\s*([A-Za-z_]\w*[.]\w+)\s*[)]?\s*$'
+)
+ALIAS_REGEX = re.compile(r'^(.*?)\s+as\s+(\w+)\s*$', re.IGNORECASE | re.DOTALL)
+SORT_REGEX = re.compile(r'^(.*?)(?:\s+(ASC|DESC))?\s*$', re.IGNORECASE | re.DOTALL)
+TOP_REGEX = re.compile(r'^SELECT\s+TOP\s*[(]\s*(\d+)\s*[)]\s*', re.IGNORECASE)
+NAMED_WINDOW_REGEX = re.compile(
+    r'\bOVER\s+(\w+)\b|\bOVER\s*[(]\s*(\w+)\s+((?:ROWS|RANGE)\b[^()]*)[)]', re.IGNORECASE
+)
+WINDOW_SPEC_REGEX = re.compile(r'^\s*(\w+)\s+AS\s+[(](.*)[)]\s*$', re.IGNORECASE | re.DOTALL)
+COUNTER_REGEX = re.compile(r"^[^']*[-+*/%]")   # --- arithmetic (outside texts)
+
+
+def split_alias(text: str) -> tuple:
+    """
+    'a.name as actor' --> ('a.name', 'actor')
+    """
+    text = text.strip()
+    found = ALIAS_REGEX.match(text)
+    if found:
+        return found.groups()
+    return text, text.split('.')[-1]
+
+
+class Source:
+    def __init__(self, table, alias: str, join_type: JoinType=None, condition: str=''):
+        self.table = table
+        self.alias = alias
+        self.join_type = join_type
+        self.condition = condition
+        self.keys = []           # --- (left key, right key)
+        self.predicates = []     # --- pushed down conditions
+        self.blooms = []         # --- (field names, BloomFilter) of a HashJoin
+
+    @property
+    def nullable(self) -> bool:
+        return self.join_type in (JoinType.LEFT, JoinType.FULL)
+
+    def scan(self, scope: Scope):
+        columns = [
+            key.split('.', 1)[1] for key in scope.used
+            if key.split('.', 1)[0] == self.alias
+        ]
+        predicates = self.predicates
+        def predicate(row) -> bool:
+            return all(func(row) for func in predicates)
+        return self.table.scan(
+            self.alias, columns, predicate if predicates else None, self.blooms
+        )
+
+
+class HashJoin:
+    """
+    Builds the hash table with the smaller input (by the row estimates)
+    and probes it with the other one. A Bloom filter of the build keys
+    is pushed into the probe-side scan when the JOIN type
+    does not keep the rows of that side without a match.
+    """
+    def __init__(self, plan: 'Plan', position: int):
+        self.plan = plan
+        self.source = plan.sources[position]
+        self.left_sources = plan.sources[:position]
+        self.left_keys = [left for left, _ in self.source.keys]
+        self.right_keys = [right for _, right in self.source.keys]
+        self.conditions = [func for src, func in plan.conditions if src is self.source]
+        join_type = self.source.join_type
+        self.keep_left = join_type in (JoinType.LEFT, JoinType.FULL)
+        self.keep_right = join_type in (JoinType.RIGHT, JoinType.FULL)
+        self.build_right = self.source.table.estimate() <= max(
+            src.table.estimate() for src in self.left_sources
+        )
+        right_alias = self.source.alias + '.'
+        self.empty_right = {key: None for key in plan.scope.used if key.startswith(right_alias)}
+        left_aliases = {src.alias for src in self.left_sources}
+        self.empty_left = {
+            key: None for key in plan.scope.used
+            if key.split('.')[0] in left_aliases
+        }
+        self.index = None
+
+    @staticmethod
+    def build(rows, keys: list) -> dict:
+        index = {}
+        for row in rows:
+            index.setdefault(tuple(row[k] for k in keys), []).append(row)
+        return index
+
+    @staticmethod
+    def push_bloom(index: dict, keys: list, sources: list):
+        aliases = {key.split('.')[0] for key in keys}
+        if not keys or len(aliases) > 1:
+            return
+        alias = aliases.pop()
+        for source in sources:
+            if source.alias == alias:
+                names = [key.split('.', 1)[1] for key in keys]
+                source.blooms.append( (names, BloomFilter(index)) )
+
+    def prepare(self):
+        """
+        Builds the right side before any scan starts
+        (the joins are prepared from the last one).
+        """
+        if not self.build_right:
+            return
+        self.index = self.build(self.source.scan(self.plan.scope), self.right_keys)
+        if not self.keep_left:
+            self.push_bloom(self.index, self.left_keys, self.left_sources)
+
+    def probe(self, rows, index: dict, keys: list, keep_probe: bool, keep_build: bool, empty: dict, empty_build: dict):
+        matched = set()
+        for row in rows:
+            key = tuple(row[k] for k in keys)
+            emitted = False
+            if None not in key:
+                for other in index.get(key, []):
+                    joined = {**row, **other}
+                    if all(func(joined) for func in self.conditions):
+                        matched.add( id(other) )
+                        emitted = True
+                        yield joined
+            if not emitted and keep_probe:
+                yield {**row, **empty}
+        if keep_build:
+            for found in index.values():
+                for other in found:
+                    if id(other) not in matched:
+                        yield {**empty_build, **other}
+
+    def rows(self, left_rows):
+        if self.build_right:
+            return self.probe(
+                left_rows, self.index, self.left_keys,
+                self.keep_left, self.keep_right, self.empty_right, self.empty_left
+            )
+        index = self.build(left_rows, self.left_keys)
+        if not self.keep_right:
+            self.push_bloom(index, self.right_keys, [self.source])
+        return self.probe(
+            self.source.scan(self.plan.scope), index, self.right_keys,
+            self.keep_right, self.keep_left, self.empty_left, self.empty_right
+        )
+
+
+class Plan:
+    """
+    The steps to run a query in the LocalEngine:
+    scan (with the pushed down conditions) > join > filter > group > window > project > sort > limit
+    """
+    def __init__(self, query: Select, engine: 'LocalEngine', relations: dict=None):
+        self.query = query
+        self.engine = engine
+        self.relations = relations or {}
+        self.named_windows = dict(
+            WINDOW_SPEC_REGEX.match(text).groups()
+            for text in query.values.get(WINDOW, [])
+        )
+        self.sources = self.get_sources()
+        self.scope = Scope({src.alias: src.table.columns for src in self.sources})
+        self.conditions = []
+        self.distinct = False
+        self.offset, self.limit = 0, None
+        self.aggregates, self.windows = [], []
+        self.outputs = self.get_outputs()
+        self.columns = [name for name, _ in self.outputs]
+        self.set_conditions()
+        self.sort_keys = self.get_sort_keys()
+        self.set_limit()
+        self.aggregation = self.get_aggregation()
+
+    def compile(self, text: str, grouped: bool=False) -> Expression:
+        """
+        grouped = True: aggregate and window functions are allowed (SELECT, ORDER BY, HAVING).
+        """
+        if not grouped:
+            return Expression(text, self.scope, self.engine)
+        if self.named_windows:
+            text = NAMED_WINDOW_REGEX.sub(self.expand_window, text)
+        return Expression(text, self.scope, self.engine, self.aggregates, self.windows)
+
+    def expand_window(self, found) -> str:
+        """
+        OVER w1 / OVER (w1 ROWS ...) --> OVER(<spec of w1> ROWS ...)
+        """
+        name = found.group(1) or found.group(2)
+        if name not in self.named_windows:
+            raise SyntaxError(f'Unknown window `{name}`')
+        return 'OVER({} {})'.format(self.named_windows[name], found.group(3) or '')
+
+    def table(self, name: str):
+        return self.relations.get(name) or self.engine.table(name)
+
+    def get_sources(self) -> list:
+        first, *others = self.query.values[FROM]
+        table_name = self.query.aka()
+        result = [Source(self.table(table_name), self.query.alias)]
+        for text in others:
+            found = JOIN_REGEX.match(text)
+            if found:
+                join_type, table_name, alias, condition = found.groups()
+                join_type = JoinType[(join_type or 'INNER').upper()]
+            else:
+                found = COMMA_REGEX.match(text)
+                if not found:
+                    raise SyntaxError(f'Unsupported table expression: {text}')
+                (table_name, alias), join_type, condition = found.groups(), JoinType.INNER, ''
+            result.append(
+                Source(self.table(table_name), alias, join_type, condition)
+            )
+        return result
+
+    def get_outputs(self) -> list:
+        result = []
+        for i, text in enumerate(self.query.values.get(SELECT, [])):
+            found = TOP_REGEX.match(text)
+            if found:
+                self.limit = int(found.group(1))
+                text = text[found.end():]
+            if i == 0 and text.upper().startswith('DISTINCT '):
+                self.distinct = True
+                text = text[9:]
+            text, name = split_alias(text)
+            if text == '*' or text.endswith('.*'):
+                for key in self.scope.expand( text[:-2] ):
+                    self.scope.used.add(key)
+                    result.append( (key.split('.', 1)[1], self.getter(key)) )
+                continue
+            result.append( (name, self.compile(text, grouped=True).func) )
+        if not result:
+            for key in self.scope.expand():
+                self.scope.used.add(key)
+                result.append( (key.split('.', 1)[1], self.getter(key)) )
+        return result
+
+    @staticmethod
+    def getter(key: str):
+        return lambda row: row[key]
+
+    def set_conditions(self):
+        aliases = [src.alias for src in self.sources]
+        on_conditions = [(src, src.condition) for src in self.sources if src.condition]
+        where_list = [(None, cond) for cond in self.query.values.get(WHERE, [])]
+        for source, text in on_conditions + where_list:
+            expr = self.compile(text)
+            found = EQUI_JOIN_REGEX.match(text)
+            if found:
+                k1, k2 = [self.scope.resolve(name) for name in found.groups()]
+                a1, a2 = [aliases.index(key.split('.')[0]) for key in (k1, k2)]
+                target = self.sources[max(a1, a2)]
+                if a1 != a2 and (source is target or not target.condition):
+                    target.keys.append( (k1, k2) if a1 < a2 else (k2, k1) )
+                    continue
+            used = {key.split('.')[0] for key in expr.refs}
+            if len(used) == 1 and source is None:
+                target = self.sources[ aliases.index(used.pop()) ]
+                if not self.receives_nulls(target):
+                    target.predicates.append(expr.func)
+                    continue
+            self.conditions.append( (source, expr.func) )
+
+    def receives_nulls(self, source: Source) -> bool:
+        """
+        An OUTER JOIN can fill the fields of `source` with NULL,
+        so its conditions cannot be pushed down to the scan.
+        """
+        i = self.sources.index(source)
+        return source.nullable or any(
+            src.join_type in (JoinType.RIGHT, JoinType.FULL)
+            for src in self.sources[i+1:]
+        )
+
+    def get_sort_keys(self) -> list:
+        result = []
+        for text in self.query.values.get(ORDER_BY, []):
+            text, direction = SORT_REGEX.match(text).groups()
+            descending = (direction or '').upper() == 'DESC'
+            if text.isdigit():
+                func = ('output', int(text)-1)
+            elif text in self.columns:
+                func = ('output', self.columns.index(text))
+            else:
+                func = ('row', self.compile(text, grouped=True).func)
+            result.append( (func, descending) )
+        return result
+
+    def get_aggregation(self):
+        """
+        GROUP BY ['r.movie HAVING Avg(r.rate) > 4.5']
+            --> groups: ['r.movie'], having: ['Avg(r.rate) > 4.5']
+        """
+        groups, having = [], []
+        for text in self.query.values.get(GROUP_BY, []):
+            text, *conditions = re.split(r'\s+HAVING\s+', text, flags=re.IGNORECASE)
+            if text.strip():
+                groups.append(text)
+            having += conditions
+        if not groups and not self.aggregates:
+            return None
+        from sql_blocks.aggregation import Aggregation
+        return Aggregation(self, groups, having)
+
+    def set_limit(self):
+        for text in self.query.values.get(LIMIT, []):
+            count, *offset = re.findall(r'\d+', text)
+            self.limit = int(count)
+            if offset:
+                self.offset = int(offset[0])
+
+    # ---- Operators: ------------------
+    def rows(self):
+        joins = [HashJoin(self, i) for i in range(1, len(self.sources))]
+        for join in reversed(joins):
+            join.prepare()
+        rows = self.sources[0].scan(self.scope)
+        for join in joins:
+            rows = join.rows(rows)
+        conditions = [func for src, func in self.conditions if src is None]
+        for row in rows:
+            if all(func(row) for func in conditions):
+                yield row
+
+    def sort(self, records: list) -> list:
+        for i, (_, descending) in reversed( list(enumerate(self.sort_keys)) ):
+            records.sort(key=lambda rec: null_first(rec[0][i]), reverse=descending)
+        return records
+
+    def grouped_rows(self):
+        rows = self.aggregation.rows() if self.aggregation else self.rows()
+        if self.windows:
+            from sql_blocks.window import evaluate
+            rows = evaluate(self.windows, list(rows))
+        return rows
+
+    def __iter__(self):
+        outputs = [func for _, func in self.outputs]
+        records = (
+            (row, tuple(func(row) for func in outputs))
+            for row in self.grouped_rows()
+        )
+        if self.sort_keys:
+            records = self.sort([
+                (tuple(
+                    record[pos] if kind == 'output' else pos(row)
+                    for (kind, pos), _ in self.sort_keys
+                ), record)
+                for row, record in records
+            ])
+            records = ((None, record) for _, record in records)
+        seen = set()
+        skip, count = self.offset, 0
+        for _, record in records:
+            if self.distinct:
+                if record in seen:
+                    continue
+                seen.add(record)
+            if skip:
+                skip -= 1
+                continue
+            if self.limit is not None and count >= self.limit:
+                break
+            count += 1
+            yield record
+
+
+class RecursiveMember:
+    """
+    The recursive part of a Recursive CTE.
+    Its table is read only once and indexed by the join key.
+    """
+    def __init__(self, query: Select, cte: Recursive, columns: list, plan: Plan):
+        for text in query.values[FROM][1:]:
+            found = COMMA_REGEX.match(text)
+            if not found or found.group(1) != cte.table_name:
+                raise ValueError(f'Unsupported table in recursive query: {text}')
+        self.alias = cte.alias
+        self.columns = columns
+        table = plan.table( query.aka() )
+        self.scope = Scope({query.alias: table.columns, cte.alias: columns})
+        self.outputs, self.counters = [], set()
+        for i, text in enumerate(query.values.get(SELECT, [])):
+            text, _ = split_alias(text)
+            expr = Expression(text, self.scope, plan.engine)
+            is_counter = all([   # --- Ex.: (generation+1) AS generation -- not a bare t.generation
+                i < len(columns), not hasattr(expr.func, 'key'),
+                f'{cte.alias}.{columns[i]}' in expr.refs, COUNTER_REGEX.match(text),
+            ])
+            if is_counter:
+                self.counters.add(i)
+            self.outputs.append(expr.func)
+        if len(self.outputs) != len(columns):
+            raise ValueError(f'The queries of {cte.table_name} have different field counts.')
+        predicates, self.conditions, self.pairs = [], [], []
+        for text in query.values.get(WHERE, []):
+            expr = Expression(text, self.scope, plan.engine)
+            pairs = [] if self.pairs else self.join_pairs(text, query.alias)
+            if pairs:
+                self.pairs = pairs
+            elif all(key.startswith(query.alias+'.') for key in expr.refs):
+                predicates.append(expr.func)
+            else:
+                self.conditions.append(expr.func)
+        used = [
+            key.split('.', 1)[1] for key in self.scope.used
+            if key.startswith(query.alias+'.')
+        ]
+        rows = table.scan(
+            query.alias, used,
+            lambda row: all(func(row) for func in predicates)
+        )
+        self.indexes = {base_key: {} for base_key, _ in self.pairs}
+        self.rows = []
+        for row in rows:
+            self.rows.append(row)
+            for base_key, index in self.indexes.items():
+                if row[base_key] is not None:   # --- NULL never joins
+                    index.setdefault(row[base_key], []).append(row)
+
+    def join_pairs(self, text: str, base_alias: str) -> list:
+        """
+        (f2.id = a.father OR f2.id = a.mother)
+            --> [('f2.id', 'a.father'), ('f2.id', 'a.mother')]
+        """
+        text = text.strip()
+        while text.startswith('(') and text.endswith(')'):
+            text = text[1:-1].strip()
+        result = []
+        for part in re.split(r'\s+OR\s+', text, flags=re.IGNORECASE):
+            found = EQUI_JOIN_REGEX.match(part)
+            if not found:
+                return []
+            keys = sorted(
+                (self.scope.resolve(name) for name in found.groups()),
+                key=lambda key: not key.startswith(base_alias+'.')
+            )
+            aliases = [key.split('.')[0] for key in keys]
+            if aliases != [base_alias, self.alias]:
+                return []
+            result.append( tuple(keys) )
+        return result
+
+    def matches(self, delta_row: dict):
+        if not self.pairs:
+            yield from self.rows
+            return
+        found = set()
+        for base_key, cte_key in self.pairs:
+            if delta_row[cte_key] is None:
+                continue
+            for row in self.indexes[base_key].get(delta_row[cte_key], []):
+                if id(row) not in found:
+                    found.add( id(row) )
+                    yield row
+
+    def derive(self, delta: list):
+        keys = [f'{self.alias}.{col}' for col in self.columns]
+        for record in delta:
+            delta_row = dict( zip(keys, record) )
+            for row in self.matches(delta_row):
+                joined = {**row, **delta_row}
+                if all(func(joined) for func in self.conditions):
+                    yield tuple(func(joined) for func in self.outputs)
+
+
+class SemiNaive:
+    """
+    Evaluates a Recursive CTE: each round joins only the rows
+    derived in the previous one (the delta), until nothing new appears.
+    Rows are de-duplicated ignoring the counter() fields.
+    """
+    def __init__(self, cte: Recursive, engine: 'LocalEngine', relations: dict):
+        anchor, *members = cte.query_list
+        self.name = cte.table_name
+        self.engine = engine
+        self.anchor = engine.plan(anchor, relations)
+        self.columns = self.anchor.columns
+        self.members = [
+            RecursiveMember(query, cte, self.columns, self.anchor)
+            for query in members
+        ]
+        self.counters = set().union(*[m.counters for m in self.members])
+
+    def run(self) -> MemoryTable:
+        rows, seen = [], set()
+        def new_rows(candidates) -> list:
+            result = []
+            for record in candidates:
+                key = tuple(
+                    value for i, value in enumerate(record)
+                    if i not in self.counters
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                result.append(record)
+            rows.extend(result)
+            if len(rows) > self.engine.max_rows:
+                raise RecursionError(f'{self.name} exceeded {self.engine.max_rows} rows.')
+            return result
+        delta = new_rows(self.anchor)
+        iterations = 0
+        while delta:
+            iterations += 1
+            if iterations > self.engine.max_iterations:
+                raise RecursionError(
+                    f'{self.name} exceeded {self.engine.max_iterations} iterations.'
+                )
+            delta = new_rows(
+                record for member in self.members
+                for record in member.derive(delta)
+            )
+        return MemoryTable(self.columns, rows)
+
+
+class LocalEngine:
+    """
+    columnar = True: reads the CSV files through
+    the cache of `sql_blocks.columnar` (requires numpy).
+    max_iterations, max_rows: limits for Recursive CTEs.
+    """
+    def __init__(
+        self, folder: str='.', columnar: bool=False,
+        max_iterations: int=1000, max_rows: int=10_000_000
+    ):
+        self.folder = folder
+        self.columnar = columnar
+        self.max_iterations = max_iterations
+        self.max_rows = max_rows
+        self.tables = {}
+
+    def register(self, name: str, columns: list, rows: list):
+        self.tables[name] = MemoryTable(columns, rows)
+
+    def table_path(self, name: str) -> str:
+        """
+        The file of a table (None for the registered ones).
+        """
+        name = name.strip('\'"')
+        if name in self.tables:
+            return None
+        path = name if os.path.isabs(name) else os.path.join(self.folder, name)
+        if not os.path.splitext(path)[1]:
+            path += '.csv'
+        return path
+
+    def table(self, name: str):
+        path = self.table_path(name)
+        if path is None:
+            return self.tables[ name.strip('\'"') ]
+        if self.columnar:
+            from sql_blocks.columnar import ColumnarTable
+            return ColumnarTable(path)
+        return CSVTable(path)
+
+    def plan(self, query: Select, relations: dict=None) -> Plan:
+        relations = dict(relations or {})
+        if isinstance(query, CTE):
+            relations[query.table_name] = self.evaluate(query, relations)
+        return Plan(query, self, relations)
+
+    def evaluate(self, cte: CTE, relations: dict) -> MemoryTable:
+        if isinstance(cte, Recursive):
+            return SemiNaive(cte, self, relations).run()
+        plans = [self.plan(query, relations) for query in cte.query_list]
+        return MemoryTable(plans[0].columns, [row for plan in plans for row in plan])
+
+    def execute(self, query: Select) -> list:
+        return list( self.plan(query) )
+
+    def stream(self, query: Select, batch_size: int=100):
+        """
+        Yields the rows, computing `batch_size` at a time
+        (as ConnectionPool.stream fetches them).
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1.')
+        rows = iter( self.plan(query) )
+        batch = list( islice(rows, batch_size) )
+        while batch:
+            yield from batch
+            batch = list( islice(rows, batch_size) )
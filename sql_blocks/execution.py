@@ -0,0 +1,205 @@
+import re
+import queue
+import threading
+from copy import copy
+from collections import OrderedDict
+from contextlib import contextmanager
+from sql_blocks.sql_blocks import Select, CTE, QueryLanguage, WHERE, GROUP_BY
+
+
+LITERAL_REGEX = re.compile(r"'(?:[^']|'')*'|(?<![\w.])\d+(?:[.]\d+)?(?![\w.])")
+CYPHER_LITERAL_REGEX = re.compile(r'"[^"]*"|' + LITERAL_REGEX.pattern)
+PLACEHOLDER = {
+    'qmark':    lambda i: '?',
+    'numeric':  lambda i: f':{i}',
+    'named':    lambda i: f':p{i}',
+    'format':   lambda i: '%s',
+    'pyformat': lambda i: f'%(p{i})s',
+    'cypher':   lambda i: f'$p{i}',
+}
+
+
+class Parameters:
+    """
+    Replaces the literals of WHERE/HAVING conditions
+    by placeholders in the `paramstyle` of the driver (PEP 249).
+    """
+    def __init__(self, paramstyle: str='qmark'):
+        if paramstyle not in PLACEHOLDER:
+            raise ValueError(f'Unknown paramstyle `{paramstyle}`.')
+        self.paramstyle = paramstyle
+        self.regex = CYPHER_LITERAL_REGEX if paramstyle == 'cypher' else LITERAL_REGEX
+        self.values = []
+
+    def replace(self, found: re.Match) -> str:
+        literal = found.group()
+        if literal.startswith("'"):
+            value = literal[1:-1].replace("''", "'")
+        elif literal.startswith('"'):
+            value = literal[1:-1]
+        elif '.' in literal:
+            value = float(literal)
+        else:
+            value = int(literal)
+        self.values.append(value)
+        return PLACEHOLDER[self.paramstyle]( len(self.values) )
+
+    def apply(self, query: Select) -> Select:
+        result = copy(query)
+        result.values = {key: list(values) for key, values in query.values.items()}
+        if isinstance(query, CTE):
+            result.query_list = [self.apply(q) for q in query.query_list]
+        result.values[WHERE] = [
+            self.regex.sub(self.replace, condition)
+            for condition in result.values.get(WHERE, [])
+        ]
+        groups = []
+        for group in result.values.get(GROUP_BY, []):
+            group, *having = re.split(r'(\s+HAVING\s+)', group, maxsplit=1)
+            groups.append(group + self.regex.sub(self.replace, ''.join(having)))
+        result.values[GROUP_BY] = groups
+        return result
+
+    def bind(self):
+        if self.paramstyle in ('named', 'pyformat', 'cypher'):
+            return {f'p{i}': value for i, value in enumerate(self.values, 1)}
+        return tuple(self.values)
+
+
+def parameterize(query: Select, paramstyle: str='', language: QueryLanguage=None) -> tuple:
+    """
+    Returns the SQL text with placeholders and the bound values:
+        >> parameterize( Select('Product p', price=gt(10)) )
+        ('SELECT * FROM Product p WHERE p.price > ?', (10,))
+    ...or the text of another `language`, in its own paramstyle:
+        >> parameterize( Select('Product p', price=gt(10)), language=Neo4JLanguage )
+        ('MATCH (p:Product) WHERE p.price > $p1 RETURN p', {'p1': 10})
+    """
+    params = Parameters(paramstyle or getattr(language, 'paramstyle', 'qmark'))
+    query = params.apply(query)
+    text = query.translate_to(language) if language else str(query)
+    return text, params.bind()
+
+
+class StatementCache:
+    """
+    One connection of the pool and its cursors, by parameterized SQL.
+    """
+    def __init__(self, connection, max_size: int=32):
+        self.connection = connection
+        self.max_size = max_size
+        self.cursors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def cursor(self, sql: str):
+        cursor = self.cursors.pop(sql, None)
+        if cursor is None:
+            self.misses += 1
+            cursor = self.connection.cursor()
+            prepare = getattr(cursor, 'prepare', None)
+            if callable(prepare):
+                prepare(sql)
+        else:
+            self.hits += 1
+        self.cursors[sql] = cursor
+        while len(self.cursors) > self.max_size:
+            _, oldest = self.cursors.popitem(last=False)
+            oldest.close()
+        return cursor
+
+    def execute(self, sql: str, params):
+        cursor = self.cursor(sql)
+        cursor.execute(sql, params)
+        return cursor
+
+    def close(self):
+        for cursor in self.cursors.values():
+            cursor.close()
+        self.cursors.clear()
+        self.connection.close()
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool for any DB-API 2.0 driver:
+        pool = ConnectionPool(lambda: sqlite3.connect('shop.db'), max_size=4)
+    """
+    def __init__(
+        self, connect: callable, max_size: int=5, timeout: float=None,
+        paramstyle: str='qmark', cache_size: int=32
+    ):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.paramstyle = paramstyle
+        self.cache_size = cache_size
+        self.__idle = queue.LifoQueue()
+        self.__lock = threading.Lock()
+        self.__count = 0
+        self.__closed = False
+
+    def acquire(self) -> StatementCache:
+        if self.__closed:
+            raise RuntimeError('The pool is closed.')
+        try:
+            return self.__idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.__lock:
+            can_create = self.__count < self.max_size
+            if can_create:
+                self.__count += 1
+        if can_create:
+            try:
+                return StatementCache(self.connect(), self.cache_size)
+            except Exception:
+                with self.__lock:
+                    self.__count -= 1
+                raise
+        try:
+            return self.__idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f'No connection available after {self.timeout}s.')
+
+    def release(self, conn: StatementCache):
+        if self.__closed:
+            conn.close()
+            return
+        self.__idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def execute(self, query: Select) -> list:
+        sql, params = parameterize(query, self.paramstyle)
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def stream(self, query: Select, batch_size: int=100):
+        sql, params = parameterize(query, self.paramstyle)
+        with self.connection() as conn:
+            cursor = conn.execute(sql, params)
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(batch_size)
+
+    def close(self):
+        self.__closed = True
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
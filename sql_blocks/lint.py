@@ -0,0 +1,234 @@
+"""
+Performance anti-patterns of a query:
+
+    for issue in query.lint(max_joins=4):
+        print(issue)        # --- WARNING leading-wildcard: ...
+
+Or, to check the generated scripts in CI (exit code 1 if something is found):
+
+    python -m sql_blocks.lint queries/*.sql --max-joins 4 --fail-on warning
+"""
+import re
+import sys
+from enum import Enum
+from sql_blocks.sql_blocks import (
+    CTE, FROM, GROUP_BY, LIMIT, SELECT, WHERE, Select
+)
+
+
+class Severity(Enum):
+    INFO = 1
+    WARNING = 2
+    ERROR = 3
+
+
+class Issue:
+    __slots__ = ('severity', 'code', 'message', 'table')
+
+    def __init__(self, severity: Severity, code: str, message: str, table: str=''):
+        self.severity = severity
+        self.code = code
+        self.message = message
+        self.table = table
+
+    def __str__(self) -> str:
+        return '{} {}: {}{}'.format(
+            self.severity.name, self.code, self.message,
+            f' ({self.table})' if self.table else ''
+        )
+
+    def __repr__(self) -> str:
+        return f'<Issue {self}>'
+
+
+QUOTED_REGEX = re.compile(r"'[^']*'")
+SEPARATOR_REGEX = re.compile(
+    r'(,|\bCROSS\s+JOIN\b|(?:\b(?:INNER|LEFT|RIGHT|FULL|OUTER)\s+)*\bJOIN\b)', re.IGNORECASE
+)
+ON_REGEX = re.compile(r'\s+ON\s+.*', re.IGNORECASE | re.DOTALL)
+COLUMN_REGEX = re.compile(r'\b(\w+)[.]\w+')
+LEADING_WILDCARD_REGEX = re.compile(r"\bLIKE\s+'%", re.IGNORECASE)
+FUNCTION_ON_COLUMN_REGEX = re.compile(
+    r'\b(\w+)\s*[(]\s*(?:DISTINCT\s+)?\w+[.]\w+[^()]*[)]\s*'
+    r'(?:[<>=!]|LIKE\b|IN\b|BETWEEN\b|IS\b|NOT\b)', re.IGNORECASE
+)
+NOT_IN_SUBQUERY_REGEX = re.compile(
+    r'\bNOT\s+(?:[\w.]+\s+)?IN\s*[(]\s*SELECT\b', re.IGNORECASE
+)
+IN_LIST_REGEX = re.compile(r'\bIN\s*[(](?!\s*SELECT\b)([^()]*)[)]', re.IGNORECASE)
+OR_REGEX = re.compile(r'\bOR\b', re.IGNORECASE)
+SUBQUERY_REGEX = re.compile(r'([(])|([)])|\bSELECT\b', re.IGNORECASE)
+AGGREGATE_REGEX = re.compile(r'^(avg|min|max|sum|count)\s*[(]', re.IGNORECASE)
+NOT_FUNCTIONS = {'in', 'exists', 'not', 'and', 'or'}
+
+
+def tables_of(query: Select) -> list[tuple]:
+    """
+    [(name, alias, comma_join)...] -- comma_join = no ON condition
+    (`FROM a, b` or CROSS JOIN).
+    """
+    result, comma_join = [], False
+    for entry in query.values.get(FROM, []):
+        pieces = SEPARATOR_REGEX.split( ON_REGEX.sub('', entry) )
+        for i, piece in enumerate(pieces):
+            if i % 2:
+                comma_join = piece == ',' or piece.upper().startswith('CROSS')
+                continue
+            words = piece.split()
+            if words:
+                result.append( (words[0], words[-1], comma_join) )
+                comma_join = False
+    return result
+
+
+def subquery_depth(text: str) -> int:
+    """
+    How many SELECTs are nested inside parentheses (0 = none).
+    """
+    stack, result = [], 0
+    for found in SUBQUERY_REGEX.finditer( QUOTED_REGEX.sub("''", text) ):
+        opening, closing = found.groups()
+        if opening:
+            stack.append(False)
+        elif closing:
+            if stack:
+                stack.pop()
+        elif stack and not stack[-1]:
+            stack[-1] = True
+            result = max(result, sum(stack))
+    return result
+
+
+class Linter:
+    """
+    The budgets (None = no limit):
+        max_joins = tables in FROM, besides the main one
+        max_depth = subqueries inside subqueries...
+        max_in_values = size of a literal IN (...) list
+    """
+    MAX_JOINS = 5
+    MAX_DEPTH = 2
+    MAX_IN_VALUES = 1000
+
+    def __init__(self, max_joins: int=MAX_JOINS, max_depth: int=MAX_DEPTH, max_in_values: int=MAX_IN_VALUES):
+        self.max_joins = max_joins
+        self.max_depth = max_depth
+        self.max_in_values = max_in_values
+
+    def check(self, query: Select) -> list[Issue]:
+        if isinstance(query, CTE):
+            result = []
+            for i, item in enumerate(query.query_list):
+                for issue in self.check(item):
+                    issue.table = f'{query.table_name}[{i}]: {issue.table}'
+                    result.append(issue)
+            return result + self.issues_of(query, Select.__str__(query))
+        return self.issues_of(query, str(query))
+
+    def issues_of(self, query: Select, text: str) -> list[Issue]:
+        result = []
+        tables = tables_of(query)
+        table = tables[0][0] if tables else query.table_name
+        def found(severity: Severity, code: str, message: str):
+            result.append( Issue(severity, code, message, table) )
+        conditions = query.values.get(WHERE, [])
+        # --- Budgets:
+        joins = len(tables) - 1
+        if self.max_joins is not None and joins > self.max_joins:
+            found(Severity.ERROR, 'join-budget', f'{joins} joins (budget: {self.max_joins})')
+        depth = subquery_depth(text)
+        if self.max_depth is not None and depth > self.max_depth:
+            found(Severity.ERROR, 'subquery-depth', f'{depth} levels of subqueries (budget: {self.max_depth})')
+        # --- Tables:
+        for name, alias, comma_join in tables:
+            if comma_join and not self.linked(name, alias, tables, conditions):
+                found(Severity.ERROR, 'cartesian-product', f'No join condition for `{name}`')
+        fields = query.values.get(SELECT, [])
+        if joins and (not fields or any(
+            fld.strip().endswith(('.*', ' *')) or fld.strip() == '*' for fld in fields
+        )):
+            found(Severity.WARNING, 'select-star', 'SELECT * over joined tables')
+        limited = query.values.get(LIMIT) or any('TOP(' in fld for fld in fields)
+        only_aggregates = fields and all(AGGREGATE_REGEX.match(fld.strip()) for fld in fields)
+        if not conditions and not limited and not (only_aggregates and not query.values.get(GROUP_BY)):
+            found(Severity.WARNING, 'missing-limit', 'No WHERE and no LIMIT')
+        # --- Conditions:
+        for original in conditions:
+            if LEADING_WILDCARD_REGEX.search(original):
+                found(Severity.WARNING, 'leading-wildcard', f'LIKE starting with % ignores the index: {original.strip()}')
+            condition = QUOTED_REGEX.sub("''", original)   # --- the texts may have `,` `(` OR...
+            for func in FUNCTION_ON_COLUMN_REGEX.findall(condition):
+                if func.lower() not in NOT_FUNCTIONS:
+                    found(Severity.WARNING, 'function-on-column', f'{func}(...) on a filtered column: {original.strip()}')
+            if NOT_IN_SUBQUERY_REGEX.search(condition):
+                found(Severity.WARNING, 'not-in-subquery', 'NOT IN (SELECT...) -- prefer NOT EXISTS or LEFT JOIN')
+            for values in IN_LIST_REGEX.findall(condition):
+                count = len( values.split(',') )
+                if self.max_in_values is not None and count > self.max_in_values:
+                    found(Severity.WARNING, 'huge-in-list', f'IN with {count} values (budget: {self.max_in_values})')
+            branches = OR_REGEX.split( condition.split('(SELECT')[0] )
+            columns = {
+                COLUMN_REGEX.search(branch).group() for branch in branches
+                if COLUMN_REGEX.search(branch)
+            }
+            if len(columns) > 1:
+                found(Severity.INFO, 'or-across-columns', 'OR of {} -- one index cannot serve it'.format(
+                    ', '.join( sorted(columns) )
+                ))
+        return result
+
+    @staticmethod
+    def linked(name: str, alias: str, tables: list, conditions: list) -> bool:
+        own = {name.lower(), alias.lower()}
+        others = {
+            value.lower() for other in tables if other[:2] != (name, alias)
+            for value in other[:2]
+        }
+        for condition in conditions:
+            if '=' not in condition:
+                continue
+            used = {prefix.lower() for prefix in COLUMN_REGEX.findall(condition)}
+            if used & own and used & others:
+                return True
+        return False
+
+
+def main(args: list=None) -> int:
+    from argparse import ArgumentParser
+    from sql_blocks.parsers import detect
+    cli = ArgumentParser('python -m sql_blocks.lint', description='Performance anti-patterns of queries.')
+    cli.add_argument('files', nargs='*', default=['-'], help='scripts (SQL, Cypher, MongoDB...); - = stdin')
+    cli.add_argument('--max-joins', type=int, default=Linter.MAX_JOINS)
+    cli.add_argument('--max-depth', type=int, default=Linter.MAX_DEPTH)
+    cli.add_argument('--max-in-values', type=int, default=Linter.MAX_IN_VALUES)
+    cli.add_argument(
+        '--fail-on', default='warning',
+        choices=[severity.name.lower() for severity in Severity]
+    )
+    options = cli.parse_args(args)
+    linter = Linter(options.max_joins, options.max_depth, options.max_in_values)
+    fail_on = Severity[options.fail_on.upper()]
+    failed = False
+    for path in options.files:
+        if path == '-':
+            text = sys.stdin.read()
+        else:
+            with open(path, encoding='utf-8') as file:
+                text = file.read()
+        try:
+            queries = detect(text)
+        except (SyntaxError, ValueError) as error:
+            print(f'{path}: ERROR parse-error: {error}')
+            failed = True
+            continue
+        if not isinstance(queries, list):
+            queries = [queries]
+        for query in queries:
+            for issue in linter.check(query):
+                print(f'{path}: {issue}')
+                failed = failed or issue.severity.value >= fail_on.value
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit( main() )
@@ -0,0 +1,220 @@
+"""
+Persistent cache of parsed (and optimized) queries, shared by processes:
+
+    cache = ParseCache('queries.db')
+    query, = cache.parse(text, rules=[RulePutLimit])
+    sql, = cache.render(text, rules=[RulePutLimit], language=MongoDBLanguage)
+
+The entries are keyed by (hash of the text, parser class, rules, settings
+of the Context, version); the version of the library changes the key and
+the entries of other versions are dropped when the file is opened.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from sql_blocks.sql_blocks import (
+    Context, Function, OrderBy, SQLObject, Select, QueryLanguage
+)
+from sql_blocks.serialization import VERSION as FORMAT_VERSION
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS parsed (
+    key TEXT PRIMARY KEY, version TEXT, value BLOB  -- the queries (to_bytes)
+);
+CREATE TABLE IF NOT EXISTS rendered (
+    key TEXT PRIMARY KEY, version TEXT, value TEXT  -- JSON list of texts
+);
+'''
+
+
+def library_version() -> str:
+    """
+    The installed version or -- in a source tree -- a fingerprint of the modules.
+    """
+    from importlib import metadata
+    try:
+        release = metadata.version('sql_blocks')
+    except metadata.PackageNotFoundError:
+        folder = os.path.dirname(__file__)
+        signature = hashlib.sha256()
+        for name in sorted( os.listdir(folder) ):
+            if name.endswith('.py'):
+                info = os.stat( os.path.join(folder, name) )
+                signature.update(f'{name}:{info.st_size}:{info.st_mtime_ns};'.encode())
+        release = 'src-' + signature.hexdigest()[:16]
+    return f'{release}/{FORMAT_VERSION}'
+
+
+def class_name(cls: type) -> str:
+    return f'{cls.__module__}.{cls.__qualname__}'
+
+
+def function_name(func) -> str:
+    """
+    module.name:digest of the code -- two lambdas of a module are different.
+    Empty for what has no stable name (a closure, a builtin...).
+    """
+    code = getattr(func, '__code__', None)
+    if code is None or func.__closure__:
+        return ''
+    signature = hashlib.sha256(code.co_code)
+    signature.update( repr((code.co_consts, code.co_names, func.__defaults__)).encode() )
+    return f'{func.__module__}.{func.__qualname__}:{signature.hexdigest()[:16]}'
+
+
+def context_key() -> list:
+    """
+    The settings of the Context that change the queries
+    (None if ALIAS_FUNC cannot be part of the key).
+    """
+    alias_func = Context.get(SQLObject, 'ALIAS_FUNC')
+    alias_name = function_name(alias_func) if alias_func else '-'
+    if not alias_name:
+        return None
+    return [
+        Context.get(Function, 'dialect').name,
+        Context.get(OrderBy, 'sort').name,
+        alias_name,
+    ]
+
+
+def pack(queries: list) -> bytes:
+    return b''.join(
+        len(data).to_bytes(4, 'big') + data
+        for data in (query.to_bytes() for query in queries)
+    )
+
+def unpack(blob: bytes) -> list:
+    result, pos = [], 0
+    while pos < len(blob):
+        size = int.from_bytes(blob[pos:pos+4], 'big')
+        pos += 4
+        result.append( Select.from_bytes(blob[pos:pos+size]) )
+        pos += size
+    return result
+
+
+class ParseCache:
+    """
+    Parsed queries and their rendered text in a SQLite file (WAL mode):
+        path = the file, shared by the workers
+        parser = SQLParser, MongoParser... (None = found by the text)
+        rules = classes given to `optimize` (none by default)
+    The dialect, sort and ALIAS_FUNC of the Context are part of the key;
+    the cache is skipped for an ALIAS_FUNC without a stable name (a closure...).
+    """
+    def __init__(self, path: str, timeout: float=30.0):
+        self.path = path
+        self.timeout = timeout
+        self.version = library_version()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0     # --- writes that failed (the result is still returned)
+        self.__local = threading.local()
+        with self.connection() as conn:
+            conn.execute('DELETE FROM parsed WHERE version <> ?', (self.version,))
+            conn.execute('DELETE FROM rendered WHERE version <> ?', (self.version,))
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        One connection per thread (and per process, after a fork).
+        """
+        local = self.__local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def key(self, *parts) -> str:
+        text, *others = parts
+        digest = hashlib.sha256( text.encode('utf-8') ).hexdigest()
+        return '|'.join([digest, *others, self.version])
+
+    @staticmethod
+    def resolve(text: str, parser: type) -> type:
+        if parser is None:
+            from sql_blocks.parsers import parser_class
+            parser = parser_class(text)
+            if not parser:
+                raise SyntaxError('Unknown parser class')
+        return parser
+
+    def read(self, table: str, key: str):
+        row = self.connection().execute(
+            f'SELECT value FROM {table} WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def write(self, table: str, key: str, value):
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)',
+                    (key, self.version, value)
+                )
+        except sqlite3.Error:
+            self.errors += 1
+
+    @staticmethod
+    def build(text: str, parser: type, rules: list) -> list:
+        queries = parser(text, Select).queries
+        if rules:
+            for query in queries:
+                query.optimize( list(rules) )
+        return queries
+
+    def parse(self, text: str, parser: type=None, rules: list=()) -> list[Select]:
+        parser = self.resolve(text, parser)
+        settings = context_key()
+        if settings is None:
+            return self.build(text, parser, rules)
+        key = self.key(text, class_name(parser), *map(class_name, rules), *settings)
+        blob = self.read('parsed', key)
+        if blob is not None:
+            return unpack(blob)
+        queries = self.build(text, parser, rules)
+        self.write('parsed', key, pack(queries))
+        return queries
+
+    def render(self, text: str, parser: type=None, rules: list=(), language: type=QueryLanguage) -> list[str]:
+        """
+        The text of each query in `language` (and in the current dialect).
+        """
+        parser = self.resolve(text, parser)
+        settings = context_key()
+        if settings is None:
+            return [q.translate_to(language) for q in self.build(text, parser, rules)]
+        key = self.key(
+            text, class_name(parser), *map(class_name, rules),
+            class_name(language), *settings
+        )
+        found = self.read('rendered', key)
+        if found is not None:
+            return json.loads(found)
+        result = [query.translate_to(language) for query in self.parse(text, parser, rules)]
+        self.write('rendered', key, json.dumps(result))
+        return result
+
+    def clear(self):
+        with self.connection() as conn:
+            conn.execute('DELETE FROM parsed')
+            conn.execute('DELETE FROM rendered')
+
+    def close(self):
+        conn = getattr(self.__local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.__local.pid = None
+
+    def __len__(self) -> int:
+        return self.connection().execute('SELECT Count(*) FROM parsed').fetchone()[0]
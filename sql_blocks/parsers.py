@@ -0,0 +1,823 @@
+"""
+Parsers of SQL, Cypher, Neo4J and MongoDB scripts
+(loaded on the first use of `Select.parse` or `detect`).
+"""
+import re
+import json
+from sql_blocks.sql_blocks import (
+    FROM, FUNCTION_CLASS, GROUP_BY, KEYWORD, ORDER_BY, SELECT, USUAL_KEYS, WHERE, WINDOW,
+    TO_LIST, Context, Count, eq, Field, FieldList, ForeignKey, GroupBy,
+    gt, gte, Having, is_null, JoinType, lt, lte, NamedField, Not, NotSelectIN,
+    OrderBy, PrimaryKey, Select, SelectIN, SortType, SQLObject, Where
+)
+from sql_blocks.translators import MongoDBLanguage
+
+
+class Parser:
+    REGEX = {}
+
+    def prepare(self):
+        ...
+
+    def __init__(self, txt: str, class_type):
+        self.queries = []
+        self.prepare()
+        self.class_type = class_type
+        self.eval(txt)
+
+    def eval(self, txt: str):
+        ...
+
+    SPACES_REGEX = re.compile(r'("[^"]*"?)|\s+')   # --- keeps the "strings"
+
+    @classmethod
+    def remove_spaces(cls, script: str) -> str:
+        return cls.SPACES_REGEX.sub(r'\1', script)
+
+    def get_tokens(self, txt: str) -> list:
+        return [
+            self.remove_spaces(t)
+            for t in self.REGEX['separator'].split(txt)            
+        ]
+
+
+class SQLParser(Parser):
+    REGEX = {}
+
+    def prepare(self):
+        keywords = '|'.join(k + r'\b' for k in [*KEYWORD, WINDOW])
+        flags = re.IGNORECASE + re.MULTILINE
+        self.REGEX['keywords'] = re.compile(
+            fr"('(?:[^']|'')*')|([()])|({keywords}|[*])", flags
+        )
+        self.REGEX['subquery'] = re.compile(r'(\w\.)*\w+ +in +\(SELECT.*?\)', flags)
+
+    def split_keywords(self, txt: str) -> list:
+        """
+        Splits the text by the keywords (and `*`) outside quotes and
+        parentheses -- e.g. the ORDER BY of `OVER(...)` or `WINDOW w1 AS (...)`.
+        """
+        result, start, depth = [], 0, 0
+        for found in self.REGEX['keywords'].finditer(txt):
+            quoted, parenthesis, keyword = found.groups()
+            if parenthesis:
+                depth += 1 if parenthesis == '(' else -1
+            elif keyword and depth == 0:
+                result += [txt[start: found.start()], keyword]
+                start = found.end()
+        result.append(txt[start:])
+        return result
+
+    def eval(self, txt: str):
+        def find_last_word(pos: int) -> int:
+            SPACE, WORD = 1, 2
+            found = set()
+            for i in range(pos, 0, -1):
+                if txt[i] in [' ', '\t', '\n']:
+                    if sum(found) == 3:
+                        return i
+                    found.add(SPACE)
+                if txt[i].isalpha():
+                    found.add(WORD)
+                elif txt[i] == '.':
+                    found.remove(WORD)
+        def find_parenthesis(pos: int) -> int:
+            for i in range(pos, len(txt)-1):
+                if txt[i] == ')':
+                    return i+1
+        result = {}
+        found = self.REGEX['subquery'].search(txt)
+        while found:
+            start, end = found.span()
+            inner = txt[start: end]
+            if inner.count('(') > inner.count(')'):
+                end = find_parenthesis(end)
+                inner = txt[start: end-1]
+            fld, *inner = re.split(r' IN | in', inner, maxsplit=1)
+            if fld.upper() == 'NOT':
+                pos = find_last_word(start)
+                fld = txt[pos: start].strip() # [To-Do] Use the value of `fld`
+                start = pos
+                target_class = NotSelectIN
+            else:
+                target_class = SelectIN
+            obj = SQLParser(
+                ' '.join(re.sub(r'^\(', '', s.strip()) for s in inner),
+                class_type=target_class
+            ).queries[0]
+            result[obj.alias] = obj
+            txt = txt[:start-1] + txt[end+1:]
+            found = self.REGEX['subquery'].search(txt)
+        tokens = [t.strip() for t in self.split_keywords(txt) if t.strip()]
+        values = {k.upper(): v for k, v in zip(tokens[::2], tokens[1::2])}
+        windows = [
+            w.strip() for w in re.split(r',(?![^()]*[)])', values.pop(WINDOW, ''))
+            if w.strip()
+        ]
+        tables = [t.strip() for t in re.split('JOIN|LEFT|RIGHT|ON', values[FROM]) if t.strip()]
+        for item in tables:
+            if '=' in item:
+                a1, f1, a2, f2 = [r.strip() for r in re.split('[().=]', item) if r]
+                obj1: SQLObject = result[a1]
+                obj2: SQLObject = result[a2]
+                PrimaryKey.add(f2, obj2)
+                ForeignKey(obj2.table_name).add(f1, obj1)
+            else:
+                obj = self.class_type(item)
+                for key in USUAL_KEYS:
+                    if not key in values:
+                        continue
+                    separator = self.class_type.get_separator(key)
+                    cls = {
+                        ORDER_BY: OrderBy, GROUP_BY: GroupBy
+                    }.get(key, Field)
+                    obj.values[key] = [
+                        cls.format(fld, obj)
+                        for fld in re.split(separator, values[key])
+                        if (fld != '*' and len(tables) == 1) or obj.match(fld, key)
+                    ]
+                if windows:   # --- belongs to the main query (the first table)
+                    obj.values[WINDOW] = windows
+                    windows = []
+                result[obj.alias] = obj
+        self.queries = list( result.values() )
+
+
+class CypherParser(Parser):
+    CHAR_SET = r'[(,?)^{}[\]]'
+    KEYWORDS = '|'.join(
+        fr'\b{word}\b'
+        for word in "where return WHERE RETURN and AND".split()
+    )
+    # --- compiled once, for all the instances:
+    REGEX = {
+        'separator': re.compile(fr'({CHAR_SET}|->|<-|{KEYWORDS})'),
+        'condition': re.compile(r'(^\w+)|([<>=])'),
+        'alias_pos': re.compile(r'(\w+)[.](\w+)'),
+    }
+    # --- token ==> method for the next token:
+    TOKEN_METHODS = {
+        '(': 'add_field',  '?': 'add_where',
+        ',': 'add_field',  '^': 'add_order',
+        ')': 'new_query',  '<-': 'left_ftable',
+        '->': 'right_ftable',
+    }
+    FIRST_METHOD = 'new_query'
+
+    def prepare(self):
+        self.join_type = JoinType.INNER
+        self.aliases = {}
+
+    @classmethod
+    def dispatch(cls) -> tuple:
+        """
+        (first function, {kind: function}) -- resolved once per class.
+        """
+        if '_DISPATCH' not in cls.__dict__:
+            first = getattr(cls, cls.FIRST_METHOD) if cls.FIRST_METHOD else None
+            cls._DISPATCH = first, {
+                kind: getattr(cls, name)
+                for kind, name in cls.TOKEN_METHODS.items()
+            }
+        return cls._DISPATCH
+
+    @classmethod
+    def scan(cls, txt: str) -> list[tuple]:
+        """
+        [(kind, token)...] -- kind is the separator in upper case
+        or None for the text between them (without spaces).
+        """
+        result = []
+        for i, token in enumerate( cls.REGEX['separator'].split(txt) ):
+            if i % 2:
+                result.append( (token.upper(), token) )
+                continue
+            if '"' in token:
+                token = cls.remove_spaces(token)
+            else:
+                token = ''.join( token.split() )
+            if token:
+                result.append( (None, token) )
+        return result
+
+    def new_query(self, token: str, join_type = JoinType.INNER, alias: str=''):
+        token, *group_fields = token.split('@')
+        if not token.isidentifier():
+            return
+        table_name = f'{token} {alias}' if alias else token
+        query = self.class_type(table_name)
+        if not alias:
+            alias = query.alias
+        self.queries.append(query)
+        self.aliases[alias] = query
+        FieldList(group_fields, [Field, GroupBy]).add('', query)
+        query.join_type = join_type
+
+    def add_where(self, token: str):
+        elements = [t for t in self.REGEX['alias_pos'].split(token) if t]
+        if len(elements) == 3:
+            alias, field, *condition = elements
+            query = self.aliases[alias]
+        else:
+            field, *condition = [
+                t for t in self.REGEX['condition'].split(token) if t
+            ]
+            query = self.queries[-1]
+        Where(' '.join(condition)).add(field, query)
+    
+    def add_order(self, token: str):
+        self.add_field(token, [OrderBy])
+
+    def add_field(self, token: str, extra_classes: list['type']=[]):
+        if token in self.TOKEN_METHODS:
+            return
+        class_list = [Field]
+        if '*' in token:
+            token = token.replace('*', '')
+            self.queries[-1].key_field = token
+            return
+        elif '$' in token:
+            func_name, token = token.split('$')
+            if func_name == 'count':
+                if not token:
+                    token = 'count_1'
+                pk_field = self.queries[-1].key_field or 'id'
+                Count().As(token, extra_classes).add(pk_field, self.queries[-1])
+                return
+            else:
+                class_type = FUNCTION_CLASS.get(func_name)
+                if not class_type:
+                    raise ValueError(f'Unknown function `{func_name}`.')
+                if ':' in token:
+                    token, field_alias = token.split(':')
+                    class_type = class_type().As(field_alias)
+                class_list = [class_type]
+        class_list += extra_classes
+        FieldList(token, class_list).add('', self.queries[-1])
+
+    def left_ftable(self, token: str):
+        if self.queries:
+            self.queries[-1].join_type = JoinType.LEFT
+        self.new_query(token)
+
+    def right_ftable(self, token: str):
+        self.new_query(token, JoinType.RIGHT)
+
+    def add_foreign_key(self, token: str, pk_field: str=''):
+        curr, last = [self.queries[i] for i in (-1, -2)]
+        if not pk_field:
+            if last.key_field:
+                pk_field = last.key_field
+            else:
+                if not last.values.get(SELECT):
+                    raise IndexError(f'Primary Key not found for {last.table_name}.')
+                pk_field = last.values[SELECT][-1].split('.')[-1]
+                last.delete(pk_field, [SELECT], exact=True)
+        if '{}' in token:
+            foreign_fld = token.format(
+                last.table_name.lower()
+                if last.join_type == JoinType.LEFT else
+                curr.table_name.lower()
+            )
+        else:
+            if not curr.values.get(SELECT):
+                raise IndexError(f'Foreign Key not found for {curr.table_name}.')
+            fields = [
+                fld for fld in curr.values[SELECT]
+                if fld not in curr.values.get(GROUP_BY, [])
+            ]
+            foreign_fld = fields[0].split('.')[-1]
+            curr.delete(foreign_fld, [SELECT], exact=True)
+            if curr.join_type == JoinType.RIGHT:
+                pk_field, foreign_fld = foreign_fld, pk_field
+        if curr.join_type == JoinType.RIGHT:
+            curr, last = last, curr
+        k = ForeignKey.get_key(curr, last)
+        Context.registry(ForeignKey, 'references')[k] = (foreign_fld, pk_field)
+
+    def fk_charset(self) -> str:
+        return '(['
+
+    def eval(self, txt: str):
+        # ====================================
+        def has_side_table() -> bool:
+            count = 0 if len(self.queries) < 2 else sum(
+                q.join_type != JoinType.INNER
+                for q in self.queries[-2:]
+            )
+            return count > 0
+        # -----------------------------------
+        method, methods = self.dispatch()
+        for kind, token in self.scan(txt):
+            if method and token in '([':
+                continue
+            if method:
+                method(self, token)
+            if token in ')]' and has_side_table():
+                self.add_foreign_key('')
+            method = methods.get(kind)
+        # ====================================
+
+class Neo4JParser(CypherParser):
+    TOKEN_METHODS = {
+        '(': 'new_query',  '{': 'add_property', '[': 'new_query',
+        ',': 'next_property', '}': 'end_properties',
+        '<-': 'left_ftable', '->': 'right_ftable',
+        'WHERE': 'add_where', 'AND': 'add_where',
+    }
+    FIRST_METHOD = None
+
+    def prepare(self):
+        super().prepare()
+        self.in_properties = False
+
+    def add_property(self, token: str):
+        """
+        (t:Teacher{name: "Joey", age: 30}) -- one condition per property
+        """
+        self.in_properties = True
+        self.add_where(token)
+
+    def next_property(self, token: str):
+        if self.in_properties:
+            self.add_where(token)
+
+    def end_properties(self, token: str):
+        self.in_properties = False
+
+    def new_query(self, token: str, join_type = JoinType.INNER):
+        alias = ''
+        if ':' in token:
+            alias, token = token.split(':')
+        super().new_query(token, join_type, alias)
+
+    def add_where(self, token: str):
+        super().add_where(token.replace(':', '='))
+
+    def add_foreign_key(self, token: str, pk_field: str='') -> tuple:
+        return super().add_foreign_key('{}_id', 'id')
+
+# ----------------------------
+class Document(list):
+    """
+    The (key, value) pairs of a {...} object, in order
+    -- a key may repeat, as in {{$or: [...]}, {$or: [...]}}
+    """
+    def get(self, key: str, default=None):
+        return next((value for k, value in self if k == key), default)
+
+
+class MongoParser(Parser):
+    """
+    One scan of the script (JSON5-like tokens), a tree of Document/list
+    and then the Select of each call:
+        db.people.find({...}, {...}).sort({...}).skip(n).limit(n)
+        db.people.aggregate([{$match: ...}, {$group: ...}, {$project: ...}...])
+    """
+    TOKEN_REGEX = re.compile(r'''[\s;]*(?:
+        (?P<comment>//[^\n]*|/[*].*?[*]/)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>[-+]?(?:0[xX][0-9a-fA-F]+|(?:\d+[.]?\d*|[.]\d+)(?:[eE][-+]?\d+)?)(?![\w$]))
+      | (?P<name>[$\w][$\w.]*)
+      | (?P<symbol>[{}\[\]():,.])
+      | (?P<error>\S)
+    )''', re.VERBOSE | re.DOTALL)
+    CONSTANTS = {
+        'true': True, 'false': False, 'null': None, 'undefined': None,
+        'NaN': float('nan'), 'Infinity': float('inf'),
+    }
+    CONDITIONS = {
+        '$eq': lambda value: is_null() if value is None else eq(value),
+        '$ne': lambda value: Not.is_null() if value is None else Not.eq(value),
+        '$gt': gt, '$gte': gte, '$lt': lt, '$lte': lte,
+        '$in': lambda values: Where.inside(TO_LIST(values)),
+        '$nin': lambda values: Not.inside(TO_LIST(values)),
+    }
+    LOGICAL = {'$or': 'OR', '$nor': 'OR', '$and': 'AND'}
+
+    def prepare(self):
+        self.tokens = []
+        self.pos = 0
+
+    # ---- Tokens and tree: -----------------------------
+    @classmethod
+    def scan(cls, txt: str) -> list[tuple]:
+        """
+        [(kind, text)...] -- kind: string, number, name or symbol.
+        """
+        result = []
+        for found in cls.TOKEN_REGEX.finditer(txt):
+            kind = found.lastgroup
+            if kind == 'comment':
+                continue
+            if kind == 'error':
+                raise SyntaxError(f"Unexpected `{found.group(kind)}` at {found.start(kind)}")
+            result.append( (kind, found.group(kind)) )
+        return result
+
+    def peek(self, ahead: int=0) -> str:
+        pos = self.pos + ahead
+        return self.tokens[pos][1] if pos < len(self.tokens) else ''
+
+    def before(self, closing: str) -> bool:
+        if self.pos >= len(self.tokens):
+            raise SyntaxError(f'Expected `{closing}` at the end of the script')
+        return self.tokens[self.pos][1] != closing
+
+    def expect(self, symbol: str):
+        if self.peek() != symbol:
+            raise SyntaxError(f'Expected `{symbol}` instead of `{self.peek()}`')
+        self.pos += 1
+
+    @staticmethod
+    def literal(kind: str, text: str):
+        if kind == 'string':
+            content = text[1:-1]
+            if '\\' in content:
+                content = json.loads('"{}"'.format(
+                    content.replace("\\'", "'") if text[0] == "'" else content
+                ))
+            return content
+        try:
+            return int(text)
+        except ValueError:
+            return int(text, 16) if 'x' in text.lower() else float(text)
+
+    def key(self) -> str:
+        if self.pos >= len(self.tokens):
+            raise SyntaxError('Unexpected end of the script')
+        kind, text = self.tokens[self.pos]
+        self.pos += 1
+        if kind == 'string':
+            return self.literal(kind, text)
+        if kind not in ('name', 'number'):
+            raise SyntaxError(f'Invalid key `{text}`')
+        return text
+
+    def value(self):
+        if self.pos >= len(self.tokens):
+            raise SyntaxError('Unexpected end of the script')
+        kind, text = self.tokens[self.pos]
+        self.pos += 1
+        if text == '{':
+            return self.document()
+        if text == '[':
+            return self.array()
+        if kind in ('string', 'number'):
+            return self.literal(kind, text)
+        if kind != 'name':
+            raise SyntaxError(f'Unexpected `{text}`')
+        if text == 'new':   # --- new Date(...)
+            return self.value()
+        if self.peek() == '(':  # --- ISODate("..."), NumberLong(1)...
+            args = self.arguments()
+            return args[0] if args else None
+        return self.CONSTANTS.get(text, text)
+
+    def document(self) -> Document:
+        result = Document()
+        while self.before('}'):
+            if self.peek() == '{':   # --- {{...}, ...}
+                self.pos += 1
+                result += self.document()
+            else:
+                key = self.key()
+                self.expect(':')
+                result.append( (key, self.value()) )
+            if self.peek() == ',':
+                self.pos += 1
+        self.pos += 1
+        return result
+
+    def array(self) -> list:
+        result = []
+        tokens = self.tokens
+        while self.before(']'):
+            kind, text = tokens[self.pos]
+            following = self.peek(1)
+            if kind in ('string', 'number') and following in (',', ']'):
+                result.append( self.literal(kind, text) )   # --- big $in lists
+                self.pos += 1
+            elif following == ':':  # --- [field: {...}, ...]
+                key = self.key()
+                self.pos += 1
+                result.append( Document([(key, self.value())]) )
+            else:
+                result.append( self.value() )
+            if self.peek() == ',':
+                self.pos += 1
+        self.pos += 1
+        return result
+
+    def arguments(self) -> list:
+        self.expect('(')
+        result = []
+        while self.before(')'):
+            result.append( self.value() )
+            if self.peek() == ',':
+                self.pos += 1
+        self.pos += 1
+        return result
+
+    # ---- Queries: -------------------------------------
+    def eval(self, txt: str):
+        self.tokens = self.scan(txt)
+        while self.pos < len(self.tokens):
+            kind, text = self.tokens[self.pos]
+            self.pos += 1
+            if kind != 'name':
+                if text == '.':
+                    continue
+                raise SyntaxError(f'Unexpected `{text}`')
+            *table, function = text.split('.')
+            args = self.arguments()
+            if function == 'getCollection':
+                table, function = [str(args[0])], ''
+            if table and table[-1]:
+                self.new_query(table[-1])
+            if function:
+                self.call(function, args)
+        self.end_query()
+
+    def new_query(self, table: str):
+        self.end_query()
+        self.queries.append( self.class_type(table) )
+        self.accumulators = {}  # --- name: (function, field)
+        self.group_fields = {}  # --- name: (class, field) -- waiting for $project
+        self.group_outputs = {} # --- name: text for ORDER BY (alias or expression)
+        self.group_keys = []
+        self.limits = {}
+        self.grouped = False
+        self.projected = False
+
+    def end_query(self):
+        if not self.queries:
+            return
+        if 'limit' in self.limits:
+            self.queries[-1].limit(self.limits['limit'], self.limits.get('skip', 0))
+            self.limits = {}
+        if not self.projected:  # --- without $project, all of the $group is selected
+            for name in list(self.group_fields):
+                self.select_group_field(name)
+
+    def call(self, function: str, args: list):
+        if not self.queries:
+            raise SyntaxError(f'No collection for {function}')
+        if function == 'find':
+            filter, projection, *_ = args + [Document(), Document()]
+            self.add_conditions(filter)
+            self.add_projection(projection)
+        elif function == 'aggregate':
+            for stage in (args[0] if args else []):
+                for name, value in stage:
+                    self.add_stage(name, value)
+        elif function == 'sort':
+            self.add_sort(args[0] if args else Document())
+        elif function in ('skip', 'limit'):
+            self.limits[function] = int(args[0])
+        else:
+            raise SyntaxError(f'Unknown function {function}')
+
+    def add_stage(self, stage: str, value):
+        """
+        Stages of the aggregation pipeline:
+            $match, $group, $project, $sort, $skip, $limit
+        """
+        if stage == '$match':
+            self.add_conditions(value)
+        elif stage == '$group':
+            self.add_group(value)
+        elif stage == '$project':
+            self.add_projection(value)
+        elif stage == '$sort':
+            self.add_sort(value)
+        elif stage in ('$skip', '$limit'):
+            self.limits[stage[1:]] = int(value)
+        else:
+            raise SyntaxError(f'Unknown stage {stage}')
+
+    def conditions_of(self, value) -> list[Where]:
+        if isinstance(value, Document) and value and all(
+            str(op).startswith('$') for op, _ in value
+        ):
+            result = []
+            for op, arg in value:
+                if op not in self.CONDITIONS:
+                    raise SyntaxError(f'Unknown operator {op}')
+                result.append( self.CONDITIONS[op](arg) )
+            return result
+        return [ self.CONDITIONS['$eq'](value) ]
+
+    def logical_group(self, operator: str, members: list) -> str:
+        """
+        ( f1 cond1 OR f2 cond2 ) -- the format of `Options`
+        """
+        query = self.queries[-1]
+        texts = []
+        for member in members:
+            parts = []
+            for field, value in member:
+                if field in self.LOGICAL:
+                    parts.append( self.logical_group(field, value) )
+                    continue
+                parts += [
+                    f'{where.prefix}{Field.format(field, query)} {where.content}'
+                    for where in self.conditions_of(value)
+                ]
+            texts.append( parts[0] if len(parts) == 1 else '({})'.format(' AND '.join(parts)) )
+        result = '({})'.format(
+            self.LOGICAL[operator].join(f' {text} ' for text in texts)
+        )
+        return 'NOT ' + result if operator == '$nor' else result
+
+    def add_conditions(self, document: Document):
+        query = self.queries[-1]
+        for field, value in document:
+            if field == '$and':
+                for member in value:
+                    self.add_conditions(member)
+            elif field in self.LOGICAL:
+                query.values.setdefault(WHERE, []).append(
+                    self.logical_group(field, value)
+                )
+            elif str(field).startswith('$'):
+                raise SyntaxError(f'Unknown operator {field}')
+            elif field in self.accumulators:
+                func, arg = self.accumulators[field]
+                for where in self.conditions_of(value):
+                    Having(FUNCTION_CLASS[func], where).add(arg, query)
+            else:
+                for where in self.conditions_of(value):
+                    where.add(field, query)
+
+    @staticmethod
+    def field_of(value) -> str:
+        return value[1:] if isinstance(value, str) and value.startswith('$') else str(value)
+
+    def add_group(self, document: Document):
+        query = self.queries[-1]
+        self.grouped = True
+        for name, value in document:
+            if name == '_id':
+                keys = [v for _, v in value] if isinstance(value, Document) else [value]
+                for key in keys:
+                    if key is not None:
+                        GroupBy.add(self.field_of(key), query)
+                        self.group_keys.append( self.field_of(key) )
+                continue
+            (func, arg), *_ = value
+            counted = self.counted_field(arg)
+            if counted:
+                func, arg = 'count', counted
+            else:
+                func, arg = func.lstrip('$'), self.field_of(arg)
+            if func in ('first', 'last'):
+                if name != arg:
+                    self.group_fields[name] = (NamedField(name), arg)
+                    self.group_outputs[name] = name
+                else:
+                    self.group_fields[name] = (Field, arg)
+                continue
+            field = '{}({})'.format(func, arg)
+            if func in FUNCTION_CLASS:
+                self.accumulators[name] = (func, arg)
+                field = FUNCTION_CLASS[func].format(arg, query)
+            if name != MongoDBLanguage.accumulator_name(func, arg):
+                self.group_fields[name] = (NamedField(name), field)
+                self.group_outputs[name] = name
+            else:
+                self.group_fields[name] = (Field, field)
+                self.group_outputs[name] = field
+
+    @staticmethod
+    def counted_field(value) -> str:
+        """
+        {$cond: [{$ne: ["$field", null]}, 1, 0]} ==> field
+        """
+        if not isinstance(value, Document):
+            return ''
+        condition, *_ = value.get('$cond') or [None]
+        if not isinstance(condition, Document):
+            return ''
+        field, *_ = condition.get('$ne') or ['']
+        return MongoParser.field_of(field)
+
+    def select_group_field(self, name: str):
+        cls, field = self.group_fields.pop(name)
+        cls.add(field, self.queries[-1])
+
+    def add_projection(self, document: Document):
+        query = self.queries[-1]
+        self.projected = self.grouped
+        for field, value in document:
+            if field == '_id':
+                continue
+            if isinstance(value, str) and value.startswith('$_id'):
+                Field.add(field, query)
+            elif value and field in self.group_fields:
+                self.select_group_field(field)
+            elif value and not self.grouped:
+                Field.add(field, query)
+
+    def add_sort(self, document: Document):
+        """
+        After $group: _id is the group key and the other names
+        are outputs of $group -- not columns of the table.
+        """
+        query = self.queries[-1]
+        for field, value in document:
+            sort = SortType.DESC if value == -1 else SortType.ASC
+            if field in self.group_outputs:
+                query.values.setdefault(ORDER_BY, []).append(self.group_outputs[field] + sort.value)
+                continue
+            fields = self.group_keys if field == '_id' and self.grouped else [field]
+            with Context(sort=sort):
+                for name in fields:
+                    OrderBy.add(name, query)
+# ----------------------------
+
+
+SNIFF_SIZE = 4096     # --- characters read by `parser_class`
+SNIFF_REGEX = re.compile(r'''
+    (?P<string>"[^"]*"|'[^']*')
+  | (?P<select>\bselect\b)
+  | (?P<from>\bfrom\b)
+  | (?P<mongo>[.]\s*(?:find|aggregate)\s*[(])
+  | (?P<neo4j>[(\[]\s*\w*\s*:\s*\w)
+''', re.IGNORECASE | re.VERBOSE)
+CYPHER_START_REGEX = re.compile(r'\s*\w+\s*[@]*\s*\w*\s*[(]')
+TABLE_CALL_REGEX = re.compile(r'(\w+)[(]')
+
+
+def parser_class(text: str) -> Parser:
+    """
+    One scan of the beginning of the text (SNIFF_SIZE), stopping at the first
+    decisive token: SELECT...FROM, .find( / .aggregate(, (alias:Label)
+    or else a Cypher pattern at the start.
+    """
+    prefix = text[:SNIFF_SIZE]
+    selecting = False
+    for found in SNIFF_REGEX.finditer(prefix):
+        kind = found.lastgroup
+        if kind == 'select':
+            selecting = True
+        elif kind == 'from':
+            if selecting:
+                return SQLParser
+        elif kind == 'mongo' and not selecting:
+            return MongoParser
+        elif kind == 'neo4j' and not selecting:
+            return Neo4JParser
+    if selecting and len(text) > SNIFF_SIZE:
+        return SQLParser    # --- FROM after the prefix
+    if CYPHER_START_REGEX.match(prefix):
+        return CypherParser
+    return None
+
+
+def rename_tables(text: str, equivalent_names: dict) -> str:
+    """
+    Table(...) Table(...) ==> Table_1(...) Table_2(...)
+    in one rewrite of the text.
+    """
+    repeated = {}
+    for table in TABLE_CALL_REGEX.findall(text):
+        repeated[table] = repeated.get(table, 0) + 1
+    repeated = {table: 0 for table, count in repeated.items() if count > 1}
+    if not repeated:
+        return text
+    def new_name(found: re.Match) -> str:
+        table = found.group(1)
+        if table not in repeated:
+            return found.group(0)
+        repeated[table] += 1
+        name = f'{table}_{repeated[table]}'  # See set_table (line 55)
+        equivalent_names[name] = table
+        return name + '('
+    return TABLE_CALL_REGEX.sub(new_name, text)
+
+
+def detect(text: str, join_queries: bool = True, format: str='') -> Select | list[Select]:
+    parser = parser_class(text)
+    if not parser:
+        raise SyntaxError('Unknown parser class')
+    if parser == CypherParser:
+        text = rename_tables(text, Context.registry(Select, 'EQUIVALENT_NAMES'))
+    query_list = Select.parse(text, parser)
+    if format:
+        for query in query_list:
+            query.set_file_format(format)
+    if not join_queries:
+        return query_list
+    result = query_list[0]
+    for query in query_list[1:]:
+        result += query
+    return result
+
+
+if __name__ == "__main__":
+    CAMPO_MEDIA = 'MEDIA_SALARIAL_DEPTO'
+    employees = detect(
+        f'Employees@department_id(avg$salary:{CAMPO_MEDIA})'
+    )
+    print(employees)
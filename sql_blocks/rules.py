@@ -0,0 +1,167 @@
+"""
+Rules of `Select.optimize`
+(loaded when it is called without a list of rules).
+"""
+import re
+from sql_blocks.sql_blocks import (
+    GROUP_BY, ORDER_BY, SELECT, WHERE, WINDOW, Between, Context, Dialect,
+    Field, ForeignKey, Function, Rule, Select, SubSelect
+)
+
+
+class RulePutLimit(Rule):
+    @classmethod
+    def apply(cls, target: Select):
+        need_limit = any(not target.values.get(key) for key in (WHERE, SELECT))
+        if need_limit:
+            target.limit()
+
+
+class RuleSelectIN(Rule):
+    @classmethod
+    def apply(cls, target: Select):
+        for i, condition in enumerate(target.values[WHERE]):
+            tokens = re.split(r'\s+or\s+|\s+OR\s+', re.sub('\n|\t|[()]', ' ', condition))
+            if len(tokens) < 2:
+                continue
+            fields = [t.split('=')[0].split('.')[-1].lower().strip() for t in tokens]
+            if len(set(fields)) == 1:
+                target.values[WHERE][i] = '{} IN ({})'.format(
+                    Field.format(fields[0], target),
+                    ','.join(t.split('=')[-1].strip() for t in tokens)
+                )
+
+
+class RuleAutoField(Rule):
+    @classmethod
+    def apply(cls, target: Select):
+        if target.values.get(GROUP_BY):
+            target.values[SELECT] = target.values[GROUP_BY]
+            target.values[ORDER_BY] = []
+        elif target.values.get(ORDER_BY):
+            s1 = set(target.values.get(SELECT, []))
+            s2 = set(target.values[ORDER_BY])
+            target.values.setdefault(SELECT, []).extend( list(s2-s1) )
+
+
+class RuleLogicalOp(Rule):
+    REVERSE = {">=": "<", "<=": ">", "=": "<>"}
+    REVERSE |= {v: k for k, v in REVERSE.items()}
+
+    @classmethod
+    def apply(cls, target: Select):
+        REGEX = re.compile('({})'.format(
+            '|'.join(cls.REVERSE)
+        ))
+        for i, condition in enumerate(target.values.get(WHERE, [])):
+            expr = re.sub('\n|\t', ' ', condition)
+            if not re.search(r'\b(NOT|not).*[<>=]', expr):
+                continue
+            tokens = [t.strip() for t in re.split(r'NOT\b|not\b|(<|>|=)', expr) if t]
+            op = ''.join(tokens[1: len(tokens)-1])
+            tokens = [tokens[0], cls.REVERSE[op], tokens[-1]]
+            target.values[WHERE][i] = ' '.join(tokens)
+
+
+class RuleDateFuncReplace(Rule):
+    """
+    SQL algorithm by Ralff Matias
+    """
+    REGEX = re.compile(r'(YEAR[(]|year[(]|=|[)])')
+
+    @classmethod
+    def apply(cls, target: Select):
+        for i, condition in enumerate(target.values.get(WHERE, [])):
+            tokens = [
+                t.strip() for t in cls.REGEX.split(condition) if t.strip()
+            ]
+            if len(tokens) < 3:
+                continue
+            func, field, *rest, year = tokens
+            temp = Select(f'{target.table_name} {target.alias}')
+            Between(f'{year}-01-01', f'{year}-12-31').add(field, temp)
+            target.values[WHERE][i] = ' AND '.join(temp.values[WHERE])
+
+
+class RuleReplaceJoinBySubselect(Rule):
+    @classmethod
+    def apply(cls, target: Select):
+        main, *others = Select.parse( str(target) )
+        modified = False
+        for query in others:
+            fk_field, primary_k = ForeignKey.find(main, query)
+            more_relations = any([
+                ref[0] == query.table_name
+                for ref in Context.registry(ForeignKey, 'references')
+            ])
+            keep_join = any([
+                len( query.values.get(SELECT, []) ) > 0,
+                len( query.values.get(WHERE, []) ) == 0,
+                not fk_field, more_relations
+            ])
+            if keep_join:
+                query.add(fk_field, main)
+                continue
+            query.__class__ = SubSelect
+            Field.add(primary_k, query)
+            query.add(fk_field, main)
+            modified = True
+        if modified:
+            target.values = main.values.copy()
+
+
+class RuleNamedWindow(Rule):
+    """
+    The same PARTITION BY / ORDER BY in several OVER(...) becomes one
+    WINDOW clause -- one sort for all of them:
+        Sum(x) OVER w1, Avg(y) OVER (w1 ROWS 2 PRECEDING)
+        ... WINDOW w1 AS (PARTITION BY dept ORDER BY hire_date)
+    """
+    REGEX = re.compile(r'\bOVER\s*[(]([^()]*)[)]', re.IGNORECASE)
+    FRAME_REGEX = re.compile(r'\b(ROWS|RANGE|GROUPS)\b.*', re.IGNORECASE)
+    NAME_REGEX = re.compile(r'(\w+) AS [(](.*)[)]$')
+    DIALECTS = (Dialect.ANSI, Dialect.POSTGRESQL, Dialect.MYSQL)
+
+    @classmethod
+    def split(cls, spec: str) -> tuple:
+        """
+        (partition + order, frame) -- without extra spaces.
+        """
+        spec = ' '.join( spec.split() )
+        found = cls.FRAME_REGEX.search(spec)
+        if not found:
+            return spec, ''
+        return spec[:found.start()].strip(), found.group()
+
+    @classmethod
+    def apply(cls, target: Select):
+        if Context.get(Function, 'dialect') not in cls.DIALECTS:
+            return
+        names = {}  # --- spec: name
+        for text in target.values.get(WINDOW, []):
+            name, spec = cls.NAME_REGEX.match(text).groups()
+            names[spec] = name
+        keys = [key for key in (SELECT, ORDER_BY) if target.values.get(key)]
+        count = {}
+        for key in keys:
+            for field in target.values[key]:
+                for spec in cls.REGEX.findall(field):
+                    base, _ = cls.split(spec)
+                    if base and base not in names.values():
+                        count[base] = count.get(base, 0) + 1
+        for base, total in count.items():
+            if total > 1 and base not in names:
+                names[base] = f'w{len(names)+1}'
+                target.values.setdefault(WINDOW, []).append(f'{names[base]} AS ({base})')
+        if not names:
+            return
+        def replace(found) -> str:
+            base, frame = cls.split( found.group(1) )
+            name = names.get(base)
+            if not name:
+                return found.group()
+            return f'OVER ({name} {frame})' if frame else f'OVER {name}'
+        for key in keys:
+            target.values[key] = [
+                cls.REGEX.sub(replace, field) for field in target.values[key]
+            ]
@@ -0,0 +1,158 @@
+"""
+Compact binary format of the queries:
+
+    data = query.to_bytes()
+    query = Select.from_bytes(data)   # --- in another process, a cache...
+
+    MAGIC, VERSION
+    strings: count, (size, utf-8)...    -- each text is stored once
+    query:   class, alias, key_field, break_lines, join_type,
+             values: count, (key, count, texts...)...
+             [queries of the CTE: count, query...]
+    links:   count, (table1, table2, field, key)...  -- ForeignKey.references
+The numbers are varints and the texts are positions in `strings`.
+"""
+from sys import intern
+from sql_blocks.sql_blocks import (
+    Context, SQLObject, Select, SelectIN, NotSelectIN, CTE, Recursive,
+    ForeignKey, JoinType, FROM,
+)
+
+
+MAGIC = b'SQB'
+VERSION = 1
+QUERY_CLASSES = [Select, SelectIN, NotSelectIN, CTE, Recursive]
+JOIN_TYPES = list(JoinType)
+ALIAS = '_SQLObject__alias'
+
+
+class Encoder:
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+        self.tables = set()
+
+    def number(self, value: int):
+        while value > 0x7F:
+            self.body.append(value & 0x7F | 0x80)
+            value >>= 7
+        self.body.append(value)
+
+    def text(self, value: str):
+        self.number( self.strings.setdefault(value, len(self.strings)) )
+
+    def query(self, query: Select):
+        cls = type(query)
+        if cls not in QUERY_CLASSES:
+            raise TypeError(f'Cannot serialize a {cls.__name__} object.')
+        self.number( QUERY_CLASSES.index(cls) )
+        self.text( getattr(query, ALIAS) )
+        self.text(query.key_field)
+        self.number( int(getattr(query, 'break_lines', True)) )
+        self.number( JOIN_TYPES.index(query.join_type) )
+        self.number( len(query.values) )
+        for key, items in query.values.items():
+            self.text(key)
+            self.number( len(items) )
+            for item in items:
+                self.text(item)
+        if query.values.get(FROM):
+            self.tables.add(query.table_name)
+        if isinstance(query, CTE):
+            self.number( len(query.query_list) )
+            for item in query.query_list:
+                self.query(item)
+
+    def links(self):
+        found = [
+            (key, value) for key, value in
+            Context.registry(ForeignKey, 'references').items()
+            if self.tables.intersection(key)
+        ]
+        self.number( len(found) )
+        for (table1, table2), (field, key) in found:
+            for value in (table1, table2, field, key):
+                self.text(value)
+
+    def result(self) -> bytes:
+        body, self.body = self.body, bytearray()
+        self.number( len(self.strings) )
+        for value in self.strings:
+            data = value.encode('utf-8')
+            self.number( len(data) )
+            self.body += data
+        return MAGIC + bytes([VERSION]) + self.body + body
+
+
+class Decoder:
+    def __init__(self, data: bytes):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('The data is not a serialized query.')
+        version = data[len(MAGIC)]
+        if version != VERSION:
+            raise ValueError(f'Unsupported version {version} (expected {VERSION}).')
+        self.data = data
+        self.pos = len(MAGIC) + 1
+        self.strings = []
+        for _ in range( self.number() ):
+            size = self.number()
+            start, self.pos = self.pos, self.pos + size
+            self.strings.append( intern(str(data[start:self.pos], 'utf-8')) )
+
+    def number(self) -> int:
+        data, pos = self.data, self.pos
+        value = data[pos]
+        self.pos = pos + 1
+        if value < 0x80:
+            return value
+        value &= 0x7F
+        shift = 7
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def text(self) -> str:
+        return self.strings[self.number()]
+
+    def query(self) -> Select:
+        cls = QUERY_CLASSES[self.number()]
+        query = cls.__new__(cls)
+        setattr(query, ALIAS, self.text())
+        query.key_field = self.text()
+        query.break_lines = bool( self.number() )
+        join_type = JOIN_TYPES[self.number()]
+        if join_type is not cls.join_type:  # --- the default of this process
+            query.join_type = join_type
+        query.values = {}
+        for _ in range( self.number() ):
+            key = self.text()
+            query.values[key] = [self.text() for _ in range( self.number() )]
+        if issubclass(cls, CTE):
+            query.query_list = [self.query() for _ in range( self.number() )]
+        return query
+
+    def links(self):
+        references = Context.registry(ForeignKey, 'references')
+        for _ in range( self.number() ):
+            table1, table2, field, key = [self.text() for _ in range(4)]
+            references[table1, table2] = (field, key)
+
+
+def dumps(query: SQLObject) -> bytes:
+    encoder = Encoder()
+    encoder.query(query)
+    encoder.links()
+    return encoder.result()
+
+def loads(data: bytes) -> Select:
+    try:
+        decoder = Decoder(data)
+        query = decoder.query()
+        decoder.links()
+    except (IndexError, UnicodeDecodeError) as error:
+        raise ValueError('Truncated or corrupted query data.') from error
+    return query
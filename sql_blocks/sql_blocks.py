@@ -1,4 +1,9 @@
 from enum import Enum
+from string import Formatter
+from array import array
+from collections import ChainMap
+from contextvars import ContextVar
+from sys import intern
 import re
 
 
@@ -22,14 +27,99 @@ KEYWORD = {
 
 SELECT, FROM, WHERE, GROUP_BY, ORDER_BY, LIMIT = KEYWORD.keys()
 USUAL_KEYS = [SELECT, WHERE, GROUP_BY, ORDER_BY, LIMIT]
+WINDOW = 'WINDOW'   # --- named windows (see RuleNamedWindow)
 TO_LIST = lambda x: x if isinstance(x, list) else [x]
 
 
+class Context:
+    """
+    Settings for the current thread or async task:
+
+        with Context(dialect=Dialect.ORACLE, sort=SortType.DESC):
+            ...
+
+    What is not informed comes from the enclosing Context (when nested)
+    or else from the class attributes (Function.dialect, OrderBy.sort,
+    SQLObject.ALIAS_FUNC).
+    Registries (Select.EQUIVALENT_NAMES, ForeignKey.references)
+    filled inside the context are released when it ends;
+    the ones of the enclosing contexts are still seen.
+    """
+    current = ContextVar('sql_blocks_context', default=None)
+
+    def __init__(self, dialect=None, sort=None, alias_func=None):
+        self.settings = {
+            attr: value for attr, value in zip(
+                ('dialect', 'sort', 'ALIAS_FUNC'),
+                (dialect, sort, alias_func)
+            ) if value is not None
+        }
+        self.registries = {}
+        self.__tokens = []
+        self.__parents = []
+
+    @property
+    def parent(self) -> 'Context':
+        return self.__parents[-1] if self.__parents else None
+
+    def __enter__(self):
+        parent = self.current.get()
+        if parent is self:  # --- the same context, entered again
+            parent = self.parent
+        self.__parents.append(parent)
+        self.__tokens.append( self.current.set(self) )
+        return self
+
+    def __exit__(self, *args):
+        self.current.reset( self.__tokens.pop() )
+        self.__parents.pop()
+        if not self.__tokens:
+            self.registries.clear()
+
+    @classmethod
+    def chain(cls):
+        """
+        The current context and the ones it is nested in.
+        """
+        context = cls.current.get()
+        while context:
+            yield context
+            context = context.parent
+
+    @classmethod
+    def get(cls, owner: type, attr: str):
+        for context in cls.chain():
+            if attr in context.settings:
+                return context.settings[attr]
+        return getattr(owner, attr)
+
+    @classmethod
+    def set(cls, owner: type, attr: str, value):
+        context = cls.current.get()
+        if context:
+            context.settings[attr] = value
+        else:
+            setattr(owner, attr, value)
+
+    @classmethod
+    def registry(cls, owner: type, attr: str) -> dict:
+        shared = getattr(owner, attr)
+        contexts = list( cls.chain() )
+        if not contexts:
+            return shared
+        return ChainMap(*[
+            context.registries.setdefault(attr, {}) for context in contexts
+        ], shared)
+
+
 class SQLObject:
+    # --- __dict__ only for what is assigned per instance (join_type...):
+    __slots__ = ('__alias', 'values', 'key_field', '__dict__')
     ALIAS_FUNC = None
     """    ^^^^^^^^^^^^^^^^^^^^^^^^
     You can change the behavior by assigning 
     a user function to SQLObject.ALIAS_FUNC
+    (or only for the current Context)
     """
 
     def __init__(self, table_name: str=''):
@@ -41,15 +131,15 @@ class SQLObject:
     def set_table(self, table_name: str):
         if not table_name:
             return
-        cls = SQLObject
+        alias_func = Context.get(SQLObject, 'ALIAS_FUNC')
         is_file_name = any([
             '/' in table_name, '.' in table_name
         ])
         ref = table_name
         if is_file_name:
             ref = table_name.split('/')[-1].split('.')[0]
-        if cls.ALIAS_FUNC:
-            self.__alias = cls.ALIAS_FUNC(ref)
+        if alias_func:
+            self.__alias = alias_func(ref)
         elif ' ' in table_name.strip():
             table_name, self.__alias = table_name.split()
         elif '_' in ref:
@@ -59,7 +149,8 @@ class SQLObject:
             )
         else:
             self.__alias = ref.lower()[:3]
-        self.values.setdefault(FROM, []).append(f'{table_name} {self.alias}')
+        self.__alias = intern(self.__alias)
+        self.values.setdefault(FROM, []).append(intern(f'{table_name} {self.alias}'))
 
     @property
     def table_name(self) -> str:
@@ -154,7 +245,7 @@ class Field:
             name = f'{main.alias}.{name}'
         if Function in cls.__bases__:
             name = f'{cls.__name__}({name})'
-        return f'{cls.prefix}{name}'
+        return intern(f'{cls.prefix}{name}')
 
     @classmethod
     def add(cls, name: str, main: SQLObject):
@@ -168,6 +259,8 @@ class Distinct(Field):
 
 
 class NamedField:
+    __slots__ = ('alias', 'class_type')
+
     def __init__(self, alias: str, class_type = Field):
         self.alias = alias
         self.class_type = class_type
@@ -188,18 +281,33 @@ class Dialect(Enum):
     POSTGRESQL = 3
     MYSQL = 4
 
+class hybridmethod:
+    """
+    From the class, the method runs on a new instance:
+        Sum.add(name, main) == Sum().add(name, main)
+    """
+    def __init__(self, func):
+        self.func = func
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return lambda *args: self.func(owner(), *args)
+        return self.func.__get__(obj, owner)
+
+
 class Function:
+    __slots__ = ('params', 'field_class', 'pattern', 'extra')
     dialect = Dialect.ANSI
 
     def __init__(self, *params: list):
-        # --- Replace class methods by instance methods: ------
-        self.add = self.__add
-        self.format = self.__format
-        # -----------------------------------------------------
         self.params = [str(p) for p in params]
         self.field_class = Field
         self.pattern = self.get_pattern()
         self.extra = {}
+
+    @property
+    def current_dialect(self) -> 'Dialect':
+        return Context.get(self.__class__, 'dialect')
     
     def get_pattern(self) -> str:
         return '{func_name}({params})'
@@ -216,45 +324,43 @@ class Function:
             params=', '.join(self.params)
         )
 
-    def __format(self, name: str, main: SQLObject) -> str:
+    @hybridmethod
+    def format(self, name: str, main: SQLObject) -> str:
         if name not in '*_':
             self.params = [
                 Field.format(name, main)
             ] + self.params
         return str(self)
 
-    @classmethod
-    def format(cls, name: str, main: SQLObject):
-        return cls().__format(name, main)
-
-    def __add(self, name: str, main: SQLObject):
+    @hybridmethod
+    def add(self, name: str, main: SQLObject):
         name = self.format(name, main)
         self.field_class.add(name, main)
         if self.extra:
             main.__call__(**self.extra)
 
-    @classmethod
-    def add(cls, name: str, main: SQLObject):
-        cls().__add(name, main)
-
 
 # ---- String Functions: ---------------------------------
 class SubString(Function):
+    __slots__ = ()
+
     def get_pattern(self) -> str:
-        if self.dialect in (Dialect.ORACLE, Dialect.MYSQL):
+        if self.current_dialect in (Dialect.ORACLE, Dialect.MYSQL):
             return 'Substr({params})'
         return super().get_pattern()
 
 # ---- Numeric Functions: --------------------------------
 class Round(Function):
-    ...
+    __slots__ = ()
 
 # --- Date Functions: ------------------------------------
 class DateDiff(Function):
+    __slots__ = ()
+
     def get_pattern(self) -> str:
         def is_field_or_func(name: str) -> bool:
             return re.sub('[()]', '', name).isidentifier()
-        if self.dialect != Dialect.SQL_SERVER:
+        if self.current_dialect != Dialect.SQL_SERVER:
             return ' - '.join(
                 p if is_field_or_func(p) else f"'{p}'"
                 for p in self.params
@@ -262,28 +368,33 @@ class DateDiff(Function):
         return super().get_pattern()
 
 class Year(Function):
+    __slots__ = ()
+
     def get_pattern(self) -> str:
         database_type = {
             Dialect.ORACLE: 'Extract(YEAR FROM {params})',
             Dialect.POSTGRESQL: "Date_Part('year', {params})",
         }
-        if self.dialect in database_type:
-            return database_type[self.dialect]
+        if self.current_dialect in database_type:
+            return database_type[self.current_dialect]
         return super().get_pattern()
 
 class Current_Date(Function):
+    __slots__ = ()
+
     def get_pattern(self) -> str:
         database_type = {
             Dialect.ORACLE: SQL_CONST_SYSDATE,
             Dialect.POSTGRESQL: SQL_CONST_CURR_DATE,
             Dialect.SQL_SERVER: 'getDate()'
         }
-        if self.dialect in database_type:
-            return database_type[self.dialect]
+        if self.current_dialect in database_type:
+            return database_type[self.current_dialect]
         return super().get_pattern()
 # --------------------------------------------------------
 
 class Frame:
+    __slots__ = ()
     break_lines: bool = True
 
     def over(self, **args):
@@ -311,45 +422,47 @@ class Frame:
 
 
 class Aggregate(Frame):
-    ...
+    __slots__ = ()
 
 class Window(Frame):
-    ...
+    __slots__ = ()
 
 # ---- Aggregate Functions: -------------------------------
 class Avg(Aggregate, Function):
-    ...
+    __slots__ = ()
 class Min(Aggregate, Function):
-    ...
+    __slots__ = ()
 class Max(Aggregate, Function):
-    ...
+    __slots__ = ()
 class Sum(Aggregate, Function):
-    ...
+    __slots__ = ()
 class Count(Aggregate, Function):
-    ...
+    __slots__ = ()
 
 # ---- Window Functions: -----------------------------------
 class Row_Number(Window, Function):
-    ... 
+    __slots__ = ()
 class Rank(Window, Function):
-    ... 
+    __slots__ = ()
 class Lag(Window, Function):
-    ...
+    __slots__ = ()
 class Lead(Window, Function):
-    ...
+    __slots__ = ()
 
 
 # ---- Conversions and other Functions: ---------------------
 class Coalesce(Function):
-    ...
+    __slots__ = ()
 class Cast(Function):
-    ...
+    __slots__ = ()
 
 
 FUNCTION_CLASS = {f.__name__.lower(): f for f in Function.__subclasses__()}
 
 
 class ExpressionField:
+    __slots__ = ('expr',)
+
     def __init__(self, expr: str):
         self.expr = expr
 
@@ -369,6 +482,7 @@ class ExpressionField:
         )
 
 class FieldList:
+    __slots__ = ('fields', 'class_types', 'ziped')
     separator = ','
 
     def __init__(self, fields: list=[], class_types = [Field], ziped: bool=False):
@@ -391,6 +505,8 @@ class FieldList:
 
 
 class Table(FieldList):
+    __slots__ = ()
+
     def add(self, name: str, main: SQLObject):
         main.set_table(name)
         super().add(name, main)
@@ -415,21 +531,71 @@ class ForeignKey:
 
     def add(self, name: str, main: SQLObject):
         key = self.get_key(main, self)
-        ForeignKey.references[key] = (name, '')
+        Context.registry(ForeignKey, 'references')[key] = (name, '')
 
     @classmethod
     def find(cls, obj1: SQLObject, obj2: SQLObject) -> tuple:
         key = cls.get_key(obj1, obj2)
-        a, b = cls.references.get(key, ('', ''))
+        a, b = Context.registry(cls, 'references').get(key, ('', ''))
         return a, (b or obj2.key_field)
 
 
+class Slot:
+    """
+    A named value, given later to `Template.render`:
+        Select('Product p', price=gt(Slot('min_price'))).compile()
+    """
+    MARK = '\x1a'
+
+    def __init__(self, name: str):
+        if not name.isidentifier():
+            raise ValueError(f'Invalid slot name `{name}`.')
+        self.name = name
+
+    def __str__(self) -> str:
+        # --- looks like a string literal to the languages:
+        return f"'{self.MARK}{self.name}{self.MARK}'"
+
+
 def quoted(value) -> str:
     if isinstance(value, str):
         value = f"'{value}'"
     return str(value)
 
 
+def literal_list(values) -> str:
+    """
+    'v1,v2,...' -- the numbers, dates and texts of numpy arrays,
+    array.array, range or memoryview are formatted as a whole
+    (not one `quoted` call per value).
+    """
+    if isinstance(values, memoryview):
+        values = values.tolist()
+    kind = getattr(getattr(values, 'dtype', None), 'kind', '')
+    if kind:
+        values = values.reshape(-1)
+    if kind == 'b':
+        values = values.astype('int8')
+        kind = 'i'
+    if kind in ('i', 'u'):
+        return ','.join( map(str, values.tolist()) )
+    if kind == 'f':
+        values = values.tolist()
+        if any(v != v for v in values):
+            return ','.join('NULL' if v != v else str(v) for v in values)
+        return ','.join( map(str, values) )
+    if kind in ('M', 'U', 'S'):
+        return "'{}'".format( "','".join(values.astype(str).tolist()) )
+    if isinstance(values, range) or (
+        isinstance(values, array) and values.typecode != 'u'
+    ):
+        return ','.join( map(str, values) )
+    return ','.join(quoted(v) for v in values)
+
+
+LITERAL_LISTS = (list, tuple, set, frozenset, range, memoryview, array)
+
+
 class Position(Enum):
     Middle = 0
     StartsWith = 1
@@ -437,10 +603,12 @@ class Position(Enum):
 
 
 class Where:
+    __slots__ = ('content', 'handler')
     prefix = ''
 
     def __init__(self, content: str):
         self.content = content
+        self.handler = None     # --- another `add` (formula, join)
 
     @classmethod
     def __constructor(cls, operator: str, value):
@@ -482,14 +650,16 @@ class Where:
     
     @classmethod
     def inside(cls, values):
-        if isinstance(values, list):
-            values = ','.join(quoted(v) for v in values)
+        if isinstance(values, range) and abs(values.step) == 1 and len(values) > 1:
+            return cls('BETWEEN {} AND {}'.format( min(values), max(values) ))
+        if isinstance(values, LITERAL_LISTS) or hasattr(values, 'dtype'):
+            values = literal_list(values)
         return cls(f'IN ({values})')
 
     @classmethod
     def formula(cls, formula: str):
         where = cls( ExpressionField(formula) )
-        where.add = where.add_expression
+        where.handler = cls.add_expression
         return where
 
     def add_expression(self, name: str, main: SQLObject):
@@ -501,7 +671,7 @@ class Where:
     @classmethod
     def join(cls, query: SQLObject):
         where = cls(query)
-        where.add = where.add_join
+        where.handler = cls.add_join
         return where
 
     def add_join(self, name: str, main: SQLObject):
@@ -515,6 +685,8 @@ class Where:
         ))
 
     def add(self, name: str, main: SQLObject):
+        if self.handler:
+            return self.handler(self, name, main)
         func_type = FUNCTION_CLASS.get(name.lower())
         exists = any(
             main.is_named_field(fld, SELECT)
@@ -541,6 +713,7 @@ startswith, endswith = [
 
 
 class Not(Where):
+    __slots__ = ()
     prefix = 'NOT '
 
     @classmethod
@@ -549,12 +722,16 @@ class Not(Where):
 
 
 class Case:
+    __slots__ = ('__conditions', 'default', 'field')
+
     def __init__(self, field: str):
         self.__conditions = {}
         self.default = None
         self.field = field
 
     def when(self, condition: Where, result: str):
+        if not isinstance(condition, Where):
+            condition = Where.inside(condition)
         self.__conditions[result] = condition
         return self
     
@@ -565,17 +742,20 @@ class Case:
     def add(self, name: str, main: SQLObject):
         field = Field.format(self.field, main)
         default = quoted(self.default)
-        name = 'CASE \n{}\n\tEND AS {}'.format(
+        name = 'CASE \n{}{}\n\tEND AS {}'.format(
             '\n'.join(
-                f'\t\tWHEN {field} {cond.expr} THEN {quoted(res)}'
+                f'\t\tWHEN {field} {cond.content} THEN {quoted(res)}'
                 for res, cond in self.__conditions.items()
-            ) + f'\n\t\tELSE {default}' if default else '',
+            ),
+            f'\n\t\tELSE {default}' if self.default is not None else '',
             name
         )
         main.values.setdefault(SELECT, []).append(name)
 
 
 class Options:
+    __slots__ = ('__children',)
+
     def __init__(self, **values):
         self.__children: dict = values
 
@@ -585,6 +765,8 @@ class Options:
         conditions: list[str] = []
         child: Where
         for field, child in self.__children.items():
+            if not isinstance(child, Where):
+                child = Where.inside(child)
             conditions.append(' {} {} '.format(
                 Field.format(field, main), child.content
             ))
@@ -594,8 +776,11 @@ class Options:
 
 
 class Between:
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end):
-        if start > end:
+        slots = isinstance(start, Slot) or isinstance(end, Slot)
+        if not slots and start > end:
             start, end = end, start
         self.start = start
         self.end = end
@@ -616,7 +801,7 @@ class Clause:
             name = found[0].replace('_', '')
         elif '.' not in name and main.alias and not is_function():
             name = f'{main.alias}.{name}'
-        return name
+        return intern(name)
 
 
 class SortType(Enum):
@@ -658,7 +843,8 @@ class OrderBy(Clause):
     @classmethod
     def add(cls, name: str, main: SQLObject):
         name = cls.format(name, main)
-        main.values.setdefault(ORDER_BY, []).append(name+cls.sort.value)
+        sort: SortType = Context.get(cls, 'sort')
+        main.values.setdefault(ORDER_BY, []).append(name+sort.value)
 
     @classmethod
     def cls_to_str(cls) -> str:
@@ -715,8 +901,8 @@ class Rule:
         ...
 
 class QueryLanguage:
-    pattern = '{select}{_from}{where}{group_by}{order_by}{limit}'
-    has_default = {key: bool(key == SELECT) for key in KEYWORD}
+    pattern = '{select}{_from}{where}{group_by}{window}{order_by}{limit}'
+    has_default = {key: bool(key == SELECT) for key in [*KEYWORD, WINDOW]}
 
     @staticmethod
     def remove_alias(fld: str) -> str:
@@ -743,17 +929,42 @@ class QueryLanguage:
     def set_group(self, values: list) -> str:
         return  self.join_with_tabs(values, ',')
 
+    def name_windows(self, values: list) -> str:
+        return  self.join_with_tabs(values, ',')
+
     def set_limit(self, values: list) -> str:
         return self.join_with_tabs(values, ' ')
 
+    @staticmethod
+    def limit_values(values: list) -> tuple:
+        """
+        ['10 OFFSET 20'] --> (10, 20)
+        """
+        count, *offset = re.findall(r'\d+', ' '.join(values))
+        return int(count), int(offset[0]) if offset else 0
+
+    @staticmethod
+    def literal(value) -> str:
+        """
+        The text of a value given to a Slot.
+        """
+        if value is None:
+            return 'NULL'
+        if isinstance(value, str):
+            return "'{}'".format( value.replace("'", "''") )
+        if isinstance(value, bool):
+            return str(int(value))
+        return str(value)
+
     def __init__(self, target: 'Select'):
-        self.KEYWORDS = [SELECT, FROM, WHERE, GROUP_BY, ORDER_BY, LIMIT]
+        self.KEYWORDS = [SELECT, FROM, WHERE, GROUP_BY, WINDOW, ORDER_BY, LIMIT]
         self.TABULATION = '\n\t' if target.break_lines else ' '
         self.LINE_BREAK = '\n' if target.break_lines else ' '
         self.TOKEN_METHODS = {
             SELECT: self.add_field, FROM: self.get_tables, 
             WHERE: self.extract_conditions, LIMIT: self.set_limit,
             ORDER_BY: self.sort_by, GROUP_BY: self.set_group,
+            WINDOW: self.name_windows,
         }
         self.result = {}
         self.target = target
@@ -766,7 +977,7 @@ class QueryLanguage:
     def prefix(self, key: str) -> str:
         return self.LINE_BREAK + key + self.TABULATION
 
-    def convert(self) -> str:
+    def build(self):
         for key in self.KEYWORDS:
             method = self.TOKEN_METHODS.get(key)
             ref = self.pair(key)
@@ -780,208 +991,71 @@ class QueryLanguage:
                 ).strip()
             text = method(values)
             self.result[ref] = self.prefix(key) + text
-        return self.pattern.format(**self.result).strip()
-
-class MongoDBLanguage(QueryLanguage):
-    pattern = '{_from}.{function}({where}{select}{group_by}){order_by}'
-    has_default = {key: False for key in KEYWORD}
-    LOGICAL_OP_TO_MONGO_FUNC = {
-        '>': '$gt',  '>=': '$gte',
-        '<': '$lt',  '<=': '$lte',
-        '=': '$eq',  '<>': '$ne',
-    }
-    OPERATORS = '|'.join(op for op in LOGICAL_OP_TO_MONGO_FUNC)
-    REGEX = {
-        'options': re.compile(r'\s+or\s+|\s+OR\s+'),
-        'condition': re.compile(fr'({OPERATORS})')
-    }
-
-    def join_with_tabs(self, values: list, sep: str=',') -> str:
-        def format_field(fld):
-            return '{indent}{fld}'.format(
-                fld=self.remove_alias(fld),
-                indent=self.TABULATION
-            )
-        return '{begin}{content}{line_break}{end}'.format(
-            begin='{',
-            content= sep.join(
-                format_field(fld) for fld in values if fld
-            ),
-            end='}', line_break=self.LINE_BREAK,
-        )
-
-    def add_field(self, values: list) -> str:
-        if self.result['function'] == 'aggregate':
-            return ''
-        return ',{content}'.format(
-            content=self.join_with_tabs([f'{fld}: 1' for fld in values]),
-        )
-
-    def get_tables(self, values: list) -> str:
-        return values[0].split()[0].lower()
-
-    @classmethod
-    def mongo_where_list(cls, values: list) -> list:
-        OR_REGEX = cls.REGEX['options']
-        where_list = []
-        for condition in values:
-            if OR_REGEX.findall(condition):
-                condition = re.sub('[()]', '', condition)
-                expr = '{begin}$or: [{content}]{end}'.format(
-                    content=','.join(
-                        cls.mongo_where_list( OR_REGEX.split(condition) )
-                    ), begin='{', end='}',
-                )
-                where_list.append(expr)
-                continue
-            tokens = cls.REGEX['condition'].split( 
-                cls.remove_alias(condition) 
-            )
-            tokens = [t.strip() for t in tokens if t]
-            field, *op, const = tokens
-            op = ''.join(op)
-            expr = '{begin}{op}:{const}{end}'.format(
-                begin='{', const=const, end='}',
-                op=cls.LOGICAL_OP_TO_MONGO_FUNC[op],                
-            )
-            where_list.append(f'{field}:{expr}')
-        return where_list
-    
-    def extract_conditions(self, values: list) -> str:
-        return self.join_with_tabs(
-            self.mongo_where_list(values)
-        )
-
-    def sort_by(self, values: list) -> str:
-        return  ".sort({begin}{indent}{field}:{flag}{line_break}{end})".format(
-            begin='{', field=self.remove_alias(values[0].split()[0]), 
-            flag=-1 if OrderBy.sort == SortType.DESC else 1,
-            end='}', indent=self.TABULATION, line_break=self.LINE_BREAK,
-        )
-
-    def set_group(self, values: list) -> str:
-        self.result['function'] = 'aggregate'
-        return '{"$group" : {_id:"$%%", count:{$sum:1}}}'.replace(
-            '%%', self.remove_alias( values[0] )
-        )
-    
-    def __init__(self, target: 'Select'):
-        super().__init__(target)
-        self.result['function'] = 'find'
-        self.KEYWORDS = [GROUP_BY, SELECT, FROM, WHERE, ORDER_BY]
-
-    def prefix(self, key: str):
-        return ''
-
-
-class Neo4JLanguage(QueryLanguage):
-    pattern = 'MATCH {_from}{where}RETURN {select}{order_by}'
-    has_default = {WHERE: False, FROM: False, ORDER_BY: True, SELECT: True}
-
-    def add_field(self, values: list) -> str:
-        if values:
-            return self.join_with_tabs(values, ',')
-        return self.TABULATION + ','.join(self.aliases.keys())
-
-    def get_tables(self, values: list) -> str:
-        NODE_FORMAT = dict(
-            left='({}:{}{})<-',
-            core='[{}:{}{}]',
-            right='->({}:{}{})'
-        )
-        nodes = {k: '' for k in NODE_FORMAT}
-        for txt in values:
-            found = re.search(
-                r'^(left|right)\s+', txt, re.IGNORECASE
-            )
-            pos, end, i = 'core', 0, 0
-            if found:
-                start, end = found.span()
-                pos = txt[start:end-1].lower()
-                i = 1
-            tokens = re.split(r'JOIN\s+|ON\s+', txt[end:])
-            txt = tokens[i].strip()
-            table_name, *alias = txt.split()
-            if alias:
-                alias = alias[0]
-            else:
-                alias = SQLObject.ALIAS_FUNC(table_name)
-            condition = self.aliases.get(alias, '')
-            if not condition:
-                self.aliases[alias] = ''
-            nodes[pos] = NODE_FORMAT[pos].format(alias, table_name, condition)
-        return self.TABULATION + '{left}{core}{right}'.format(**nodes)
-        
 
-    def extract_conditions(self, values: list) -> str:
-        equalities = {}
-        where_list = []
-        for condition in values:
-            other_comparisions = any(
-                char in condition for char in '<>'
-            )
-            where_list.append(condition)
-            if '=' not in condition or other_comparisions:
-                continue
-            alias, field, const = re.split(r'[.=]', condition)
-            begin, end = '{', '}'
-            equalities[alias] = f'{begin}{field}:{const}{end}'
-        if len(equalities) == len(where_list):
-            self.aliases.update(equalities)
-            self.has_default[WHERE] = True
-            return self.LINE_BREAK
-        return self.join_with_tabs(where_list, ' AND ') + self.LINE_BREAK
-
-    def set_group(self, values: list) -> str:
-        return ''
-
-    def __init__(self, target: 'Select'):
-        super().__init__(target)
-        self.aliases = {}
-        self.KEYWORDS = [WHERE, FROM, ORDER_BY, SELECT]
-
-    def prefix(self, key: str):
-        default_prefix = any([
-            (key == WHERE and not self.has_default[WHERE]),
-            key == ORDER_BY
-        ])
-        if default_prefix:
-            return super().prefix(key)
-        return ''
-
-
-class Parser:
-    REGEX = {}
-
-    def prepare(self):
-        ...
+    def pieces(self):
+        """
+        The text in pieces (the pattern and each clause),
+        never joined -- the whitespace around them is stripped.
+        """
+        self.build()
+        items = []
+        for literal, ref, _, _ in Formatter().parse(self.pattern):
+            items.append(literal)
+            if ref:
+                items.append( self.result.get(ref, '') )
+        filled = [i for i, item in enumerate(items) if item.strip()]
+        if not filled:
+            return
+        first, last = filled[0], filled[-1]
+        items[last] = items[last].rstrip()
+        items[first] = items[first].lstrip()
+        yield from items[first: last+1]
 
-    def __init__(self, txt: str, class_type):
-        self.queries = []
-        self.prepare()
-        self.class_type = class_type
-        self.eval(txt)
+    def convert(self) -> str:
+        return ''.join( self.pieces() )
 
-    def eval(self, txt: str):
-        ...
+    def write(self, stream):
+        for piece in self.pieces():
+            stream.write(piece)
 
-    @staticmethod
-    def remove_spaces(script: str) -> str:
-        is_string = False
-        result = []
-        for token in re.split(r'(")', script):
-            if token == '"':
-                is_string = not is_string
-            if not is_string:
-                token = re.sub(r'\s+', '', token)
-            result.append(token)
+class Template:
+    """
+    A query rendered once, as fixed segments between its slots:
+        template = query.compile()
+        template.render(min_price=10)   # --- only joins strings
+    """
+    REGEX = re.compile("'{0}(\\w+){0}'".format(Slot.MARK))
+
+    def __init__(self, text: str, language: type=QueryLanguage):
+        self.segments = self.REGEX.split(text)
+        quotes = 0
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                quotes += segment.count("'")
+            elif quotes % 2:  # --- e.g. Where.contains(Slot(...)) ==> LIKE '%'...'%'
+                raise ValueError(
+                    f'Slot `{segment}` inside a larger literal: '
+                    'give the whole value (e.g. the LIKE pattern) to the slot.'
+                )
+        self.slots = list( dict.fromkeys(self.segments[1::2]) )
+        self.literal = language.literal
+
+    def render(self, **values) -> str:
+        missing = set(self.slots).difference(values)
+        if missing:
+            raise KeyError('Missing value for slot(s): {}'.format(
+                ', '.join(sorted(missing))
+            ))
+        literals = {name: self.literal(value) for name, value in values.items()}
+        result = self.segments.copy()
+        result[1::2] = [literals[name] for name in result[1::2]]
         return ''.join(result)
 
-    def get_tokens(self, txt: str) -> list:
-        return [
-            self.remove_spaces(t)
-            for t in self.REGEX['separator'].split(txt)            
-        ]
+    def __str__(self) -> str:
+        return ''.join(
+            f':{text}' if i % 2 else text
+            for i, text in enumerate(self.segments)
+        )
 
 
 class JoinType(Enum):
@@ -991,363 +1065,8 @@ class JoinType(Enum):
     FULL = 'FULL '
 
 
-class SQLParser(Parser):
-    REGEX = {}
-
-    def prepare(self):
-        keywords = '|'.join(k + r'\b' for k in KEYWORD)
-        flags = re.IGNORECASE + re.MULTILINE
-        self.REGEX['keywords'] = re.compile(f'({keywords}|[*])', flags)
-        self.REGEX['subquery'] = re.compile(r'(\w\.)*\w+ +in +\(SELECT.*?\)', flags)
-
-    def eval(self, txt: str):
-        def find_last_word(pos: int) -> int:
-            SPACE, WORD = 1, 2
-            found = set()
-            for i in range(pos, 0, -1):
-                if txt[i] in [' ', '\t', '\n']:
-                    if sum(found) == 3:
-                        return i
-                    found.add(SPACE)
-                if txt[i].isalpha():
-                    found.add(WORD)
-                elif txt[i] == '.':
-                    found.remove(WORD)
-        def find_parenthesis(pos: int) -> int:
-            for i in range(pos, len(txt)-1):
-                if txt[i] == ')':
-                    return i+1
-        result = {}
-        found = self.REGEX['subquery'].search(txt)
-        while found:
-            start, end = found.span()
-            inner = txt[start: end]
-            if inner.count('(') > inner.count(')'):
-                end = find_parenthesis(end)
-                inner = txt[start: end-1]
-            fld, *inner = re.split(r' IN | in', inner, maxsplit=1)
-            if fld.upper() == 'NOT':
-                pos = find_last_word(start)
-                fld = txt[pos: start].strip() # [To-Do] Use the value of `fld`
-                start = pos
-                target_class = NotSelectIN
-            else:
-                target_class = SelectIN
-            obj = SQLParser(
-                ' '.join(re.sub(r'^\(', '', s.strip()) for s in inner),
-                class_type=target_class
-            ).queries[0]
-            result[obj.alias] = obj
-            txt = txt[:start-1] + txt[end+1:]
-            found = self.REGEX['subquery'].search(txt)
-        tokens = [t.strip() for t in self.REGEX['keywords'].split(txt) if t.strip()]
-        values = {k.upper(): v for k, v in zip(tokens[::2], tokens[1::2])}
-        tables = [t.strip() for t in re.split('JOIN|LEFT|RIGHT|ON', values[FROM]) if t.strip()]
-        for item in tables:
-            if '=' in item:
-                a1, f1, a2, f2 = [r.strip() for r in re.split('[().=]', item) if r]
-                obj1: SQLObject = result[a1]
-                obj2: SQLObject = result[a2]
-                PrimaryKey.add(f2, obj2)
-                ForeignKey(obj2.table_name).add(f1, obj1)
-            else:
-                obj = self.class_type(item)
-                for key in USUAL_KEYS:
-                    if not key in values:
-                        continue
-                    separator = self.class_type.get_separator(key)
-                    cls = {
-                        ORDER_BY: OrderBy, GROUP_BY: GroupBy
-                    }.get(key, Field)
-                    obj.values[key] = [
-                        cls.format(fld, obj)
-                        for fld in re.split(separator, values[key])
-                        if (fld != '*' and len(tables) == 1) or obj.match(fld, key)
-                    ]
-                result[obj.alias] = obj
-        self.queries = list( result.values() )
-
-
-class CypherParser(Parser):
-    REGEX = {}
-    CHAR_SET = r'[(,?)^{}[\]]'
-    KEYWORDS = '|'.join(
-        fr'\b{word}\b'
-        for word in "where return WHERE RETURN and AND".split()
-    )
-
-    def prepare(self):
-        self.REGEX['separator'] = re.compile(fr'({self.CHAR_SET}|->|<-|{self.KEYWORDS})')
-        self.REGEX['condition'] = re.compile(r'(^\w+)|([<>=])')
-        self.REGEX['alias_pos'] = re.compile(r'(\w+)[.](\w+)')
-        self.join_type = JoinType.INNER
-        self.TOKEN_METHODS = {
-            '(': self.add_field,  '?': self.add_where,
-            ',': self.add_field,  '^': self.add_order,
-            ')': self.new_query,  '<-': self.left_ftable,
-            '->': self.right_ftable,
-        }
-        self.method = self.new_query
-        self.aliases = {}
-
-    def new_query(self, token: str, join_type = JoinType.INNER, alias: str=''):
-        token, *group_fields = token.split('@')
-        if not token.isidentifier():
-            return
-        table_name = f'{token} {alias}' if alias else token
-        query = self.class_type(table_name)
-        if not alias:
-            alias = query.alias
-        self.queries.append(query)
-        self.aliases[alias] = query
-        FieldList(group_fields, [Field, GroupBy]).add('', query)
-        query.join_type = join_type
-
-    def add_where(self, token: str):
-        elements = [t for t in self.REGEX['alias_pos'].split(token) if t]
-        if len(elements) == 3:
-            alias, field, *condition = elements
-            query = self.aliases[alias]
-        else:
-            field, *condition = [
-                t for t in self.REGEX['condition'].split(token) if t
-            ]
-            query = self.queries[-1]
-        Where(' '.join(condition)).add(field, query)
-    
-    def add_order(self, token: str):
-        self.add_field(token, [OrderBy])
-
-    def add_field(self, token: str, extra_classes: list['type']=[]):
-        if token in self.TOKEN_METHODS:
-            return
-        class_list = [Field]
-        if '*' in token:
-            token = token.replace('*', '')
-            self.queries[-1].key_field = token
-            return
-        elif '$' in token:
-            func_name, token = token.split('$')
-            if func_name == 'count':
-                if not token:
-                    token = 'count_1'
-                pk_field = self.queries[-1].key_field or 'id'
-                Count().As(token, extra_classes).add(pk_field, self.queries[-1])
-                return
-            else:
-                class_type = FUNCTION_CLASS.get(func_name)
-                if not class_type:
-                    raise ValueError(f'Unknown function `{func_name}`.')
-                if ':' in token:
-                    token, field_alias = token.split(':')
-                    class_type = class_type().As(field_alias)
-                class_list = [class_type]
-        class_list += extra_classes
-        FieldList(token, class_list).add('', self.queries[-1])
-
-    def left_ftable(self, token: str):
-        if self.queries:
-            self.queries[-1].join_type = JoinType.LEFT
-        self.new_query(token)
-
-    def right_ftable(self, token: str):
-        self.new_query(token, JoinType.RIGHT)
-
-    def add_foreign_key(self, token: str, pk_field: str=''):
-        curr, last = [self.queries[i] for i in (-1, -2)]
-        if not pk_field:
-            if last.key_field:
-                pk_field = last.key_field
-            else:
-                if not last.values.get(SELECT):
-                    raise IndexError(f'Primary Key not found for {last.table_name}.')
-                pk_field = last.values[SELECT][-1].split('.')[-1]
-                last.delete(pk_field, [SELECT], exact=True)
-        if '{}' in token:
-            foreign_fld = token.format(
-                last.table_name.lower()
-                if last.join_type == JoinType.LEFT else
-                curr.table_name.lower()
-            )
-        else:
-            if not curr.values.get(SELECT):
-                raise IndexError(f'Foreign Key not found for {curr.table_name}.')
-            fields = [
-                fld for fld in curr.values[SELECT]
-                if fld not in curr.values.get(GROUP_BY, [])
-            ]
-            foreign_fld = fields[0].split('.')[-1]
-            curr.delete(foreign_fld, [SELECT], exact=True)
-            if curr.join_type == JoinType.RIGHT:
-                pk_field, foreign_fld = foreign_fld, pk_field
-        if curr.join_type == JoinType.RIGHT:
-            curr, last = last, curr
-        k = ForeignKey.get_key(curr, last)
-        ForeignKey.references[k] = (foreign_fld, pk_field)
-
-    def fk_charset(self) -> str:
-        return '(['
-
-    def eval(self, txt: str):
-        # ====================================
-        def has_side_table() -> bool:
-            count = 0 if len(self.queries) < 2 else sum(
-                q.join_type != JoinType.INNER
-                for q in self.queries[-2:]
-            )
-            return count > 0
-        # -----------------------------------
-        for token in self.get_tokens(txt):
-            if not token or (token in '([' and self.method):
-                continue
-            if self.method:
-                self.method(token)
-            if token in ')]' and has_side_table():
-                self.add_foreign_key('')
-            self.method = self.TOKEN_METHODS.get(token.upper())
-        # ====================================
-
-class Neo4JParser(CypherParser):
-    def prepare(self):
-        super().prepare()
-        self.TOKEN_METHODS = {
-            '(': self.new_query,  '{': self.add_where, '[': self.new_query,
-            '<-': self.left_ftable, '->': self.right_ftable,            
-            'WHERE': self.add_where, 'AND': self.add_where, 
-        }
-        self.method = None
-        self.aliases = {}
-
-    def new_query(self, token: str, join_type = JoinType.INNER):
-        alias = ''
-        if ':' in token:
-            alias, token = token.split(':')
-        super().new_query(token, join_type, alias)
-
-    def add_where(self, token: str):
-        super().add_where(token.replace(':', '='))
-
-    def add_foreign_key(self, token: str, pk_field: str='') -> tuple:
-        return super().add_foreign_key('{}_id', 'id')
-
-# ----------------------------
-class MongoParser(Parser):
-    REGEX = {}
-
-    def prepare(self):
-        self.REGEX['separator'] = re.compile(r'([({[\]},)])')
-
-    def new_query(self, token: str):
-        if not token:
-            return
-        *table, function = token.split('.')
-        self.param_type = self.PARAM_BY_FUNCTION.get(function)
-        if not self.param_type:            
-            raise SyntaxError(f'Unknown function {function}')
-        if table and table[0]:
-            self.queries.append( self.class_type(table[-1]) )
-
-    def param_is_where(self) -> bool:
-        return self.param_type == Where or isinstance(self.param_type, Where)
-
-    def next_param(self, token: str):
-        if self.param_type == GroupBy:
-            self.param_type = Field
-        self.get_param(token)
-
-    def get_param(self, token: str):
-        if not ':' in token:
-            return
-        field, value = token.split(':')
-        is_function = field.startswith('$')
-        if not value and not is_function:
-            if self.param_is_where():
-                self.last_field = field
-            return
-        if self.param_is_where():
-            if is_function:
-                function = field
-                field = self.last_field
-                self.last_field = ''
-            else:
-                function = '$eq'
-            if '"' in value:
-                value = value.replace('"', '')
-            elif value and value[0].isnumeric():
-                numeric_type = float if len(value.split('.')) == 2 else int
-                value = numeric_type(value)
-            self.param_type = self.CONDITIONS[function](value)
-            if function == '$or':
-                return
-        elif self.param_type == GroupBy:
-            if field != '_id':
-                return
-            field = re.sub('"|[$]', '', value)
-        elif self.param_type == OrderBy and value == '-1':
-            OrderBy.sort = SortType.DESC
-        elif field.startswith('$'):
-            field = '{}({})'.format(
-                field.replace('$', ''), value
-            )
-        if self.where_list is not None and self.param_is_where():
-            self.where_list[field] = self.param_type
-            return
-        self.param_type.add(field, self.queries[-1])
-
-    def close_brackets(self, token: str):
-        self.brackets[token] -= 1
-        if self.param_is_where() and self.brackets[token] == 0:
-            if self.where_list is not None:
-                Options(**self.where_list).add('OR', self.queries[-1])
-                self.where_list = None
-            if token == '{':
-                self.param_type = Field
-
-    def begin_conditions(self, value: str):
-        self.where_list = {}
-        return Where
-
-    def increment_brackets(self, value: str):
-        self.brackets[value] += 1
-
-    def eval(self, txt: str):
-        self.method = self.new_query
-        self.last_field = ''
-        self.where_list = None
-        self.PARAM_BY_FUNCTION = {
-            'find': Where, 'aggregate': GroupBy, 'sort': OrderBy
-        }
-        BRACKET_PAIR = {'}': '{', ']': '['}
-        self.brackets = {char: 0 for char in BRACKET_PAIR.values()}
-        self.CONDITIONS = {
-            '$in': lambda value: contains(value),
-            '$gt': lambda value: gt(value),
-            '$gte' : lambda value: gte(value),
-            '$lt': lambda value: lt(value),
-            '$lte' : lambda value: lte(value),
-            '$eq': lambda value: eq(value),
-            '$ne': lambda value: Not.eq(value),
-            '$or': self.begin_conditions,
-        }
-        self.TOKEN_METHODS = {
-            '{': self.get_param, ',': self.next_param, ')': self.new_query, 
-        }
-        for token in self.get_tokens(txt):
-            if not token:
-                continue
-            if self.method:
-                self.method(token)
-            if token in self.brackets:
-                self.increment_brackets(token)
-            elif token in BRACKET_PAIR:
-                self.close_brackets(
-                    BRACKET_PAIR[token]
-                )
-            self.method = self.TOKEN_METHODS.get(token)
-# ----------------------------
-
-
 class Select(SQLObject):
+    __slots__ = ('break_lines',)
     join_type: JoinType = JoinType.INNER
     REGEX = {}
     EQUIVALENT_NAMES = {}
@@ -1363,7 +1082,7 @@ class Select(SQLObject):
 
     def aka(self) -> str:
         result = self.table_name
-        return self.EQUIVALENT_NAMES.get(result, result)
+        return Context.registry(Select, 'EQUIVALENT_NAMES').get(result, result)
 
     def add(self, name: str, main: SQLObject):
         old_tables = main.values.get(FROM, [])
@@ -1416,14 +1135,15 @@ class Select(SQLObject):
         return True
 
     def limit(self, row_count: int=100, offset: int=0):
-        if Function.dialect == Dialect.SQL_SERVER:
+        dialect = Context.get(Function, 'dialect')
+        if dialect == Dialect.SQL_SERVER:
             fields = self.values.get(SELECT)
             if fields:
                 fields[0] = f'SELECT TOP({row_count}) {fields[0]}'
             else:
                 self.values[SELECT] = [f'SELECT TOP({row_count}) *']
             return self
-        if Function.dialect == Dialect.ORACLE:
+        if dialect == Dialect.ORACLE:
             Where.gte(row_count).add(SQL_ROW_NUM, self)
             if offset > 0:
                 Where.lte(row_count+offset).add(SQL_ROW_NUM, self)
@@ -1446,11 +1166,14 @@ class Select(SQLObject):
         return re.findall(f'\b*{self.alias}[.]', field) != []
 
     @classmethod
-    def parse(cls, txt: str, parser: Parser = SQLParser) -> list[SQLObject]:
+    def parse(cls, txt: str, parser: 'Parser' = None) -> list[SQLObject]:
+        if parser is None:
+            from sql_blocks.parsers import SQLParser as parser
         return parser(txt, cls).queries
 
     def optimize(self, rules: list[Rule]=None):
         if not rules:
+            from sql_blocks import rules as _  # --- registers the subclasses
             rules = Rule.__subclasses__()
         for rule in rules:
             rule.apply(self)
@@ -1466,8 +1189,56 @@ class Select(SQLObject):
     def translate_to(self, language: QueryLanguage) -> str:
         return language(self).convert()
 
+    def render_to(self, stream, language: QueryLanguage=QueryLanguage):
+        """
+        Writes the text in pieces to any `write()`-able sink (file, socket, StringIO...)
+        """
+        language(self).write(stream)
+        return stream
+
+    def compile(self, language: QueryLanguage=None) -> Template:
+        """
+        Freezes the query -- with `Slot`s in place of the values -- into a Template
+        """
+        if language is None:
+            return Template( str(self) )
+        return Template(self.translate_to(language), language)
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary copy of the query (see sql_blocks.serialization)
+        """
+        from sql_blocks.serialization import dumps
+        return dumps(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Select':
+        from sql_blocks.serialization import loads
+        return loads(data)
+
+    def lint(self, **budget) -> list:
+        """
+        Performance anti-patterns (see sql_blocks.lint):
+            max_joins, max_depth, max_in_values = the budgets
+        """
+        from sql_blocks.lint import Linter
+        return Linter(**budget).check(self)
+
+    def execute(self, pool) -> list:
+        """
+        Runs the query on a `ConnectionPool` (sql_blocks.execution)
+        """
+        return pool.execute(self)
+
+    def stream(self, pool, batch_size: int=100):
+        """
+        Yields the rows fetching `batch_size` at a time
+        """
+        return pool.stream(self, batch_size)
+
 
 class SelectIN(Select):
+    __slots__ = ()
     condition_class = Where
 
     def add(self, name: str, main: SQLObject):
@@ -1477,10 +1248,12 @@ class SelectIN(Select):
 SubSelect = SelectIN
 
 class NotSelectIN(SelectIN):
+    __slots__ = ()
     condition_class = Not
 
 
 class CTE(Select):
+    __slots__ = ('query_list',)
     prefix = ''
 
     def __init__(self, table_name: str, query_list: list[Select]):
@@ -1490,31 +1263,53 @@ class CTE(Select):
         self.query_list = query_list
         self.break_lines = False
 
+    @staticmethod
+    def justify(query: Select):
+        """
+        The lines (up to ~65 characters) of a query of the list
+        """
+        text, words, start = str(query), [], 0
+        keywords = '|'.join(KEYWORD)
+        for found in re.finditer(fr"'(?:[^']|'')*'|({keywords}|AND|OR|,)", text):
+            if found.group(1):  # --- never inside quotes
+                words += [text[start:found.start()], found.group(1)]
+                start = found.end()
+        words.append(text[start:])
+        line = ''
+        for word in words:
+            if len(line) >= 65:
+                yield line
+                line = ''
+            line += word
+        if line:
+            yield line
+
+    def after_queries(self) -> str:
+        return ''
+
     def __str__(self) -> str:
-        # ---------------------------------------------------------
-        def justify(query: Select) -> str:
-            result, line = [], ''
-            keywords = '|'.join(KEYWORD)
-            for word in re.split(fr'({keywords}|AND|OR|,)', str(query)):
-                if len(line) >= 65:
-                    result.append(line)
-                    line = ''
-                line += word
-            if line:
-                result.append(line)
-            return '\n    '.join(result)
-        # ---------------------------------------------------------
-        return 'WITH {}{} AS (\n    {}\n){}'.format(
+        return 'WITH {}{} AS (\n    {}\n){}{}'.format(
             self.prefix, self.table_name, 
             '\nUNION ALL\n    '.join(
-                justify(q) for q in self.query_list
-            ), super().__str__()
+                '\n    '.join(self.justify(q)) for q in self.query_list
+            ), self.after_queries(), super().__str__()
         )
+
+    def render_to(self, stream, language: QueryLanguage=QueryLanguage):
+        stream.write(f'WITH {self.prefix}{self.table_name} AS (\n    ')
+        for i, query in enumerate(self.query_list):
+            if i:
+                stream.write('\nUNION ALL\n    ')
+            for j, line in enumerate( self.justify(query) ):
+                stream.write('\n    ' + line if j else line)
+        stream.write('\n)' + self.after_queries())
+        return super().render_to(stream, language)
     def join(self, pattern: str, fields: list | str, format: str=''):
         if isinstance(fields, str):
             count = len( fields.split(',') )
         else:
             count = len(fields)
+        from sql_blocks.parsers import detect
         queries = detect(
             pattern*count, join_queries=False, format=format
         )
@@ -1522,20 +1317,51 @@ class CTE(Select):
         self.break_lines = True
         return self
 
+CYCLE, OPTION = 'CYCLE', 'OPTION'   # --- kept in `values` of a Recursive (see `cycle`)
+TEXT_TYPE = {
+    Dialect.SQL_SERVER: 'VARCHAR(MAX)', Dialect.ORACLE: 'VARCHAR2(4000)',
+    Dialect.MYSQL: 'CHAR(4000)',
+}
+
 class Recursive(CTE):
-    prefix = 'RECURSIVE '
+    __slots__ = ()
 
-    def __str__(self) -> str:
+    @property
+    def prefix(self) -> str:
+        if Context.get(Function, 'dialect') in (Dialect.SQL_SERVER, Dialect.ORACLE):
+            return ''   # --- WITH alone is already recursive there
+        return 'RECURSIVE '
+
+    def link_last_query(self):
         if len(self.query_list) > 1:
-            self.query_list[-1].values[FROM].append(
-                f', {self.table_name} {self.alias}')
-        return super().__str__()
+            tables = self.query_list[-1].values[FROM]
+            link = f', {self.table_name} {self.alias}'
+            if link not in tables:
+                tables.append(link)
+
+    def after_queries(self) -> str:
+        return ''.join(f'\nCYCLE {clause}\n' for clause in self.values.get(CYCLE, []))
+
+    def options(self) -> str:
+        found = self.values.get(OPTION)
+        return '\nOPTION ({})'.format( ', '.join(found) ) if found else ''
+
+    def __str__(self) -> str:
+        self.link_last_query()
+        return super().__str__() + self.options()
+
+    def render_to(self, stream, language: QueryLanguage=QueryLanguage):
+        self.link_last_query()
+        super().render_to(stream, language)
+        stream.write( self.options() )
+        return stream
 
     @classmethod
     def create(cls, name: str, pattern: str, formula: str, init_value, format: str=''):
-        SQLObject.ALIAS_FUNC = None
+        Context.set(SQLObject, 'ALIAS_FUNC', None)
         def get_field(obj: SQLObject, pos: int) -> str:
             return obj.values[SELECT][pos].split('.')[-1]
+        from sql_blocks.parsers import detect
         t1, t2 = detect(
             pattern*2, join_queries=False, format=format
         )
@@ -1560,153 +1386,90 @@ class Recursive(CTE):
                 Field.add(f'({name}{increment}) AS {name}', query)
         return self
 
+    def max_depth(self, limit: int, name: str='depth'):
+        """
+        A `counter` of the levels (from 1) and a condition that stops at `limit`
+        -- on SQL Server, also OPTION (MAXRECURSION ...).
+        """
+        self.counter(name, 1)
+        for query in self.query_list[1:]:
+            query.values.setdefault(WHERE, []).append(f'{self.alias}.{name} < {limit}')
+        if Context.get(Function, 'dialect') == Dialect.SQL_SERVER:
+            self.values[OPTION] = [f'MAXRECURSION {limit}']
+        return self
 
-# ----- Rules -----
-
-class RulePutLimit(Rule):
-    @classmethod
-    def apply(cls, target: Select):
-        need_limit = any(not target.values.get(key) for key in (WHERE, SELECT))
-        if need_limit:
-            target.limit()
-
-
-class RuleSelectIN(Rule):
-    @classmethod
-    def apply(cls, target: Select):
-        for i, condition in enumerate(target.values[WHERE]):
-            tokens = re.split(r'\s+or\s+|\s+OR\s+', re.sub('\n|\t|[()]', ' ', condition))
-            if len(tokens) < 2:
-                continue
-            fields = [t.split('=')[0].split('.')[-1].lower().strip() for t in tokens]
-            if len(set(fields)) == 1:
-                target.values[WHERE][i] = '{} IN ({})'.format(
-                    Field.format(fields[0], target),
-                    ','.join(t.split('=')[-1].strip() for t in tokens)
-                )
-
-
-class RuleAutoField(Rule):
-    @classmethod
-    def apply(cls, target: Select):
-        if target.values.get(GROUP_BY):
-            target.values[SELECT] = target.values[GROUP_BY]
-            target.values[ORDER_BY] = []
-        elif target.values.get(ORDER_BY):
-            s1 = set(target.values.get(SELECT, []))
-            s2 = set(target.values[ORDER_BY])
-            target.values.setdefault(SELECT, []).extend( list(s2-s1) )
+    def cycle(self, *fields: str, path: str='path', mark: str='is_cycle'):
+        """
+        Does not visit again the rows with the same `fields`:
+            PostgreSQL = CYCLE ... SET `mark` USING `path`
+            the others = the visited values in the text field `path`.
+        """
+        dialect = Context.get(Function, 'dialect')
+        if dialect == Dialect.POSTGRESQL:
+            self.values[CYCLE] = ['{} SET {} USING {}'.format(', '.join(fields), mark, path)]
+            self.values.setdefault(WHERE, []).append(f'NOT {self.alias}.{mark}')
+            return self
+        text_type = TEXT_TYPE.get(dialect)
+        def concat(*items) -> str:
+            if dialect == Dialect.MYSQL:
+                return 'CONCAT({})'.format( ', '.join(items) )
+            if dialect == Dialect.SQL_SERVER:
+                items = [
+                    item if item.startswith("'") or item.startswith(f'{self.alias}.')
+                    else f'CAST({item} AS {text_type})' for item in items
+                ]
+                return ' + '.join(items)
+            return ' || '.join(items)
+        def key_of(query: Select) -> list:
+            result = []
+            for field in fields:
+                if result:
+                    result.append("'|'")
+                result.append(f'{query.alias}.{field}')
+            return result
+        for i, query in enumerate(self.query_list):
+            key = key_of(query)
+            if i == 0:
+                expr = concat("','", *key, "','")
+            else:
+                expr = concat(f'{self.alias}.{path}', *key, "','")
+                query.values.setdefault(WHERE, []).append('{}.{} NOT LIKE {}'.format(
+                    self.alias, path, concat("'%,'", *key, "',%'")
+                ))
+            if text_type:
+                expr = f'CAST({expr} AS {text_type})'
+            Field.add(f'{expr} AS {path}', query)
+        return self
 
 
-class RuleLogicalOp(Rule):
-    REVERSE = {">=": "<", "<=": ">", "=": "<>"}
-    REVERSE |= {v: k for k, v in REVERSE.items()}
+# ---- Loaded on the first use: ---------------------------
+LAZY_MODULES = {
+    'sql_blocks.parsers': (
+        'Parser', 'SQLParser', 'CypherParser', 'Neo4JParser', 'MongoParser',
+        'parser_class', 'detect',
+    ),
+    'sql_blocks.translators': ('MongoDBLanguage', 'Neo4JLanguage'),
+    'sql_blocks.rules': (
+        'RulePutLimit', 'RuleSelectIN', 'RuleAutoField', 'RuleLogicalOp',
+        'RuleDateFuncReplace', 'RuleReplaceJoinBySubselect', 'RuleNamedWindow',
+    ),
+}
 
-    @classmethod
-    def apply(cls, target: Select):
-        REGEX = re.compile('({})'.format(
-            '|'.join(cls.REVERSE)
-        ))
-        for i, condition in enumerate(target.values.get(WHERE, [])):
-            expr = re.sub('\n|\t', ' ', condition)
-            if not re.search(r'\b(NOT|not).*[<>=]', expr):
-                continue
-            tokens = [t.strip() for t in re.split(r'NOT\b|not\b|(<|>|=)', expr) if t]
-            op = ''.join(tokens[1: len(tokens)-1])
-            tokens = [tokens[0], cls.REVERSE[op], tokens[-1]]
-            target.values[WHERE][i] = ' '.join(tokens)
 
-
-class RuleDateFuncReplace(Rule):
+def __getattr__(name: str):
     """
-    SQL algorithm by Ralff Matias
+    PEP 562: `sql_blocks.sql_blocks.SQLParser` imports the parsers only now.
     """
-    REGEX = re.compile(r'(YEAR[(]|year[(]|=|[)])')
-
-    @classmethod
-    def apply(cls, target: Select):
-        for i, condition in enumerate(target.values.get(WHERE, [])):
-            tokens = [
-                t.strip() for t in cls.REGEX.split(condition) if t.strip()
-            ]
-            if len(tokens) < 3:
-                continue
-            func, field, *rest, year = tokens
-            temp = Select(f'{target.table_name} {target.alias}')
-            Between(f'{year}-01-01', f'{year}-12-31').add(field, temp)
-            target.values[WHERE][i] = ' AND '.join(temp.values[WHERE])
-
-
-class RuleReplaceJoinBySubselect(Rule):
-    @classmethod
-    def apply(cls, target: Select):
-        main, *others = Select.parse( str(target) )
-        modified = False
-        for query in others:
-            fk_field, primary_k = ForeignKey.find(main, query)
-            more_relations = any([
-                ref[0] == query.table_name for ref in ForeignKey.references
-            ])
-            keep_join = any([
-                len( query.values.get(SELECT, []) ) > 0,
-                len( query.values.get(WHERE, []) ) == 0,
-                not fk_field, more_relations
-            ])
-            if keep_join:
-                query.add(fk_field, main)
-                continue
-            query.__class__ = SubSelect
-            Field.add(primary_k, query)
-            query.add(fk_field, main)
-            modified = True
-        if modified:
-            target.values = main.values.copy()
-
-
-def parser_class(text: str) -> Parser:
-    PARSER_REGEX = [
-        (r'select.*from', SQLParser),
-        (r'[.](find|aggregate)[(]', MongoParser),
-        (r'[(\[]\w*[:]\w+', Neo4JParser),
-        (r'^\w+[@]*\w*[(]', CypherParser)
-    ]
-    text = Parser.remove_spaces(text)
-    for regex, class_type in PARSER_REGEX:
-        if re.findall(regex, text, re.IGNORECASE):
-            return class_type
-    return None
-
-
-def detect(text: str, join_queries: bool = True, format: str='') -> Select | list[Select]:
-    from collections import Counter
-    parser = parser_class(text)
-    if not parser:
-        raise SyntaxError('Unknown parser class')
-    if parser == CypherParser:
-        for table, count in Counter( re.findall(r'(\w+)[(]', text) ).most_common():
-            if count < 2:
-                continue
-            pos = [ f.span() for f in re.finditer(fr'({table})[(]', text) ]
-            for begin, end in pos[::-1]:
-                new_name = f'{table}_{count}'  # See set_table (line 55)
-                Select.EQUIVALENT_NAMES[new_name] = table
-                text = text[:begin] + new_name + '(' + text[end:]
-                count -= 1
-    query_list = Select.parse(text, parser)
-    if format:
-        for query in query_list:
-            query.set_file_format(format)
-    if not join_queries:
-        return query_list
-    result = query_list[0]
-    for query in query_list[1:]:
-        result += query
-    return result
-
-
-if __name__ == "__main__":
-    CAMPO_MEDIA = 'MEDIA_SALARIAL_DEPTO'
-    employees = detect(
-        f'Employees@department_id(avg$salary:{CAMPO_MEDIA})'
-    )
-    print(employees)
+    for module, names in LAZY_MODULES.items():
+        if name in names:
+            from importlib import import_module
+            return getattr(import_module(module), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+CORE_NAMES = [name for name in globals() if not name.startswith('_')]
+# --- `import *` resolves only the lazy names that the single module had:
+__all__ = CORE_NAMES + [
+    name for names in LAZY_MODULES.values() for name in names
+    if name != 'RuleNamedWindow'
+]
@@ -0,0 +1,355 @@
+"""
+Translation of a Select to the other query languages
+(loaded on the first use of MongoDBLanguage / Neo4JLanguage).
+"""
+import re
+import json
+from sql_blocks.sql_blocks import (
+    FROM, GROUP_BY, KEYWORD, LIMIT, ORDER_BY, SELECT, WHERE, Context,
+    QueryLanguage, SortType, SQLObject
+)
+
+
+class MongoDBLanguage(QueryLanguage):
+    pattern = '{_from}.{function}({where}{select}){order_by}{limit}'
+    has_default = {key: False for key in KEYWORD}
+    LOGICAL_OP_TO_MONGO_FUNC = {
+        '>': '$gt',  '>=': '$gte',
+        '<': '$lt',  '<=': '$lte',
+        '=': '$eq',  '<>': '$ne',
+    }
+    OPERATORS = '|'.join(op for op in LOGICAL_OP_TO_MONGO_FUNC)
+    REGEX = {
+        'options': re.compile(r'\s+or\s+|\s+OR\s+'),
+        'condition': re.compile(fr'({OPERATORS})'),
+        'accumulator': re.compile(r'^(avg|min|max|sum|count)\s*[(](.*)[)]$', re.IGNORECASE),
+        'alias': re.compile(r'\s+as\s+', re.IGNORECASE),
+        'having': re.compile(r'\s+HAVING\s+', re.IGNORECASE),
+        'inside': re.compile(r'^(NOT\s+)?(\S+)\s+(NOT\s+)?IN\s*[(](.*)[)]$', re.IGNORECASE | re.DOTALL),
+        'null': re.compile(r'^(NOT\s+)?(\S+)\s+IS\s+(NOT\s+)?NULL$', re.IGNORECASE),
+    }
+
+    def join_with_tabs(self, values: list, sep: str=',') -> str:
+        def format_field(fld):
+            return '{indent}{fld}'.format(
+                fld=self.remove_alias(fld),
+                indent=self.TABULATION
+            )
+        return '{begin}{content}{line_break}{end}'.format(
+            begin='{',
+            content= sep.join(
+                format_field(fld) for fld in values if fld
+            ),
+            end='}', line_break=self.LINE_BREAK,
+        )
+
+    def add_field(self, values: list) -> str:
+        return ',{content}'.format(
+            content=self.join_with_tabs([f'{fld}: 1' for fld in values]),
+        )
+
+    def get_tables(self, values: list) -> str:
+        return values[0].split()[0].lower()
+
+    @classmethod
+    def mongo_condition(cls, condition: str) -> tuple:
+        """
+        p.age >= 18          ==> ('age', '$gte', '18')
+        NOT p.dept IN (...)  ==> ('dept', '$nin', '[...]')
+        p.boss IS NULL       ==> ('boss', '$eq', 'null')
+        """
+        condition = cls.remove_alias(condition).strip()
+        found = cls.REGEX['inside'].match(condition)
+        if found:
+            negated, field, inner_not, values = found.groups()
+            op = '$nin' if bool(negated) != bool(inner_not) else '$in'
+            return field, op, f'[{values}]'
+        found = cls.REGEX['null'].match(condition)
+        if found:
+            negated, field, inner_not = found.groups()
+            return field, '$ne' if bool(negated) != bool(inner_not) else '$eq', 'null'
+        tokens = cls.REGEX['condition'].split(condition)
+        tokens = [t.strip() for t in tokens if t]
+        field, *op, const = tokens
+        return field, cls.LOGICAL_OP_TO_MONGO_FUNC[''.join(op)], const
+
+    @classmethod
+    def mongo_where_list(cls, values: list) -> list:
+        """
+        The operators of the same field go to one document
+        -- {age:{$gte:18,$lt:65}}: MongoDB keeps only the last of a repeated key.
+        """
+        OR_REGEX = cls.REGEX['options']
+        where_list, operators = [], {}
+        for condition in values:
+            if OR_REGEX.findall(condition):
+                condition = re.sub(r'^\s*[(]|[)]\s*$', '', condition.strip())
+                expr = '{begin}$or: [{content}]{end}'.format(
+                    content=','.join(
+                        cls.mongo_where_list( OR_REGEX.split(condition) )
+                    ), begin='{', end='}',
+                )
+                where_list.append(expr)
+                continue
+            field, op, const = cls.mongo_condition(condition)
+            if field not in operators:
+                operators[field] = []
+                where_list.append(field)
+            operators[field].append(f'{op}:{const}')
+        return [
+            '%s:{%s}' % (item, ','.join(operators[item]))
+            if item in operators else item
+            for item in where_list
+        ]
+    
+    def extract_conditions(self, values: list) -> str:
+        return self.join_with_tabs(
+            self.mongo_where_list(values)
+        )
+
+    def sort_items(self, values: list) -> list:
+        def sort_key(fld: str) -> str:
+            fld = self.remove_alias(fld.split()[0])
+            found = self.REGEX['accumulator'].match(fld)
+            if found:   # --- Sum(amount) ==> the name in $group
+                return self.accumulator_name(*found.groups())
+            return fld
+        return [
+            '{}:{}'.format(
+                sort_key(fld),
+                -1 if fld.upper().endswith(SortType.DESC.value) else 1
+            ) for fld in values
+        ]
+
+    def sort_by(self, values: list) -> str:
+        return '.sort({})'.format(
+            self.join_with_tabs( self.sort_items(values) )
+        )
+
+    def set_limit(self, values: list) -> str:
+        count, offset = self.limit_values(values)
+        return '{}.limit({})'.format(
+            f'.skip({offset})' if offset else '', count
+        )
+
+    @staticmethod
+    def literal(value) -> str:
+        return json.dumps(value)
+
+    def __init__(self, target: 'Select'):
+        super().__init__(target)
+        self.result['function'] = 'find'
+        self.KEYWORDS = [SELECT, FROM, WHERE, ORDER_BY, LIMIT]
+
+    def prefix(self, key: str):
+        return ''
+
+    # ---- Aggregation pipeline: -------------
+    def is_aggregate(self) -> bool:
+        ACCUMULATOR_REGEX = self.REGEX['accumulator']
+        return GROUP_BY in self.target.values or any(
+            ACCUMULATOR_REGEX.match( self.split_alias(fld)[0] )
+            for fld in self.target.values.get(SELECT, [])
+        )
+
+    @staticmethod
+    def compact(values: list) -> str:
+        return '{%s}' % ', '.join(values)
+
+    def split_alias(self, fld: str) -> tuple:
+        expr, *alias = self.REGEX['alias'].split(fld)
+        return self.remove_alias(expr).strip(), ''.join(alias).strip()
+
+    @staticmethod
+    def accumulator_name(func: str, arg: str) -> str:
+        if func.lower() in ('sum', 'count') and arg in ('', '*', '1'):
+            return 'count'
+        return re.sub(r'\W+', '_', f'{func}_{arg}').strip('_').lower()
+
+    @staticmethod
+    def accumulator(func: str, arg: str) -> str:
+        func = func.lower()
+        if arg in ('', '*') or (func == 'count' and arg == '1'):
+            return '{$sum:1}'
+        if func == 'count':  # --- Count(field) skips the NULLs
+            return f'{{$sum:{{$cond:[{{$ne:["${arg}",null]}},1,0]}}}}'
+        if re.match(r'^-?\d+([.]\d+)?$', arg):
+            return f'{{${func}:{arg}}}'
+        return f'{{${func}:"${arg}"}}'
+
+    def group_stages(self) -> list:
+        """
+        $group with the accumulators of SELECT,
+        $match for HAVING and $project with the fields of SELECT.
+        """
+        groups, having = [], []
+        for text in self.target.values.get(GROUP_BY, []):
+            text, *conditions = self.REGEX['having'].split(text)
+            groups.append( self.remove_alias(text).strip() )
+            having += conditions
+        if len(groups) == 1:
+            group_id = '"${}"'.format(groups[0])
+            key_of = lambda fld: '"$_id"'
+        elif groups:
+            group_id = self.compact([f'{fld}:"${fld}"' for fld in groups])
+            key_of = lambda fld: f'"$_id.{fld}"'
+        else:
+            group_id = 'null'
+        accumulators, projection = {}, ['_id:0']
+        for fld in self.target.values.get(SELECT, []):
+            expr, name = self.split_alias(fld)
+            found = self.REGEX['accumulator'].match(expr)
+            if found:
+                name = name or self.accumulator_name(*found.groups())
+                accumulators[name] = self.accumulator(*found.groups())
+                projection.append(f'{name}:1')
+            elif expr in groups:
+                projection.append('{}:{}'.format(name or expr, key_of(expr)))
+            else:
+                accumulators[name or expr] = f'{{$first:"${expr}"}}'
+                projection.append(f'{name or expr}:1')
+        conditions = []
+        for condition in having:
+            tokens = self.REGEX['condition'].split(condition, maxsplit=1)
+            found = self.REGEX['accumulator'].match( self.remove_alias(tokens[0]).strip() )
+            if not found:
+                continue
+            expr = self.accumulator(*found.groups())
+            name = next(
+                (key for key, value in accumulators.items() if value == expr),
+                self.accumulator_name(*found.groups())
+            )
+            accumulators[name] = expr
+            conditions.append( name + ''.join(tokens[1:]) )
+        stages = [
+            '{$group: %s}' % self.compact(
+                [f'_id:{group_id}'] + [f'{key}:{value}' for key, value in accumulators.items()]
+            )
+        ]
+        if conditions:
+            stages.append( '{$match: %s}' % self.compact(self.mongo_where_list(conditions)) )
+        stages.append( '{$project: %s}' % self.compact(projection) )
+        return stages
+
+    def pieces(self):
+        if not self.is_aggregate():
+            yield from super().pieces()
+            return
+        values = self.target.values
+        stages = []
+        if values.get(WHERE):
+            stages.append( '{$match: %s}' % self.compact(self.mongo_where_list(values[WHERE])) )
+        stages += self.group_stages()
+        if values.get(ORDER_BY):
+            stages.append( '{$sort: %s}' % self.compact(self.sort_items(values[ORDER_BY])) )
+        if values.get(LIMIT):
+            count, offset = self.limit_values(values[LIMIT])
+            if offset:
+                stages.append(f'{{$skip: {offset}}}')
+            stages.append(f'{{$limit: {count}}}')
+        yield self.get_tables( values.get(FROM, [self.target.table_name]) )
+        yield '.aggregate(['
+        for i, stage in enumerate(stages):
+            yield (',' if i else '') + self.TABULATION
+            yield stage
+        yield self.LINE_BREAK + '])'
+
+
+class Neo4JLanguage(QueryLanguage):
+    pattern = 'MATCH {_from}{where}RETURN {select}{order_by}{limit}'
+    has_default = {WHERE: False, FROM: False, ORDER_BY: False, SELECT: True, LIMIT: False}
+    paramstyle = 'cypher'
+    EQUALITY_REGEX = re.compile(
+        r"""^\s*(\w+)[.](\w+)\s*=\s*('(?:[^']|'')*'|"[^"]*"|-?\d+(?:[.]\d+)?|[$]\w+)\s*$"""
+    )
+
+    def add_field(self, values: list) -> str:
+        if values:
+            return self.join_with_tabs(values, ',')
+        return self.TABULATION + ','.join(self.aliases.keys())
+
+    def get_tables(self, values: list) -> str:
+        NODE_FORMAT = dict(
+            left='({}:{}{})<-',
+            core='[{}:{}{}]',
+            right='->({}:{}{})'
+        )
+        if len(values) == 1:  # --- a single node
+            NODE_FORMAT['core'] = '({}:{}{})'
+        nodes = {k: '' for k in NODE_FORMAT}
+        for txt in values:
+            found = re.search(
+                r'^(left|right|inner)?\s*JOIN\s+', txt, re.IGNORECASE
+            )
+            pos, end = 'core', 0
+            if found:
+                start, end = found.span()
+                pos = (found.group(1) or 'inner').lower()
+                if pos == 'inner':
+                    pos = 'right' if nodes['left'] else 'left'
+            txt = re.split(r'\s+ON\s+', txt[end:])[0].strip()
+            table_name, *alias = txt.split()
+            if alias:
+                alias = alias[0]
+            else:
+                alias = Context.get(SQLObject, 'ALIAS_FUNC')(table_name)
+            condition = self.aliases.get(alias, '')
+            if not condition:
+                self.aliases[alias] = ''
+            nodes[pos] = NODE_FORMAT[pos].format(alias, table_name, condition)
+        return self.TABULATION + '{left}{core}{right}'.format(**nodes)
+        
+
+    def extract_conditions(self, values: list) -> str:
+        """
+        Equalities go to the node patterns -- (t:Teacher{name: "Joey", age: 30}) --
+        and the other conditions stay in WHERE.
+        """
+        equalities = {}
+        where_list = []
+        for condition in values:
+            found = self.EQUALITY_REGEX.match(condition)
+            if not found:
+                where_list.append(condition)
+                continue
+            alias, field, const = found.groups()
+            equalities.setdefault(alias, []).append(f'{field}: {const}')
+        self.aliases.update({
+            alias: '{' + ', '.join(items) + '}'
+            for alias, items in equalities.items()
+        })
+        if not where_list:
+            self.has_default[WHERE] = True
+            return self.LINE_BREAK
+        return self.join_with_tabs(where_list, ' AND ') + self.LINE_BREAK
+
+    def sort_by(self, values: list) -> str:
+        return self.join_with_tabs(values, ',')
+
+    def set_limit(self, values: list) -> str:
+        count, offset = self.limit_values(values)
+        return '{}LIMIT {}'.format(
+            f'SKIP {offset} ' if offset else '', count
+        )
+
+    def set_group(self, values: list) -> str:
+        return ''
+
+    literal = MongoDBLanguage.literal
+
+    def __init__(self, target: 'Select'):
+        super().__init__(target)
+        self.aliases = {}
+        self.has_default = dict(self.has_default)
+        self.KEYWORDS = [WHERE, FROM, ORDER_BY, SELECT, LIMIT]
+
+    def prefix(self, key: str):
+        default_prefix = any([
+            (key == WHERE and not self.has_default[WHERE]),
+            key == ORDER_BY
+        ])
+        if default_prefix:
+            return super().prefix(key)
+        if key == LIMIT:
+            return self.LINE_BREAK
+        return ''
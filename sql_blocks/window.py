@@ -0,0 +1,170 @@
+"""
+Window functions for the LocalEngine:
+
+    The rows are sorted once for each distinct (PARTITION BY, ORDER BY)
+    and the ROWS frames are computed with prefix sums (Sum, Avg, Count)
+    or sliding windows (Min, Max), instead of re-reading each frame.
+"""
+from collections import deque
+from sql_blocks.engine import null_first
+
+
+WINDOW_FUNCTIONS = (
+    'ROW_NUMBER', 'RANK', 'LAG', 'LEAD',
+    'SUM', 'AVG', 'COUNT', 'MIN', 'MAX',
+)
+
+
+class WindowFunction:
+    """
+    name(args) OVER(PARTITION BY `partition` ORDER BY `order` ROWS `frame`)
+        order = [(func, descending)...]
+        frame = (start, end) -- offsets from the current row (None = UNBOUNDED)
+        spec = tokens of PARTITION BY + ORDER BY (shared sort)
+        key = where the result is stored in the row
+    """
+    def __init__(self, name: str, args: list, partition: list, order: list, frame: tuple, spec: tuple, key: str):
+        self.name = name
+        self.args = args
+        self.partition = partition
+        self.order = order
+        self.frame = frame
+        self.spec = spec
+        self.key = key
+
+    # ---- Sort (one per spec): --------
+    def partitions(self, rows: list):
+        """
+        Yields the rows of each partition, in ORDER BY sequence,
+        and the order keys of them.
+        """
+        records = [
+            (
+                tuple(func(row) for func in self.partition),
+                tuple(func(row) for func, _ in self.order),
+                row
+            ) for row in rows
+        ]
+        for i, (_, descending) in reversed( list(enumerate(self.order)) ):
+            records.sort(key=lambda rec: null_first(rec[1][i]), reverse=descending)
+        records.sort(key=lambda rec: tuple(null_first(value) for value in rec[0]))
+        start = 0
+        for end in range(1, len(records)+1):
+            if end == len(records) or records[end][0] != records[start][0]:
+                part = records[start:end]
+                yield [row for _, _, row in part], [order for _, order, _ in part]
+                start = end
+
+    @staticmethod
+    def peers(order_keys: list) -> tuple:
+        """
+        The first and the last position of the rows
+        with the same ORDER BY values of each row.
+        """
+        size = len(order_keys)
+        first, last = [0] * size, [size-1] * size
+        for i in range(1, size):
+            first[i] = first[i-1] if order_keys[i] == order_keys[i-1] else i
+        for i in range(size-2, -1, -1):
+            last[i] = last[i+1] if order_keys[i] == order_keys[i+1] else i
+        return first, last
+
+    # ---- Evaluation: -----------------
+    def bounds(self, size: int, last_peer: list) -> list:
+        """
+        [(first, last)...] positions of the frame of each row
+        (without a frame: up to the last peer, when there is ORDER BY).
+        """
+        if self.frame is None:
+            if self.order:
+                return [(0, end) for end in last_peer]
+            return [(0, size-1)] * size
+        start, end = self.frame
+        return [
+            (
+                0 if start is None else max(0, i+start),
+                size-1 if end is None else min(size-1, i+end)
+            ) for i in range(size)
+        ]
+
+    def compute(self, rows: list, order_keys: list) -> list:
+        size = len(rows)
+        if self.name in ('LAG', 'LEAD'):
+            return self.shift(rows)
+        first_peer, last_peer = self.peers(order_keys)
+        if self.name == 'ROW_NUMBER':
+            return list( range(1, size+1) )
+        if self.name == 'RANK':
+            return [pos+1 for pos in first_peer]
+        bounds = self.bounds(size, last_peer)
+        if not self.args:    # --- COUNT(*)
+            return [max(end-start+1, 0) for start, end in bounds]
+        values = [self.args[0](row) for row in rows]
+        if self.name in ('MIN', 'MAX'):
+            return self.sliding(values, bounds)
+        return self.prefix_sums(values, bounds)
+
+    def shift(self, rows: list) -> list:
+        offset, default = 1, None
+        arg = self.args[0]
+        result = []
+        for i, row in enumerate(rows):
+            if len(self.args) > 1:
+                offset = self.args[1](row)
+            if len(self.args) > 2:
+                default = self.args[2](row)
+            pos = i - offset if self.name == 'LAG' else i + offset
+            result.append( arg(rows[pos]) if 0 <= pos < len(rows) else default )
+        return result
+
+    def prefix_sums(self, values: list, bounds: list) -> list:
+        totals, counts = [0], [0]
+        for value in values:
+            counts.append( counts[-1] + (value is not None) )
+            if self.name != 'COUNT':
+                totals.append( totals[-1] if value is None else totals[-1] + value )
+        result = []
+        for start, end in bounds:
+            count = counts[end+1] - counts[start] if end >= start else 0
+            if self.name == 'COUNT':
+                result.append(count)
+            elif not count:
+                result.append(None)
+            else:
+                total = totals[end+1] - totals[start]
+                result.append(total / count if self.name == 'AVG' else total)
+        return result
+
+    def sliding(self, values: list, bounds: list) -> list:
+        """
+        Monotonic queue: both ends of the frames only move forward.
+        """
+        better = (lambda a, b: a <= b) if self.name == 'MIN' else (lambda a, b: a >= b)
+        queue, result, added = deque(), [], 0
+        for start, end in bounds:
+            while added <= end:
+                value = values[added]
+                if value is not None:
+                    while queue and better(value, values[queue[-1]]):
+                        queue.pop()
+                    queue.append(added)
+                added += 1
+            while queue and queue[0] < start:
+                queue.popleft()
+            result.append(values[queue[0]] if queue and start <= end else None)
+        return result
+
+
+def evaluate(functions: list, rows: list) -> list:
+    """
+    Stores the result of each window function in the rows.
+    """
+    by_spec = {}
+    for func in functions:
+        by_spec.setdefault(func.spec, []).append(func)
+    for group in by_spec.values():
+        for part, order_keys in group[0].partitions(rows):
+            for func in group:
+                for row, value in zip(part, func.compute(part, order_keys)):
+                    row[func.key] = value
+    return rows
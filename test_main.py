@@ -1,3 +1,5 @@
+import pytest
+from importlib.util import find_spec
 from tests.basic import (
     best_movies, single_text_to_objects,
     detached_objects, many_texts_to_objects,
@@ -13,7 +15,8 @@ from tests.rules import (
     optimized_limit,
     optimized_date_func,
     all_optimizations, 
-    replace_join_by_subselect
+    replace_join_by_subselect,
+    named_windows, named_windows_by_default, parsed_named_windows
 )
 from tests.special_cases import (
     error_inverted_condition, named_fields_in_nested_query,
@@ -23,7 +26,11 @@ from tests.special_cases import (
     mongo_query, query_for_mongo, mongo_group, group_for_mongo,
     neo4j_queries, query_for_neo4J, neo4j_joined_query,
     script_from_neo4j_query, script_mongo_from,
+    mongo_pipeline, query_for_mongo_pipeline,
+    query_for_mongo_count, mongo_count_all,
+    mongo_range_round_trip, mongo_in_null_round_trip,
     neo4j_with_WHERE, query_for_WHERE_neo4j, 
+    neo4j_with_params, neo4j_params_round_trip,
     group_cypher, cypher_group, detected_parser_classes,
     compare_join_condition, tables_without_JOIN
 )
@@ -33,10 +40,67 @@ from tests.functions import (
 )
 from tests.cte import(
     basic_recursive_cte, compare_basic_recursive,
-    create_flight_routes, compare_created_routes
+    create_flight_routes, compare_created_routes,
+    guarded_texts, guarded_routes_on_sqlite_and_engine, guarded_round_trip
+)
+from tests.context import dialects_in_threads, context_registries, nested_contexts
+from tests.execution import (
+    parameterized_text, executed_products,
+    streamed_batches, exhausted_pool, PRODUCTS
+)
+from tests.batching import (
+    point_lookups, union_of_ranges, async_lookups, windowed_lookups
+)
+from tests.rendering import rendered_and_converted, large_union
+from tests.literals import (
+    plain_sequences, numpy_arrays, case_with_values, options_with_values
+)
+from tests.benchmark import (
+    loaded_modules, lazy_names_of_package,
+    slotted_objects, shared_identifiers
+)
+from tests.serialization import (
+    round_trips, restored_state, restored_links, sizes, corrupted_data
+)
+from tests.parse_cache import (
+    restarted_worker, entries_after_upgrade, rendered_texts, concurrent_workers,
+    parsed_in_contexts
+)
+from tests.detection import long_scripts, beyond_the_prefix, renamed_tables
+from tests.tokenizer import (
+    cypher_tokens, neo4j_tokens, multi_hop_queries, shared_tables
+)
+from tests.mongo import (
+    mongo_queries, mongo_tokens, mongo_conditions, big_in_list, mongo_errors,
+    sorted_by_accumulator
+)
+from tests.lint import (
+    issue_codes, lint_text, comma_joins, filter_issues,
+    nested_subqueries, recursive_issues, run_cli
+)
+from tests.templates import (
+    rendered_and_expected, repeated_slot, quoted_slot_value, missing_slot,
+    slot_in_pattern, slot_as_pattern
+)
+from tests.cache import (
+    repeated_queries, invalidated_by_table, invalidated_by_file, evictions
+)
+from tests.engine import (
+    cheapest_from_JFK, flights_with_airport_names,
+    flights_from_airports_with, columnar_scans, cold_and_warm_columnar,
+    filtered_groups_on_engine_and_sqlite,
+    streamed_flights, unsupported_function,
+    flight_engine, ancestors_by_generation,
+    joins_on_engine_and_sqlite, bloom_false_negatives,
+    grouped_on_engine_and_sqlite, windows_on_engine_and_sqlite,
+    null_keys_on_engine_and_sqlite, closure_on_engine_and_sqlite,
+    shared_window_sorts
 )
 
 
+requires_numpy = pytest.mark.skipif(
+    not find_spec('numpy'), reason='requires numpy'
+)
 _best_movies = best_movies()
 query = {}
 expected_result = query_reference()
@@ -89,6 +153,22 @@ def test_rule_date_func_replace():
 def test_all_optimizations():
     assert all_optimizations()
 
+def test_named_window_rule():
+    text = named_windows()
+    assert 'Sum(e.salary) OVER (w1 ROWS BETWEEN 2 PRECEDING AND CURRENT ROW) as moving' in text
+    assert 'Avg(e.salary) OVER w1 as running' in text
+    assert 'Max(e.salary) OVER( PARTITION BY region ) as highest' in text
+    assert text.endswith('WHERE e.age > 18 WINDOW w1 AS (PARTITION BY dept ORDER BY hired)')
+    assert named_windows(times=2) == text
+    assert 'WINDOW' not in named_windows('SQL_SERVER')
+    assert named_windows_by_default()
+
+def test_parse_named_windows():
+    original, parsed, filtered = parsed_named_windows()
+    assert parsed == original
+    assert 'ORDER BY' not in parsed.split('WINDOW')[-1].split(')')[-1]
+    assert "e.active = 1 WINDOW w1 AS (PARTITION BY dept ORDER BY hired)" in filtered
+
 def test_expression_field():
     assert is_expected_expression(
         select_expression_field(False), EXPR_ARR1
@@ -171,11 +251,64 @@ def test_mongo_group_rtrip():
     )
     assert q1 == q2
 
+def test_mongo_pipeline():
+    script = mongo_pipeline()
+    STAGES = ['$match', '$group', '$project', '$sort', '$skip', '$limit']
+    positions = [script.index('{' + stage) for stage in STAGES]
+    assert positions == sorted(positions)
+    assert 'avg_age:{$avg:"$age"}' in script
+
+def test_mongo_pipeline_round_trip():
+    q1 = query_for_mongo_pipeline()
+    q2 = mongo_query( script_mongo_from(q1) )
+    assert q1 == q2
+
+def test_mongo_count_field():
+    script = script_mongo_from( query_for_mongo_count() )
+    assert 'count_id:{$sum:{$cond:[{$ne:["$id",null]},1,0]}}' in script
+    assert 'count:{$sum:1}' in mongo_count_all()
+
+@pytest.mark.parametrize('select', [True, False])
+def test_mongo_having_round_trip(select):
+    q1 = query_for_mongo_count(select)
+    q2 = mongo_query( script_mongo_from(q1) )
+    assert q1 == q2
+    assert len(q2.values['SELECT']) == len(q1.values['SELECT'])
+
+def test_mongo_same_field_bounds():
+    script, q1, q2 = mongo_range_round_trip()
+    assert 'age:{$gte:18,$lt:65}' in script
+    assert q1 == q2
+
+def test_mongo_in_and_null_round_trip():
+    script, q1, q2 = mongo_in_null_round_trip()
+    assert "dept:{$in:['IT','HR']}" in script
+    assert 'boss:{$eq:null}' in script and 'tag:{$ne:null}' in script
+    assert q1 == q2
+
+def test_mongo_find_limit():
+    script = script_mongo_from( query_for_mongo().limit(5, 10) )
+    assert script.endswith('.skip(10).limit(5)')
+
 def test_neo4J_with_WHERE():
     q1 = neo4j_with_WHERE()
     q2 = query_for_WHERE_neo4j()
     assert q1 == q2
 
+def test_neo4J_params():
+    script, params = neo4j_with_params()
+    assert all([
+        '(p:Person{name: $p1, city: $p3})' in script,
+        'WHERE\n\tp.age > $p2' in script,
+        'ORDER BY\n\tp.name,\n\tp.age' in script,
+        script.endswith('SKIP 20 LIMIT 10'),
+        params == {'p1': 'Ann', 'p2': 18, 'p3': 'Rio'},
+    ])
+
+def test_neo4J_round_trip_with_params():
+    q1, q2 = neo4j_params_round_trip()
+    assert q1 == q2
+
 def test_group_cypher():
     q1 = group_cypher()
     print('-*/-*/-*/-*/-*/-*/-*/-*/-*/-*/')
@@ -241,3 +374,455 @@ def test_create_recursive():
 def test_create_joined_recursive():
     r = create_flight_routes(True)
     assert compare_created_routes(r, True)
+
+def test_context_dialects_in_threads():
+    expected = {
+        "ANSI": "Current_Date() - due_date",
+        "SQL_SERVER": "DateDiff(getDate(), due_date)",
+        "ORACLE": "SYSDATE - due_date",
+        "POSTGRESQL": "Current_date - due_date",
+        "MYSQL": "Current_Date() - due_date"
+    }
+    assert dialects_in_threads() == expected
+
+def test_nested_contexts():
+    date, sort, names, dialect = nested_contexts()
+    assert date == 'SYSDATE'
+    assert sort.name == 'DESC'
+    assert names.get('Airport_1') == 'Airport'
+    assert dialect.name == 'ORACLE'
+
+def test_context_registries():
+    inside, unchanged = context_registries()
+    assert inside == {'Airport_1': 'Airport', 'Airport_2': 'Airport'}
+    assert unchanged
+
+def test_parameterize():
+    sql, params = parameterized_text()
+    assert "'" not in sql and ':p3' in sql
+    assert params == {'p1': 'Gizmo', 'p2': 10, 'p3': 20}
+
+def test_execute_on_pool():
+    assert sorted(executed_products()) == [
+        ('Doohickey',), ('Gizmo',), ("Widget's",)
+    ]
+
+def test_stream_and_statement_cache():
+    names, hits = streamed_batches()
+    assert sorted(names) == sorted(p[0] for p in PRODUCTS)
+    assert hits == 2
+
+def test_pool_is_bounded():
+    assert exhausted_pool()
+
+def test_local_engine_filter_and_sort():
+    assert cheapest_from_JFK() == [('ORD', 200)]
+
+def test_local_engine_joins():
+    inner = {
+        ('LAX', 'Los Angeles'), ('ORD', "O'Hare"),
+        ('SFO', 'San Francisco, CA'), ('JFK', 'Kennedy')
+    }
+    assert flights_with_airport_names('INNER') == inner
+    assert flights_with_airport_names('LEFT') == inner | {
+        ('MIA', None), ('SEA', None)
+    }
+
+def test_local_engine_subquery():
+    assert sorted(flights_from_airports_with('Hare')) == [('MIA',)]
+
+def test_local_engine_stream():
+    streamed, executed = streamed_flights(batch_size=2)
+    assert streamed == executed and len(streamed) == 5
+    with pytest.raises(ValueError):
+        streamed_flights(batch_size=0)
+
+def test_local_engine_unsupported_function():
+    with pytest.raises(ValueError):
+        unsupported_function()
+
+@requires_numpy
+def test_columnar_cache():
+    csv_rows, first, second = columnar_scans()
+    assert first == csv_rows
+    assert second == csv_rows + [('BOS', 420)]
+
+@requires_numpy
+def test_columnar_keeps_types():
+    csv_rows, cold, warm = cold_and_warm_columnar()
+    assert cold == csv_rows
+    assert warm == csv_rows
+
+def test_local_recursive_routes():
+    assert sorted( flight_engine().execute(create_flight_routes()) ) == [
+        ('JFK', 'LAX'), ('JFK', 'ORD'), ('MIA', 'JFK'), ('ORD', 'MIA')
+    ]
+
+def test_local_recursive_with_counter():
+    assert ancestors_by_generation() == [
+        (3, 'Ana'), (3, 'Jose'), (4, 'Antonio'), (4, 'Maria'), (5, 'Julio')
+    ]
+
+def test_local_recursive_limits():
+    with pytest.raises(RecursionError):
+        ancestors_by_generation(max_iterations=1)
+    with pytest.raises(RecursionError):
+        ancestors_by_generation(max_rows=3)
+
+@pytest.mark.parametrize('join_type', ['INNER', 'LEFT', 'RIGHT', 'FULL'])
+@pytest.mark.parametrize('extra_airports', [0, 50])
+def test_hash_join_like_sqlite(join_type, extra_airports):
+    local, sqlite = joins_on_engine_and_sqlite(join_type, extra_airports)
+    assert local == sqlite
+
+def test_bloom_filter():
+    assert bloom_false_negatives(5000) == 0
+
+@requires_numpy
+@pytest.mark.parametrize('columnar', [False, True])
+def test_group_by_like_sqlite(columnar):
+    for local, sqlite in grouped_on_engine_and_sqlite(columnar):
+        assert local == sqlite
+
+@requires_numpy
+def test_filtered_group_by_vectorized():
+    *filtered, by_function = filtered_groups_on_engine_and_sqlite()
+    for vectorized, local, sqlite in filtered:
+        assert vectorized
+        assert local == sqlite
+    vectorized, local, sqlite = by_function
+    assert not vectorized
+    assert local == sqlite
+
+def test_recursive_closure_like_sqlite():
+    local, sqlite = closure_on_engine_and_sqlite()
+    assert local == sqlite
+    assert len(local) == 12
+
+def test_recursive_null_keys_like_sqlite():
+    local, sqlite = null_keys_on_engine_and_sqlite()
+    assert local == sqlite == [(1, None), (2, 1)]
+
+def test_window_functions_like_sqlite():
+    for local, sqlite in windows_on_engine_and_sqlite():
+        assert local == sqlite
+
+def test_named_windows_like_sqlite():
+    inline = windows_on_engine_and_sqlite()
+    named = windows_on_engine_and_sqlite(named=True)
+    assert named == inline
+    for local, sqlite in named:
+        assert local == sqlite
+
+def test_named_windows_share_sorts():
+    assert shared_window_sorts() == (3, 3)
+
+def test_result_cache_hits():
+    assert repeated_queries() == (True, 1, 2)
+
+@pytest.mark.parametrize('table', ['Airport', 'Airport.csv', 'airport'])
+def test_result_cache_invalidation_by_table(table):
+    assert invalidated_by_table(table) == (2, 1)
+
+def test_result_cache_invalidation():
+    before, after, hits, invalidations = invalidated_by_file()
+    assert (before, after) == ([('SEA',)], [('SEA',), ('ANC',)])
+    assert (hits, invalidations) == (1, 1)
+
+def test_result_cache_evictions():
+    assert evictions(max_size=2, ttl=60, elapsed=10) == (2, 1, 1)
+    assert evictions(max_size=10, ttl=60, elapsed=61) == (3, 0, 1)
+
+
+@pytest.mark.parametrize('language', ['sql', 'mongo', 'neo4j'])
+def test_template_render(language):
+    q1, q2 = rendered_and_expected(language)
+    assert q1 == q2
+
+def test_template_repeated_slot():
+    assert repeated_slot().endswith('p.price > 5 AND \n\tp.discount < 5')
+
+def test_template_quoted_value():
+    assert "p.name = 'O''Neil'" in quoted_slot_value()
+
+def test_template_missing_slot():
+    with pytest.raises(KeyError):
+        missing_slot()
+
+@pytest.mark.parametrize('pattern', ['contains', 'startswith', 'endswith'])
+def test_template_slot_in_pattern(pattern):
+    with pytest.raises(ValueError):
+        slot_in_pattern(pattern)
+
+def test_template_slot_as_pattern():
+    assert slot_as_pattern().endswith("p.name LIKE '%Giz%'")
+
+@pytest.mark.parametrize('batched_queries', [point_lookups, union_of_ranges, async_lookups])
+def test_batched_like_alone(batched_queries):
+    batched, alone, round_trips = batched_queries()
+    assert batched == alone and len(round_trips) == 1
+
+def test_batched_point_lookups_use_IN():
+    *_, round_trips = point_lookups()
+    assert "p.name IN ('Gizmo', 'Doohickey', 'Nothing')" in round_trips[0]
+
+def test_batch_window():
+    result, round_trips = windowed_lookups()
+    assert result == [[(12.5,)], [(7.0,)]] and len(round_trips) == 1
+
+def test_render_to_like_str():
+    for streamed, text in rendered_and_converted():
+        assert streamed == text
+
+def test_render_to_in_pieces():
+    size, largest = large_union()
+    assert largest < size // 100
+
+def test_inside_sequences():
+    assert plain_sequences() == [
+        'p.id BETWEEN 1 AND 10', 'p.code IN (0,3,6,9)',
+        'p.price IN (1.5,2.0)', 'p.stock IN (7,8)',
+        "p.category IN ('toys','tools')",
+    ]
+
+@requires_numpy
+def test_inside_numpy_arrays():
+    assert numpy_arrays() == [
+        'p.id IN (3,1,2)', 'p.price IN (1.0,NULL)',
+        "p.created IN ('2024-01-01','2024-02-01')",
+        "p.name IN ('Gizmo','Gadget')", 'p.active IN (1,0)',
+    ]
+
+def test_case_with_values():
+    assert case_with_values().split('\n')[1:4] == [
+        "\t\tWHEN p.price < 50 THEN 'cheap'",
+        "\t\tWHEN p.price BETWEEN 50 AND 100 THEN 'normal'",
+        "\t\tWHEN p.price IN (150,200) THEN 'special'",
+    ]
+
+def test_options_with_values():
+    assert options_with_values() == [
+        "( p.id BETWEEN 1 AND 4 OR p.category IN ('toys','tools') )"
+    ]
+
+def test_lazy_modules():
+    assert loaded_modules('import sql_blocks') == set()
+    assert loaded_modules() == set()
+    assert loaded_modules('from sql_blocks import *') == {
+        'sql_blocks.parsers', 'sql_blocks.translators', 'sql_blocks.rules'
+    }   # --- only the names of the former single module
+
+def test_lazy_names():
+    assert lazy_names_of_package() == []
+
+def test_slotted_objects():
+    assert slotted_objects() == ['Where', 'Function', 'FieldList', 'Case']
+
+def test_shared_identifiers():
+    assert shared_identifiers()
+
+def test_bytes_round_trip():
+    for original, decoded in round_trips():
+        assert original == decoded
+
+def test_bytes_restored_state():
+    original, decoded = restored_state()
+    assert original == decoded
+
+def test_bytes_restored_links():
+    assert 'JOIN Customer c ON (i.customer = c.id)' in restored_links()
+
+def test_bytes_smaller_than_pickle():
+    size, pickled = sizes()
+    assert size < pickled
+
+def test_bytes_corrupted_data():
+    assert all( corrupted_data() )
+
+def test_parse_cache_after_restart():
+    assert restarted_worker() == (1, 0, True)
+
+def test_parse_cache_upgrade():
+    before, after, misses = entries_after_upgrade()
+    assert before == 1 and after == 0 and misses == 1
+
+def test_parse_cache_rendered():
+    for cached, direct in rendered_texts():
+        assert cached == direct
+
+def test_parse_cache_context():
+    texts, hits = parsed_in_contexts()
+    for cached, direct in texts:
+        assert cached == direct
+    assert hits == len(texts)
+
+def test_parse_cache_concurrent_workers():
+    results, expected, entries = concurrent_workers()
+    assert all(result == expected for result in results)
+    assert entries == len(expected) - 1
+
+def test_detect_long_scripts():
+    for detected, expected in long_scripts():
+        assert detected is expected
+
+def test_detect_reads_a_prefix():
+    assert beyond_the_prefix() == [None, None]
+
+def test_detect_renamed_tables():
+    tables, names = renamed_tables()
+    assert tables == ['Airport_1', 'Flight', 'Airport_2', 'Airport_3']
+    assert names == {f'Airport_{i}': 'Airport' for i in (1, 2, 3)}
+
+def test_cypher_tokens():
+    assert cypher_tokens() == [
+        (None, 'Student'), ('(', '('), (None, 'name'), ('?', '?'),
+        (None, 'age=16'), (')', ')'), ('<-', '<-'), (None, 'Class'),
+        ('(', '('), (None, 'student_id'), (')', ')'),
+    ]
+
+def test_neo4j_tokens():
+    assert neo4j_tokens() == [
+        (None, 'MATCH'), ('(', '('), (None, 'p:Person'), ('{', '{'),
+        (None, 'name:"Ann Lee"'), (',', ','), (None, 'age:30'), ('}', '}'),
+        (')', ')'), ('RETURN', 'RETURN'), (None, 'p'),
+    ]
+
+def test_multi_hop_pattern():
+    nodes = multi_hop_queries()
+    assert len(nodes) == 50
+    for i, (table, key, join_type, conditions) in enumerate(nodes):
+        assert (table, key) == (f'Node{i}', 'id')
+        assert join_type == ('RIGHT' if i else 'INNER')
+        assert conditions == [f'nod.level > {i}']
+
+def test_parser_shared_tables():
+    assert shared_tables()
+
+def test_mongo_tokens():
+    assert mongo_tokens() == [
+        ('name', 'db.people.find'), ('symbol', '('), ('symbol', '{'),
+        ('string', '"name"'), ('symbol', ':'), ('string', "'a:b, {c}'"),
+        ('symbol', ','), ('name', 'age'), ('symbol', ':'), ('number', '0x1F'),
+        ('symbol', '}'), ('symbol', ')'),
+        ('name', 'db.people.find'), ('symbol', '('), ('symbol', '{'),
+        ('name', 'score'), ('symbol', ':'), ('number', '-1.5e3'),
+        ('symbol', '}'), ('symbol', ')'),
+    ]
+
+def test_mongo_literals():
+    assert mongo_conditions(
+        'db.people.find({"name": "a:b, {c}", age: 0x1F, score: -1.5e3, boss: null})'
+    ) == [
+        "peo.name = 'a:b, {c}'", 'peo.age = 31',
+        'peo.score = -1500.0', 'peo.boss IS NULL',
+    ]
+
+def test_mongo_nested_logic():
+    assert mongo_conditions(
+        'db.people.find({$nor: [{dept: {$in: ["IT", "HR"]}}, {$or: [{boss: null}, {age: {$lt: 18}}]}]})'
+    ) == [
+        "NOT ( peo.dept IN ('IT','HR') OR ( peo.boss IS NULL OR peo.age < 18 ) )"
+    ]
+
+def test_mongo_sort_by_accumulator():
+    order_by, translated = sorted_by_accumulator()
+    assert order_by == ['total DESC', 'sal.region']
+    assert '{$sort: {total:-1, region:1}}' in translated
+
+def test_mongo_big_in_list():
+    condition = big_in_list()
+    assert condition.startswith('peo.id IN (0,1,2,')
+    assert condition.endswith(',99999)')
+    assert condition.count(',') == 99_999
+
+def test_mongo_pipeline_and_chain():
+    grouped, ordered = mongo_queries("""
+        db.people.aggregate([
+            {$match: {age: {$gte: 18}}},
+            {$group: {_id: "$dept", total: {$sum: "$salary"}}},
+            {$match: {total: {$gt: 1000}}},
+            {$limit: 5}
+        ]);
+        /* --- the last orders: */
+        db.getCollection("orders").find({
+            created: {$gte: ISODate("2024-01-01")}  // --- this year
+        }).sort({created: -1}).limit(3)
+    """)
+    assert 'HAVING Sum(peo.salary) > 1000' in grouped
+    assert "ord.created >= '2024-01-01'" in ordered
+    assert 'ord.created DESC' in ordered
+
+def test_mongo_errors():
+    assert all( mongo_errors() )
+
+def test_recursive_guards_by_dialect():
+    texts = guarded_texts()
+    assert "R.path NOT LIKE '%,' || f2.departure || ',%'" in texts['ANSI']
+    assert 'R.depth < 10' in texts['ANSI']
+    assert texts['POSTGRESQL'].endswith(
+        ') CYCLE departure SET is_cycle USING path SELECT * FROM Route R WHERE NOT R.is_cycle'
+    )
+    assert 'path' not in texts['POSTGRESQL'].split('CYCLE')[0]
+    assert texts['SQL_SERVER'].startswith('WITH Route AS (')
+    assert texts['SQL_SERVER'].endswith('OPTION (MAXRECURSION 10)')
+    assert 'CAST(f2.departure AS VARCHAR(MAX))' in texts['SQL_SERVER']
+    assert "CAST(CONCAT(',', f1.departure" in texts['MYSQL']
+    assert "NOT LIKE CONCAT('%,'" in texts['MYSQL']
+    assert 'AS VARCHAR2(4000)' in texts['ORACLE']
+
+@pytest.mark.parametrize('options', [
+    {'depth': 4}, {'cycle': True}, {'depth': 10, 'cycle': True}
+])
+def test_recursive_guards_stop_cycles(options):
+    on_sqlite, on_engine = guarded_routes_on_sqlite_and_engine(**options)
+    assert on_sqlite == on_engine
+    assert ('MIA', 'JFK') in on_sqlite
+
+def test_recursive_guards_round_trip():
+    assert guarded_round_trip()
+
+def test_lint_comma_joins():
+    loose, joined = comma_joins()
+    assert loose == [('ERROR', 'cartesian-product')]
+    assert joined == []
+
+def test_lint_filters():
+    assert filter_issues() == {
+        'contains': [('WARNING', 'leading-wildcard')],
+        'startswith': [],
+        'year': [('WARNING', 'function-on-column')],
+        'not_in': [('WARNING', 'not-in-subquery')],
+        'big_in': [('WARNING', 'huge-in-list')],
+    }
+
+def test_lint_select_star_and_limit():
+    assert lint_text('SELECT * FROM a, b WHERE a.z = b.k') == [('WARNING', 'select-star')]
+    assert lint_text('SELECT p.name FROM People p') == [('WARNING', 'missing-limit')]
+    assert lint_text('SELECT p.name FROM People p LIMIT 10') == []
+    assert lint_text('SELECT Count(*) FROM People p') == []
+
+def test_lint_or_across_columns():
+    assert lint_text(
+        "SELECT p.name FROM People p WHERE p.status = 'B' OR p.age < 50"
+    ) == [('INFO', 'or-across-columns')]
+    assert lint_text(
+        "SELECT p.name FROM People p WHERE p.status = 'B' OR p.status = 'C'"
+    ) == []
+
+def test_lint_budgets():
+    pattern = 'Actor(name, id ?age = 40) <- Cast(actor_id, movie_id) -> Movie(id ^title)'
+    assert lint_text(pattern) == []
+    assert lint_text(pattern, max_joins=1) == [('ERROR', 'join-budget')]
+    query = nested_subqueries(3)
+    assert issue_codes(query) == [('ERROR', 'subquery-depth')]
+    assert issue_codes(query, max_depth=3) == []
+
+def test_lint_recursive_cte():
+    assert recursive_issues() == [('missing-limit', 'ancestors')]
+
+def test_lint_cli():
+    code, lines = run_cli(text='SELECT * FROM a, b WHERE a.z = 1')
+    assert code == 1
+    assert lines[0] == '-: ERROR cartesian-product: No join condition for `b` (a)'
+    code, lines = run_cli('--fail-on', 'error', text='SELECT p.name FROM People p')
+    assert code == 0 and len(lines) == 1
@@ -0,0 +1,68 @@
+import asyncio
+from sql_blocks.sql_blocks import *
+from sql_blocks.batching import BatchLoader, AsyncBatchLoader
+from tests.execution import product_pool, expensive_products
+
+
+class CountingPool:
+    """
+    Counts the round-trips to the pool.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.queries = []
+
+    def execute(self, query: Select) -> list:
+        self.queries.append( str(query) )
+        return self.pool.execute(query)
+
+
+def product_by_name(name: str) -> Select:
+    return Select('Product p', name=eq(name), price=Field)
+
+def point_lookups() -> tuple:
+    """
+    Returns (rows of each lookup, rows of each query alone, round-trips).
+    """
+    names = ['Gizmo', 'Doohickey', 'Nothing', 'Gizmo']
+    with product_pool() as pool:
+        counter = CountingPool(pool)
+        batched = BatchLoader(counter).load_many(
+            [product_by_name(name) for name in names]
+        )
+        alone = [pool.execute( product_by_name(name) ) for name in names]
+    return batched, alone, counter.queries
+
+def union_of_ranges() -> tuple:
+    prices = [5, 15, 30]
+    with product_pool() as pool:
+        counter = CountingPool(pool)
+        batched = BatchLoader(counter).load_many(
+            [expensive_products(price) for price in prices]
+        )
+        alone = [pool.execute( expensive_products(price) ) for price in prices]
+    return batched, alone, counter.queries
+
+def async_lookups() -> tuple:
+    names = ['Gadget', 'Doohickey', 'Gadget']
+    async def handler(loader: AsyncBatchLoader, name: str) -> list:
+        return await loader.load( product_by_name(name) )
+    async def main(executor) -> list:
+        loader = AsyncBatchLoader(executor)
+        return await asyncio.gather(*[handler(loader, name) for name in names])
+    with product_pool() as pool:
+        counter = CountingPool(pool)
+        batched = asyncio.run( main(counter) )
+        alone = [pool.execute( product_by_name(name) ) for name in names]
+    return batched, alone, counter.queries
+
+def windowed_lookups() -> tuple:
+    """
+    Threads waiting on their results while the window collects them.
+    """
+    with product_pool() as pool:
+        counter = CountingPool(pool)
+        loader = BatchLoader(counter, window=0.05)
+        futures = [loader.load( product_by_name(name) ) for name in ('Gizmo', 'Gadget')]
+        result = [future.result(timeout=5) for future in futures]
+    return result, counter.queries
@@ -0,0 +1,156 @@
+"""
+Import time of the package, measured in a new interpreter,
+and memory of the query objects:
+    python -m tests.benchmark
+
+The measures depend on the machine, so they are compared with
+their budgets here (exit code 1 if one is over) -- not in pytest.
+"""
+import re
+import sys
+import subprocess
+import tracemalloc
+
+IMPORT_BUDGET = 0.03    # --- seconds, for `import sql_blocks` (the single module took ~40 ms)
+SNIFF_BUDGET = 0.05     # --- seconds, to detect the language of a long script
+IN_LIST_BUDGET = 3.0    # --- seconds, to parse a MongoDB $in with 100,000 values
+LAZY_MODULES = {
+    'sql_blocks.parsers', 'sql_blocks.translators', 'sql_blocks.rules',
+    'sql_blocks.execution', 'sql_blocks.engine', 'sql_blocks.cache',
+    'sql_blocks.batching', 'sql_blocks.serialization', 'sql_blocks.parse_cache',
+    'sql_blocks.lint',
+    'asyncio', 'numpy', 'sqlite3',
+}
+MEMORY_BUDGET = {   # --- bytes per object, with its values
+    'Where': 128,
+    'Function': 256,
+    'FieldList': 160,
+    'Case': 150,
+    'Select': 850,
+}
+SIMPLE_USE = '''
+import sql_blocks
+str( sql_blocks.Select('Product p', name=sql_blocks.Field, price=sql_blocks.gt(10)) )
+'''
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, '-c', code],
+        capture_output=True, text=True, check=True
+    )
+
+def import_time(runs: int=5) -> float:
+    """
+    The best (cumulative) time of `import sql_blocks`, in seconds.
+    """
+    result = []
+    for _ in range(runs):
+        report = run_python('import sql_blocks', '-X', 'importtime').stderr
+        found = re.search(r'\|\s*(\d+)\s*\|\s*sql_blocks\s*$', report, re.MULTILINE)
+        result.append( int(found.group(1)) / 1e6 )
+    return min(result)
+
+def over_budget(label: str, value: float, budget: float, unit: str) -> bool:
+    """
+    Prints the measure and its budget; True if it is over.
+    """
+    over = value >= budget
+    print(f'{label}: {value:.1f} {unit} (budget: {budget:g} {unit})' + (' -- OVER' if over else ''))
+    return over
+
+def sniff_time(size: int=20_000_000) -> float:
+    """
+    Seconds to detect the language of a script of `size` characters.
+    """
+    from time import perf_counter
+    from sql_blocks.parsers import parser_class
+    text = 'SELECT * FROM Product p WHERE ' + 'x' * size
+    start = perf_counter()
+    parser_class(text)
+    return perf_counter() - start
+
+def in_list_time(size: int=100_000) -> float:
+    """
+    Seconds to parse a MongoDB $in with `size` values.
+    """
+    from time import perf_counter
+    from tests.mongo import big_in_list
+    start = perf_counter()
+    big_in_list(size)
+    return perf_counter() - start
+
+def loaded_modules(code: str=SIMPLE_USE) -> set:
+    """
+    Which of the LAZY_MODULES were imported by `code`.
+    """
+    output = run_python(code + '\nimport sys; print(*sys.modules)').stdout
+    return LAZY_MODULES.intersection( output.split() )
+
+def lazy_names_of_package() -> list:
+    """
+    The public names that are not found in the package.
+    """
+    import sql_blocks
+    return [name for name in sql_blocks.__all__ if not hasattr(sql_blocks, name)]
+
+def object_factories() -> dict:
+    from sql_blocks import Where, Sum, FieldList, Case, Select, Field, GroupBy, gt
+    tables = ['Product p', 'Customer c', 'Order o']
+    return {
+        'Where': lambda i: Where(f'= {i}'),
+        'Function': lambda i: Sum(),
+        'FieldList': lambda i: FieldList(['name', 'price']),
+        'Case': lambda i: Case('price'),
+        'Select': lambda i: Select(
+            tables[i % 3], name=Field, price=gt(i), category=[Field, GroupBy]
+        ),
+    }
+
+def memory_per_object(name: str, count: int=10_000) -> float:
+    """
+    Average bytes allocated by each object of a `count` size list.
+    """
+    factory = object_factories()[name]
+    factory(0)  # --- warm up (caches of the regex module...)
+    tracemalloc.start()
+    try:
+        objects = [factory(i) for i in range(count)]
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return size / count
+
+def slotted_objects() -> list:
+    """
+    The objects of `object_factories` without a __dict__.
+    """
+    return [
+        name for name, factory in object_factories().items()
+        if not hasattr(factory(0), '__dict__')
+    ]
+
+def shared_identifiers() -> bool:
+    """
+    Queries of the same table keep one copy of its names.
+    """
+    from sql_blocks import Select, Field, GroupBy
+    q1, q2 = [
+        Select(''.join(['Product', ' p']), name=Field, category=GroupBy)
+        for _ in range(2)
+    ]
+    return all(
+        a is b for key in q1.values
+        for a, b in zip(q1.values[key], q2.values[key])
+    ) and q1.alias is q2.alias
+
+
+if __name__ == '__main__':
+    over = over_budget('import sql_blocks', import_time() * 1000, IMPORT_BUDGET * 1000, 'ms')
+    print('Lazy modules loaded by a simple use:', sorted(loaded_modules()) or 'none')
+    over |= over_budget('detect (20M characters)', sniff_time() * 1000, SNIFF_BUDGET * 1000, 'ms')
+    over |= over_budget('MongoDB $in (100,000 values)', in_list_time() * 1000, IN_LIST_BUDGET * 1000, 'ms')
+    for name, budget in MEMORY_BUDGET.items():
+        over |= over_budget(name, memory_per_object(name), budget, 'bytes')
+    sys.exit( int(over) )
@@ -0,0 +1,64 @@
+import os
+from sql_blocks.sql_blocks import *
+from sql_blocks.engine import LocalEngine
+from sql_blocks.cache import ResultCache
+from tests.engine import csv_folder, FLIGHTS, AIRPORTS
+
+
+def flight_cache(**options) -> ResultCache:
+    engine = LocalEngine( csv_folder(Flyght=FLIGHTS, Airport=AIRPORTS) )
+    return ResultCache(engine, **options)
+
+def expensive_flights(price: int) -> Select:
+    return Select('Flyght.csv f', arrival=Field, price=gt(price))
+
+def flights_to_named_airports() -> Select:
+    return Select(
+        'Flyght.csv f', arrival=Field, departure=SelectIN(
+            'Airport.csv a', id=Field, name=contains('a')
+        )
+    )
+
+def airport_names() -> Select:
+    return Select('Airport.csv a', name=Field)
+
+def repeated_queries() -> tuple:
+    cache = flight_cache()
+    first = cache.execute( expensive_flights(300) )
+    second = expensive_flights(300).execute(cache)
+    cache.execute( expensive_flights(100) )   # --- other bound value
+    return first == second, cache.hits, cache.misses
+
+def invalidated_by_table(table: str) -> tuple:
+    """
+    Returns (results dropped, hits) after invalidating `table`:
+    the query without it is still in the cache.
+    """
+    cache = flight_cache()
+    queries = [flights_to_named_airports(), expensive_flights(300), airport_names()]
+    for query in queries:
+        cache.execute(query)
+    dropped = cache.invalidate(table)
+    for query in queries:
+        cache.execute(query)
+    return dropped, cache.hits
+
+def invalidated_by_file() -> tuple:
+    cache = flight_cache()
+    cache.execute( airport_names() )
+    before = cache.execute( expensive_flights(1000) )
+    path = cache.executor.table_path('Flyght.csv')
+    with open(path, 'a') as file:
+        file.write('SEA,ANC,1250\n')
+    after = cache.execute( expensive_flights(1000) )
+    cache.execute( airport_names() )
+    return before, after, cache.hits, cache.invalidations
+
+def evictions(max_size: int, ttl: float, elapsed: float) -> tuple:
+    now = [0.0]
+    cache = flight_cache(max_size=max_size, ttl=ttl, clock=lambda: now[0])
+    for price in (100, 200, 300):
+        cache.execute( expensive_flights(price) )
+    now[0] += elapsed
+    cache.execute( expensive_flights(300) )
+    return len(cache), cache.hits, cache.evictions
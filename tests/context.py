@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from sql_blocks.sql_blocks import *
+
+
+def render_in_context(dialect: Dialect) -> str:
+    with Context(dialect=dialect):
+        return str( DateDiff(Current_Date(), 'due_date') )
+
+def dialects_in_threads() -> dict:
+    with ThreadPoolExecutor(max_workers=len(Dialect)) as executor:
+        results = executor.map(render_in_context, Dialect)
+        return {
+            dialect.name: txt
+            for dialect, txt in zip(Dialect, results)
+        }
+
+def context_registries() -> tuple:
+    """
+    Returns the equivalent names seen inside and
+    outside a Context where a repeated table was renamed.
+    """
+    global_names = dict(Select.EQUIVALENT_NAMES)
+    with Context() as context:
+        detect('Airport(*id,name)' * 2, join_queries=False)
+        inside = dict( context.registries['EQUIVALENT_NAMES'] )
+    released = not context.registries
+    return inside, released and Select.EQUIVALENT_NAMES == global_names
+
+def nested_contexts() -> tuple:
+    """
+    Returns (date rendered in the inner context, its sort,
+    equivalent names seen there, dialect after it ends).
+    The dialect and the registries come from the outer context.
+    """
+    with Context(dialect=Dialect.ORACLE):
+        detect('Airport(*id,name)' * 2, join_queries=False)
+        with Context(sort=SortType.DESC):
+            date = str( Current_Date() )
+            sort = Context.get(OrderBy, 'sort')
+            names = dict( Context.registry(Select, 'EQUIVALENT_NAMES') )
+        dialect = Context.get(Function, 'dialect')
+    return date, sort, names, dialect
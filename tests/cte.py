@@ -69,3 +69,51 @@ def compare_created_routes(obj: Recursive, join_airport: bool = False) -> bool:
         ){AIRPORT_TABLES if join_airport else SIMPLE_ROUTE_SELECT}
     """).lower()
     return SequenceMatcher(None, txt1, txt2).ratio() > 0.66
+
+def guarded_routes(format: str='', depth: int=0, cycle: bool=False) -> Recursive:
+    """
+    The routes to JFK (FLIGHTS of tests.engine has the cycle JFK -> ORD -> MIA -> JFK)
+    """
+    R = Recursive.create(
+        'Route R', 'Flyght(departure, arrival)', '[2] = R.[1]', 'JFK', format
+    )
+    if depth:
+        R.max_depth(depth)
+    if cycle:
+        R.cycle('departure')
+    return R
+
+def guarded_texts() -> dict:
+    result = {}
+    for dialect in Dialect:
+        with Context(dialect=dialect):
+            R = guarded_routes(depth=10, cycle=True)
+            result[dialect.name] = re.sub(r'\s+', ' ', str(R))
+    return result
+
+def guarded_routes_on_sqlite_and_engine(**options) -> tuple:
+    """
+    (rows of sqlite, rows of the LocalEngine) -- without
+    the guards, sqlite would never stop.
+    The engine discards rows repeated apart from the counter (depth),
+    so only (departure, arrival) are compared.
+    """
+    import sqlite3, csv, io
+    from sql_blocks.engine import LocalEngine
+    from tests.engine import FLIGHTS, csv_folder
+    conn = sqlite3.connect(':memory:')
+    header, *rows = csv.reader( io.StringIO(FLIGHTS) )
+    conn.execute(f'CREATE TABLE Flyght ({",".join(header)})')
+    conn.executemany('INSERT INTO Flyght VALUES (?, ?, ?)', rows)
+    with Context(dialect=Dialect.ANSI):
+        on_sqlite = conn.execute( str(guarded_routes(**options)) ).fetchall()
+        engine = LocalEngine( csv_folder(Flyght=FLIGHTS) )
+        on_engine = engine.execute( guarded_routes('.csv', **options) )
+    return (
+        {row[:2] for row in on_sqlite}, {row[:2] for row in on_engine}
+    )
+
+def guarded_round_trip() -> bool:
+    with Context(dialect=Dialect.SQL_SERVER):
+        R = guarded_routes(depth=5)
+        return str( Select.from_bytes(R.to_bytes()) ) == str(R)
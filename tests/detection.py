@@ -0,0 +1,39 @@
+from sql_blocks.sql_blocks import *
+from sql_blocks.parsers import SNIFF_SIZE
+
+
+def long_scripts() -> list:
+    """
+    Pairs of (detected, expected) parser classes of long scripts.
+    """
+    fields = ', '.join(f'p.field_{i}' for i in range(SNIFF_SIZE // 8))
+    ids = ', '.join(str(i) for i in range(SNIFF_SIZE))
+    return [
+        (parser_class(f'SELECT {fields} FROM Product p'), SQLParser),
+        (parser_class(f"db.people.find({{id: {{$in: [{ids}]}}, name: 'select from'}})"), MongoParser),
+        (parser_class(f'MATCH (p: Person) WHERE p.id IN [{ids}] RETURN p'), Neo4JParser),
+        (parser_class(f'Product(name, price ? id = 1) {"-" * SNIFF_SIZE} select from'), CypherParser),
+    ]
+
+def beyond_the_prefix() -> list:
+    """
+    The parser classes found when the decisive token
+    comes only after SNIFF_SIZE characters (not read: None).
+    """
+    padding = ' ' * SNIFF_SIZE
+    return [
+        parser_class(padding + 'db.people.find({})'),
+        parser_class(padding + 'MATCH (p: Person) RETURN p'),
+    ]
+
+def renamed_tables() -> tuple:
+    """
+    Returns (tables of the queries, equivalent names)
+    of a script with a repeated table.
+    """
+    with Context() as context:
+        queries = detect(
+            'Airport(*id,name) Flight(origin) Airport(*id,name) Airport(*id,name)',
+            join_queries=False
+        )
+        return [q.table_name for q in queries], dict( context.registries['EQUIVALENT_NAMES'] )
@@ -0,0 +1,361 @@
+import os
+import tempfile
+from sql_blocks.sql_blocks import *
+from sql_blocks.engine import LocalEngine
+from sql_blocks.rules import RuleNamedWindow
+
+FLIGHTS = """departure,arrival,price
+JFK,LAX,350.5
+JFK,ORD,200
+LAX,SFO,90
+ORD,MIA,180
+SFO,SEA,1100
+MIA,JFK,210
+"""
+AIRPORTS = """id,name
+JFK,Kennedy
+LAX,Los Angeles
+ORD,O'Hare
+SFO,"San Francisco, CA"
+"""
+
+
+def csv_folder(**files) -> str:
+    folder = tempfile.mkdtemp()
+    for name, content in files.items():
+        with open(os.path.join(folder, f'{name}.csv'), 'w') as file:
+            file.write(content)
+    return folder
+
+def flight_engine() -> LocalEngine:
+    return LocalEngine( csv_folder(Flyght=FLIGHTS, Airport=AIRPORTS) )
+
+def cheapest_from_JFK() -> list:
+    with Context(sort=SortType.ASC):
+        query = Select(
+            'Flyght.csv f', departure=eq('JFK'),
+            arrival=Field, price=[Field, OrderBy]
+        ).limit(1)
+    return query.execute( flight_engine() )
+
+def flights_with_airport_names(join_type: str) -> set:
+    airport = Select('Airport.csv a', id=PrimaryKey, name=NamedField('airport'))
+    airport.join_type = JoinType[join_type]
+    query = Select('Flyght.csv f', arrival=[Field, airport], price=gt(80))
+    return set( query.execute(flight_engine()) )
+
+def flights_from_airports_with(text: str) -> list:
+    query = Select(
+        'Flyght.csv f', arrival=Field, departure=SelectIN(
+            'Airport.csv a', id=Field, name=contains(text)
+        )
+    )
+    return query.execute( flight_engine() )
+
+def streamed_flights(batch_size: int) -> tuple:
+    """
+    (rows of stream, rows of execute) for the same query.
+    """
+    engine = flight_engine()
+    query = Select('Flyght.csv f', departure=Field, arrival=Field, price=gt(100))
+    return list( engine.stream(query, batch_size) ), engine.execute(query)
+
+def unsupported_function():
+    query = Select('Flyght.csv f', departure=Field)
+    query.values[SELECT].append('Soundex(f.arrival)')
+    flight_engine().execute(query)
+
+def columnar_scans() -> tuple:
+    """
+    Runs the same query on the CSV file and on its columnar cache,
+    before and after the source changes.
+    """
+    folder = csv_folder(Flyght=FLIGHTS)
+    query = Select('Flyght.csv f', arrival=Field, price=[Field, gt(100)])
+    csv_rows = LocalEngine(folder).execute(query)
+    cached = LocalEngine(folder, columnar=True)
+    first = cached.execute(query)
+    with open(os.path.join(folder, 'Flyght.csv'), 'a') as file:
+        file.write('SEA,ANC,\nSEA,BOS,420\n')
+    second = cached.execute(query)
+    return csv_rows, first, second
+
+MIXED = """id,score,code,parent
+1,10,A1,
+2,,7,1
+3,2.5,B,1
+4,30,,2
+5,30,7.0,
+"""
+
+def cold_and_warm_columnar() -> tuple:
+    """
+    (CSV scan, columnar cache just built, columnar cache reused)
+    -- each value with its type: int with NULLs, int + float, str + int...
+    """
+    folder = csv_folder(Mixed=MIXED)
+    queries = [
+        Select('Mixed.csv m', id=Field, score=Field, code=Field, parent=Field),
+        Select('Mixed.csv m', parent=[GroupBy, Field], score=[Sum, Max], code=Count),
+        Select('Mixed.csv m', code=[GroupBy, Field], id=Count),
+    ]
+    typed = lambda rows: sorted(
+        [tuple((type(value).__name__, value) for value in row) for row in rows], key=str
+    )
+    def run(engine: LocalEngine) -> list:
+        return [typed( engine.execute(query) ) for query in queries]
+    return (
+        run( LocalEngine(folder) ),
+        run( LocalEngine(folder, columnar=True) ),
+        run( LocalEngine(folder, columnar=True) ),
+    )
+
+FOLKS = """id,name,father,mother,birth
+32630,Julio,1001,1002,1980
+1001,Antonio,2001,2002,1950
+1002,Maria,,,1952
+2001,Jose,1001,,1920
+2002,Ana,,,1925
+7,Stranger,,,1900
+"""
+
+def ancestors_by_generation(**limits) -> list:
+    """
+    Folks 2001 has 1001 as father (a cycle) to check the de-duplication.
+    """
+    from tests.cte import basic_recursive_cte
+    engine = LocalEngine(csv_folder(Folks=FOLKS), **limits)
+    query = basic_recursive_cte(True)
+    return sorted(
+        (generation, name) for
+        _, name, _, _, _, generation in engine.execute(query)
+    )
+
+def joins_on_engine_and_sqlite(join_type: str, extra_airports: int=0) -> tuple:
+    """
+    With extra airports, the hash table is built with the flights.
+    """
+    import sqlite3, csv, io
+    airports = AIRPORTS + ''.join(
+        f'X{i},Airport #{i}\n' for i in range(extra_airports)
+    )
+    engine = LocalEngine( csv_folder(Flyght=FLIGHTS, Airport=airports) )
+    conn = sqlite3.connect(':memory:')
+    for table, content in (('Flyght', FLIGHTS), ('Airport', airports)):
+        header, *rows = csv.reader( io.StringIO(content) )
+        conn.execute(f'CREATE TABLE {table} ({",".join(header)})')
+        conn.executemany(
+            f'INSERT INTO {table} VALUES ({",".join("?" * len(header))})', rows
+        )
+    airport = Select('Airport a', id=PrimaryKey, name=Field)
+    airport.join_type = JoinType[join_type]
+    query = Select('Flyght f', departure=[Field, airport])
+    return (
+        sorted(engine.execute(query), key=str),
+        sorted(conn.execute(str(query)).fetchall(), key=str)
+    )
+
+def bloom_false_negatives(count: int) -> int:
+    from sql_blocks.engine import BloomFilter
+    keys = [(i, f'key {i}') for i in range(count)]
+    bloom = BloomFilter(keys)
+    return sum(key not in bloom for key in keys)
+
+SALES = """region,seller,amount,items
+SOUTH,Ana,100.5,3
+SOUTH,Bia,,2
+NORTH,Ana,80,
+NORTH,Caio,120,5
+SOUTH,Ana,19.5,1
+,Dani,50,4
+"""
+
+NODES = """id,parent
+1,
+2,1
+,
+"""
+
+def null_keys_on_engine_and_sqlite() -> tuple:
+    """
+    Ancestors of node 2: the root has no parent and a row has no id
+    -- NULL = NULL is not a match.
+    """
+    import sqlite3, csv, io
+    from sql_blocks.engine import parse_value
+    def ancestors(table: str) -> Recursive:
+        return Recursive('tree t', [
+            Select(f'{table} n1', id=[Field, eq(2)], parent=Field),
+            Select(f'{table} n2', id=[Field, Where.formula('% = t.parent')], parent=Field),
+        ])
+    conn = sqlite3.connect(':memory:')
+    header, *rows = csv.reader( io.StringIO(NODES) )
+    conn.execute(f'CREATE TABLE Nodes ({",".join(header)})')
+    conn.executemany(
+        'INSERT INTO Nodes VALUES (?, ?)',
+        [[parse_value(value) for value in row] for row in rows]
+    )
+    engine = LocalEngine( csv_folder(Nodes=NODES) )
+    return (
+        sorted(engine.execute( ancestors('Nodes.csv') ), key=str),
+        sorted(conn.execute( str(ancestors('Nodes')) ).fetchall(), key=str)
+    )
+
+EDGES = """src,dst
+A,B
+B,C
+C,D
+D,B
+"""
+
+def closure_on_engine_and_sqlite() -> tuple:
+    """
+    Transitive closure: `r.src` only passes through (it is not a counter)
+    -- with a cycle (D -> B).
+    """
+    import sqlite3, csv, io
+    def closure(table: str) -> Recursive:
+        member = Select(f'{table} e2', src=Where.formula('% = r.dst'))
+        member.values[SELECT] = ['r.src', 'e2.dst']
+        return Recursive('R r', [Select(f'{table} e1', src=Field, dst=Field), member])
+    conn = sqlite3.connect(':memory:')
+    header, *rows = csv.reader( io.StringIO(EDGES) )
+    conn.execute(f'CREATE TABLE Edge ({",".join(header)})')
+    conn.executemany('INSERT INTO Edge VALUES (?, ?)', rows)
+    engine = LocalEngine( csv_folder(Edge=EDGES) )
+    query = str( closure('Edge') ).replace('UNION ALL', 'UNION')  # --- sqlite stops at the cycle
+    return (
+        sorted(engine.execute( closure('Edge.csv') )),
+        sorted(conn.execute(query).fetchall())
+    )
+
+def grouped_on_engine_and_sqlite(columnar: bool) -> list:
+    """
+    The NULLs of `region` form one group;
+    those of `amount` and `items` are ignored by the aggregates.
+    """
+    import sqlite3, csv, io
+    from sql_blocks.engine import parse_value
+    engine = LocalEngine(csv_folder(Sale=SALES), columnar=columnar)
+    conn = sqlite3.connect(':memory:')
+    header, *rows = csv.reader( io.StringIO(SALES) )
+    conn.execute(f'CREATE TABLE Sale ({",".join(header)})')
+    conn.executemany(
+        'INSERT INTO Sale VALUES (?, ?, ?, ?)',
+        [[parse_value(value) for value in row] for row in rows]
+    )
+    queries = [
+        Select(
+            'Sale s', region=[GroupBy, Field], seller=Count,
+            amount=[Sum, Avg, Min, Max], items=Sum
+        ),
+        Select('Sale s', seller=[GroupBy, Field], amount=[Sum, Having.sum(gt(100))]),
+        Select('Sale s', amount=[Count, Avg], items=[Max, gt(1)]),
+        Select('Sale s', region=[GroupBy, Field], seller=Min, items=Count, amount=gt(1000)),
+        Select('Sale s', region=[GroupBy, Field], seller=[GroupBy, Field]),
+    ]
+    last = queries[-1]   # --- HAVING evaluated by group
+    last.values[SELECT] += ['Count(*) as total', 'Round(Sum(s.amount), 1) as amount']
+    last.values[GROUP_BY][-1] += ' HAVING Count(*) > 1 OR Max(s.items) >= 4'
+    compound = Select('Sale s', region=[GroupBy, Field], items=Sum)
+    compound.values[GROUP_BY][-1] += " HAVING Sum(s.amount) > 1000 OR Lower(s.region) = 'north'"
+    queries.append(compound)    # --- not a single aggregate: no vectorized comparison
+    return [
+        (sorted(engine.execute(query), key=str), sorted(conn.execute(str(query)).fetchall(), key=str))
+        for query in queries
+    ]
+
+def filtered_groups_on_engine_and_sqlite() -> list:
+    """
+    GROUP BY over the columnar cache with `field <op> literal` conditions:
+    (vectorized, engine rows, sqlite rows) -- `Lower(...)` needs the rows.
+    """
+    import sqlite3, csv, io
+    from sql_blocks.engine import parse_value
+    engine = LocalEngine(csv_folder(Sale=SALES), columnar=True)
+    conn = sqlite3.connect(':memory:')
+    header, *rows = csv.reader( io.StringIO(SALES) )
+    conn.execute(f'CREATE TABLE Sale ({",".join(header)})')
+    conn.executemany(
+        'INSERT INTO Sale VALUES (?, ?, ?, ?)',
+        [[parse_value(value) for value in row] for row in rows]
+    )
+    queries = [
+        Select('Sale s', region=[GroupBy, Field], amount=[Sum, gt(50)]),
+        Select('Sale s', seller=[GroupBy, Field], items=[Count, gte(2)], region=eq('SOUTH')),
+        Select('Sale s', region=[GroupBy, Field], amount=Max, seller=lt('Caio')),
+        Select('Sale s', region=[GroupBy, Field], amount=Min, seller=Where("<> 'Ana'")),
+    ]
+    queries.append( Select('Sale s', region=[GroupBy, Field], seller=Where.formula("Lower(%) = 'ana'")) )
+    return [
+        (
+            engine.plan(query).aggregation.columnar_input() is not None,
+            sorted(engine.execute(query), key=str),
+            sorted(conn.execute(str(query)).fetchall(), key=str)
+        )
+        for query in queries
+    ]
+
+def window_queries() -> list:
+    return [
+        Select(
+            'Sale s', seller=Field, amount=[
+                Field,
+                Sum().over(region=Partition, items=OrderBy, _=Rows(Preceding(1), Current())).As('moving'),
+                Avg().over(region=Partition, items=OrderBy).As('running'),
+                Max().over(items=OrderBy, _=Rows(Preceding(2), Following(1))).As('highest'),
+                Min().over(items=OrderBy, _=Rows(Following(1), Following())).As('lowest_after'),
+            ],
+            items=[
+                Lag().over(region=Partition, amount=OrderBy).As('previous'),
+                Lead(2, 0).over(items=OrderBy).As('next'),
+            ],
+        ),
+        Select(
+            'Sale s', seller=Field, region=Count().over(seller=Partition).As('total'),
+            _=[
+                Rank().over(region=Partition, seller=OrderBy).As('position'),
+                Row_Number().over(items=OrderBy).As('line'),
+            ]
+        ),
+    ]
+
+def windows_on_engine_and_sqlite(named: bool=False) -> list:
+    """
+    The ORDER BY of each window has no ties (deterministic frames).
+    named = True: the same specs are in a WINDOW clause (RuleNamedWindow).
+    """
+    import sqlite3, csv, io
+    from sql_blocks.engine import parse_value
+    engine = LocalEngine( csv_folder(Sale=SALES) )
+    conn = sqlite3.connect(':memory:')
+    header, *rows = csv.reader( io.StringIO(SALES) )
+    conn.execute(f'CREATE TABLE Sale ({",".join(header)})')
+    conn.executemany(
+        'INSERT INTO Sale VALUES (?, ?, ?, ?)',
+        [[parse_value(value) for value in row] for row in rows]
+    )
+    queries = window_queries()
+    if named:
+        with Context(dialect=Dialect.ANSI):
+            for query in queries:
+                query.optimize([RuleNamedWindow])
+    return [
+        (sorted(engine.execute(query), key=str), sorted(conn.execute(str(query)).fetchall(), key=str))
+        for query in queries
+    ]
+
+def shared_window_sorts() -> tuple:
+    """
+    Distinct sorts of the window functions: (inline specs, named windows)
+    """
+    engine = LocalEngine( csv_folder(Sale=SALES) )
+    result = []
+    for named in (False, True):
+        query = window_queries()[0]
+        if named:
+            with Context(dialect=Dialect.ANSI):
+                query.optimize([RuleNamedWindow])
+        plan = engine.plan(query)
+        result.append( len({func.spec for func in plan.windows}) )
+    return tuple(result)
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import tempfile
+from sql_blocks.sql_blocks import *
+from sql_blocks.execution import ConnectionPool, parameterize
+
+PRODUCTS = [
+    ('Gizmo', 'tools', 12.5),
+    ('Gadget', 'tools', 7.0),
+    ('Doohickey', 'toys', 31.9),
+    ("Widget's", 'toys', 18.0),
+    ('Thingamajig', 'misc', 3.2),
+]
+
+
+def product_pool(max_size: int=2, timeout: float=None) -> ConnectionPool:
+    file_name = os.path.join(tempfile.mkdtemp(), 'shop.db')
+    conn = sqlite3.connect(file_name)
+    conn.execute('CREATE TABLE Product (name TEXT, category TEXT, price REAL)')
+    conn.executemany('INSERT INTO Product VALUES (?, ?, ?)', PRODUCTS)
+    conn.commit()
+    conn.close()
+    return ConnectionPool(
+        lambda: sqlite3.connect(file_name, check_same_thread=False),
+        max_size=max_size, timeout=timeout
+    )
+
+def expensive_products(min_price: float) -> Select:
+    return Select('Product p', name=Field, price=gt(min_price))
+
+def parameterized_text() -> tuple:
+    return parameterize(
+        Select('Product p', name=eq('Gizmo'), price=Between(10, 20)),
+        'named'
+    )
+
+def executed_products() -> list:
+    with product_pool() as pool:
+        return expensive_products(10).execute(pool)
+
+def streamed_batches() -> list:
+    """
+    Returns the names streamed and how many times
+    a prepared statement was reused.
+    """
+    with product_pool(max_size=1) as pool:
+        names = [
+            row[0] for row in
+            Select('Product p', name=Field).stream(pool, batch_size=2)
+        ]
+        for min_price in (5, 10, 15):
+            expensive_products(min_price).execute(pool)
+        with pool.connection() as conn:
+            return names, conn.hits
+
+def exhausted_pool() -> bool:
+    pool = product_pool(max_size=1, timeout=0.01)
+    with pool.connection():
+        try:
+            pool.acquire()
+        except TimeoutError:
+            return True
+    return False
@@ -0,0 +1,52 @@
+from sql_blocks.sql_blocks import *
+
+
+def issue_codes(query: Select, **budget) -> list:
+    return [(issue.severity.name, issue.code) for issue in query.lint(**budget)]
+
+def lint_text(text: str, **budget) -> list:
+    with Context():
+        return issue_codes(detect(text), **budget)
+
+def comma_joins() -> tuple:
+    """
+    (without condition, with Where.join)
+    """
+    orders = Select('Orders o', customer_id=Field, total=gt(5))
+    orders.key_field = 'customer_id'
+    joined = Select('Customer c', name=Field, id=Where.join(orders))
+    loose = Select('Customer c', name=Field, city=eq('Rome'))
+    loose.values[FROM].append(',Orders o')
+    return issue_codes(loose), issue_codes(joined)
+
+def filter_issues() -> dict:
+    return {
+        'contains': issue_codes( Select('People p', id=Field, name=contains('Ann')) ),
+        'startswith': issue_codes( Select('People p', id=Field, name=startswith('Ann')) ),
+        'year': issue_codes( Select('People p', id=Field, birth=Where.formula('Year(%) = 2000')) ),
+        'not_in': issue_codes( Select(
+            'Customer c', name=Field, id=NotSelectIN('Orders o', customer_id=Field, total=gt(10))
+        ) ),
+        'big_in': issue_codes( Select('People p', name=Field, id=inside(list(range(3000)))) ),
+    }
+
+def nested_subqueries(levels: int) -> Select:
+    query = SelectIN('T0 t0', id=Field, level=eq(0))
+    for i in range(1, levels):
+        query = SelectIN(f'T{i} t{i}', id=Field, parent=query)
+    return Select('Main m', name=Field, parent=query)
+
+def recursive_issues() -> list:
+    query = Recursive.create('ancestors', 'Person(id, name, father)', '[3] = ancestors.id', 'Ana')
+    return [(issue.code, issue.table) for issue in query.lint()]
+
+def run_cli(*args: str, text: str='') -> tuple:
+    """
+    (exit code, output lines) of `python -m sql_blocks.lint`
+    """
+    import subprocess, sys
+    process = subprocess.run(
+        [sys.executable, '-m', 'sql_blocks.lint', *args],
+        input=text, capture_output=True, text=True
+    )
+    return process.returncode, process.stdout.splitlines()
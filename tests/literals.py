@@ -0,0 +1,42 @@
+from array import array
+from sql_blocks.sql_blocks import *
+
+
+def conditions_of(**values) -> list:
+    return Select('Product p', **values).values[WHERE]
+
+def plain_sequences() -> list:
+    return conditions_of(
+        id=inside(range(10, 0, -1)),
+        code=inside(range(0, 10, 3)),
+        price=inside(array('d', [1.5, 2])),
+        stock=inside(memoryview(array('i', [7, 8]))),
+        category=inside(('toys', 'tools')),
+    )
+
+def numpy_arrays() -> list:
+    import numpy as np
+    return conditions_of(
+        id=inside(np.array([3, 1, 2])),
+        price=inside(np.array([1.0, np.nan])),
+        created=inside(np.array(['2024-01-01', '2024-02-01'], dtype='datetime64[D]')),
+        name=inside(np.array(['Gizmo', 'Gadget'])),
+        active=inside(np.array([True, False])),
+    )
+
+def case_with_values() -> str:
+    return Select(
+        'Product p',
+        label=Case('price').when(
+            lt(50), 'cheap'
+        ).when(
+            range(50, 101), 'normal'
+        ).when(
+            [150, 200], 'special'
+        )
+    ).values[SELECT][0]
+
+def options_with_values() -> list:
+    return conditions_of(
+        OR=Options(id=range(1, 5), category=['toys', 'tools'])
+    )
@@ -0,0 +1,57 @@
+from sql_blocks.sql_blocks import *
+
+
+def mongo_queries(script: str) -> list:
+    with Context():
+        return [str(q) for q in MongoParser(script, Select).queries]
+
+def mongo_tokens() -> list:
+    return MongoParser.scan('''
+        db.people.find({"name": 'a:b, {c}', age: 0x1F}); // comment
+        /* ... */ db.people.find({score: -1.5e3})
+    ''')
+
+def mongo_conditions(script: str) -> list:
+    with Context():
+        query, = MongoParser(script, Select).queries
+    return query.values.get(WHERE, [])
+
+def big_in_list(size: int=100_000) -> str:
+    """
+    The condition of a $in with `size` values.
+    """
+    values = ', '.join(str(i) for i in range(size))
+    condition, = mongo_conditions(f'db.people.find({{id: {{$in: [{values}]}}}})')
+    return condition
+
+def mongo_errors() -> list:
+    scripts = [
+        'db.people.find({age: {$foo: 1}})',
+        'db.people.aggregate([{$unwind: "$tags"}])',
+        'db.people.remove({})',
+        'db.people.find({age: [1, 2',
+        'db.people.find({age: #})',
+    ]
+    result = []
+    for script in scripts:
+        try:
+            MongoParser(script, Select)
+        except SyntaxError:
+            result.append(True)
+        else:
+            result.append(False)
+    return result
+
+def sorted_by_accumulator() -> tuple:
+    """
+    ($sort on an output of $group) ==> (ORDER BY, $sort of the translation)
+    """
+    script = """db.sales.aggregate([
+        {$group: {_id: "$region", total: {$sum: "$amount"}}},
+        {$sort: {total: -1, _id: 1}},
+        {$project: {_id: 0, region: "$_id", total: 1}}
+    ])"""
+    with Context():
+        query, = MongoParser(script, Select).queries
+        translated = query.translate_to(MongoDBLanguage)
+    return query.values[ORDER_BY], translated
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from sql_blocks.sql_blocks import *
+from sql_blocks.parsers import SQLParser, CypherParser
+from sql_blocks.rules import RuleSelectIN
+from sql_blocks.parse_cache import ParseCache
+
+
+TEXTS = [
+    f"SELECT p.name FROM Product p WHERE p.price > {i} AND (p.tag = 'A' OR p.tag = 'B')"
+    for i in range(10)
+]
+
+
+class CountingParser(SQLParser):
+    count = 0
+
+    def eval(self, txt: str):
+        CountingParser.count += 1
+        super().eval(txt)
+
+
+def cache_file() -> str:
+    return os.path.join(tempfile.mkdtemp(), 'queries.db')
+
+def restarted_worker() -> tuple:
+    """
+    Returns (texts parsed by the first worker, by the next one,
+    results are the same as Select.parse).
+    """
+    path = cache_file()
+    CountingParser.count = 0
+    first = ParseCache(path).parse(TEXTS[0], CountingParser, [RuleSelectIN])
+    parsed = CountingParser.count
+    cache = ParseCache(path)    # --- after a restart
+    second = cache.parse(TEXTS[0], CountingParser, [RuleSelectIN])
+    expected = Select.parse(TEXTS[0])
+    expected[0].optimize([RuleSelectIN])
+    return parsed, CountingParser.count - parsed, [
+        str(q) for q in first + second
+    ] == [str(q) for q in expected * 2]
+
+def entries_after_upgrade() -> tuple:
+    path = cache_file()
+    ParseCache(path).parse(TEXTS[0])
+    before = len( ParseCache(path) )
+    with mock.patch('sql_blocks.parse_cache.library_version', lambda: '99.0/1'):
+        cache = ParseCache(path)
+        after = len(cache)
+        cache.parse(TEXTS[0])
+    return before, after, cache.misses
+
+def rendered_texts() -> list:
+    """
+    (cached, direct) texts in each language and dialect.
+    """
+    cache = ParseCache( cache_file() )
+    result = []
+    for language in (QueryLanguage, MongoDBLanguage, Neo4JLanguage):
+        for dialect in (Dialect.ANSI, Dialect.ORACLE):
+            with Context(dialect=dialect):
+                query, = Select.parse(TEXTS[1])
+                for _ in range(2):
+                    cached, = cache.render(TEXTS[1], language=language)
+                result.append( (cached, query.translate_to(language)) )
+    return result
+
+def parse_all(path: str) -> list:
+    cache = ParseCache(path)
+    return [str(q) for text in TEXTS for q in cache.parse(text)] + [cache.errors]
+
+def concurrent_workers(count: int=4) -> tuple:
+    path = cache_file()
+    with ProcessPoolExecutor(max_workers=count) as executor:
+        results = list( executor.map(parse_all, [path] * count) )
+    expected = [str(q) for text in TEXTS for q in Select.parse(text)] + [0]
+    return results, expected, len( ParseCache(path) )
+
+def short_alias(name: str) -> str:
+    return name[0].lower()
+
+def parsed_in_contexts() -> list:
+    """
+    (cached, direct) texts with other sort and ALIAS_FUNC
+    -- the same cache for all of them -- and the cache hits.
+    """
+    cache = ParseCache( cache_file() )
+    text = 'Product(name, price ^name)'
+    result = []
+    contexts = [
+        Context(sort=SortType.ASC), Context(sort=SortType.DESC),
+        Context(sort=SortType.ASC, alias_func=short_alias),
+    ]
+    for context in contexts:
+        with context:
+            for _ in range(2):
+                cached, = cache.parse(text, CypherParser)
+            direct, = Select.parse(text, CypherParser)
+            result.append( (str(cached), str(direct)) )
+    return result, cache.hits
@@ -0,0 +1,48 @@
+import io
+from sql_blocks.sql_blocks import *
+from tests.cte import basic_recursive_cte, create_flight_routes
+from tests.special_cases import query_for_mongo_pipeline, neo4j_joined_query
+
+
+class PieceSink:
+    """
+    A `write()`-able sink that keeps the size of the largest piece.
+    """
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.largest = 0
+
+    def write(self, text: str):
+        self.largest = max(self.largest, len(text))
+        return self.buffer.write(text)
+
+
+def rendered_and_converted() -> list:
+    """
+    Pairs of (render_to, str/translate_to) for each kind of query.
+    """
+    queries = [
+        (Select('Product p', name=Field, price=gt(10)), QueryLanguage),
+        (query_for_mongo_pipeline(), MongoDBLanguage),
+        (neo4j_joined_query(), Neo4JLanguage),
+        (basic_recursive_cte(), QueryLanguage),
+        (create_flight_routes(True), QueryLanguage),
+    ]
+    result = []
+    for query, language in queries:
+        streamed = query.render_to(io.StringIO(), language).getvalue()
+        text = str(query) if language is QueryLanguage else query.translate_to(language)
+        result.append( (streamed, text) )
+    return result
+
+def large_union() -> tuple:
+    """
+    Returns (output size, largest piece written).
+    """
+    cte = CTE('Prices', [
+        Select('Product p', price=inside(list(range(i, i + 2000))))
+        for i in range(0, 20000, 2000)
+    ])
+    sink = PieceSink()
+    cte.render_to(sink)
+    return len(sink.buffer.getvalue()), sink.largest
@@ -1,4 +1,6 @@
+import re
 from sql_blocks.sql_blocks import *
+from sql_blocks.rules import RuleNamedWindow
 
 PRODUCT_TABLE = 'Product p'
 
@@ -87,3 +89,40 @@ def replace_join_by_subselect() -> list:
     )
     query.optimize([RuleReplaceJoinBySubselect])
     return query.values.get(WHERE, [])
+
+def window_query() -> Select:
+    return Select(
+        'Employees e', name=Field, salary=[
+            Sum().over(dept=Partition, hired=OrderBy, _=Rows(Preceding(2), Current())).As('moving'),
+            Avg().over(dept=Partition, hired=OrderBy).As('running'),
+            Max().over(region=Partition).As('highest'),
+        ],
+        age=gt(18)
+    )
+
+def named_windows(dialect: str='ANSI', times: int=1) -> str:
+    with Context(dialect=Dialect[dialect]):
+        query = window_query()
+        for _ in range(times):
+            query.optimize([RuleNamedWindow])
+        return re.sub(r'\s+', ' ', str(query))
+
+def named_windows_by_default() -> bool:
+    with Context(dialect=Dialect.ANSI):
+        query = window_query()
+        query.optimize()
+    return 'WINDOW' in query.values
+
+def parsed_named_windows() -> tuple:
+    """
+    (original, parsed, parsed + condition) -- a WINDOW clause
+    read back by the SQL parser.
+    """
+    flat = lambda query: re.sub(r'\s+', ' ', str(query))
+    with Context(dialect=Dialect.ANSI):
+        query = window_query()
+        query.optimize([RuleNamedWindow])
+        parsed = Select.parse( str(query) )[0]
+        result = flat(query), flat(parsed)
+        parsed( active=eq(1) )
+        return *result, flat(parsed)
@@ -0,0 +1,66 @@
+import pickle
+from sql_blocks.sql_blocks import *
+from tests.basic import query_reference, best_movies
+from tests.cte import basic_recursive_cte, create_flight_routes
+
+
+def round_trips() -> list:
+    """
+    Pairs of (original, decoded) -- text and class -- of each kind of query.
+    """
+    queries = [
+        Select('Product p', name=Field, price=gt(10)),
+        query_reference(), best_movies(),
+        CTE('Cheap', [
+            Select('Product p', price=lt(5)), Select('Service s', price=lt(10))
+        ]),
+        basic_recursive_cte(True), create_flight_routes(True),
+    ]
+    return [
+        ( (type(query), str(query)), (type(decoded), str(decoded)) )
+        for query in queries
+        for decoded in [Select.from_bytes( query.to_bytes() )]
+    ]
+
+def restored_state() -> tuple:
+    """
+    What `str(query)` does not show: key_field, join_type, alias...
+    """
+    query = Select('Customer c', id=PrimaryKey, name=Field)
+    query.join_type = JoinType.RIGHT
+    decoded = Select.from_bytes( query.to_bytes() )
+    return (
+        (query.key_field, query.join_type, query.alias, query.break_lines),
+        (decoded.key_field, decoded.join_type, decoded.alias, decoded.break_lines)
+    )
+
+def restored_links() -> str:
+    """
+    The ForeignKey of a query sent to another Context
+    still joins it to the referenced table.
+    """
+    with Context():
+        data = Select('Invoice i', customer=ForeignKey('Customer')).to_bytes()
+    with Context():
+        invoice = Select.from_bytes(data)
+        customer = Select('Customer c', id=PrimaryKey, name=Field)
+        return str(invoice + customer)
+
+def sizes() -> tuple:
+    """
+    (bytes, pickle) of a large query.
+    """
+    query = query_reference()
+    return len( query.to_bytes() ), len( pickle.dumps(query) )
+
+def corrupted_data() -> list:
+    data = Select('Product p', name=Field).to_bytes()
+    result = []
+    for wrong in (b'not a query', data[:3] + b'\x63' + data[4:], data[:-5]):
+        try:
+            Select.from_bytes(wrong)
+        except ValueError:
+            result.append(True)
+        else:
+            result.append(False)
+    return result
@@ -1,6 +1,7 @@
 import re
 from difflib import SequenceMatcher
 from sql_blocks.sql_blocks import *
+from sql_blocks.execution import parameterize
 
 VOICE_TYPE_FIELD = 'voice_type'
 VOICE_TYPE_VALUE = 'deep'
@@ -147,6 +148,43 @@ def mongo_group(script: str=MONGO_SCRIPT_AGGREG) -> Select:
 def group_for_mongo() -> Select:
     return Select(people=Table('sum(1)'), gender=GroupBy)
 
+def mongo_pipeline() -> str:
+    query = group_cypher().limit(5, 10)
+    return script_mongo_from(query)
+
+def query_for_mongo_pipeline() -> Select:
+    return Select(
+        'People p', region=GroupBy, city=[GroupBy, Field],
+        age=[Avg, Having.avg(gt(30))], name=eq('x')
+    ).limit(5, 10)
+
+def query_for_mongo_count(select: bool=True) -> Select:
+    return Select(
+        'People p', city=[GroupBy, Field],
+        id=[Count, Having.count(gt(5))] if select else Having.count(gt(5))
+    )
+
+def mongo_range_round_trip() -> tuple:
+    """
+    (script, query read back) -- two bounds of the same field.
+    """
+    query = Select('People p', name=Field, age=[gte(18), lt(65)])
+    script = script_mongo_from(query)
+    return script, query, mongo_query(script)
+
+def mongo_in_null_round_trip() -> tuple:
+    """
+    Mongo ==> Select ==> Mongo ==> Select, with $in, $nin and null.
+    """
+    first = mongo_query(
+        'db.people.find({dept: {$in: ["IT", "HR"]}, code: {$nin: [1, 2]}, boss: null, tag: {$ne: null}}, {name: 1})'
+    )
+    script = script_mongo_from(first)
+    return script, first, mongo_query(script)
+
+def mongo_count_all() -> str:
+    return script_mongo_from( Select('People p', city=[GroupBy, Field], _=Count) )
+
 def neo4j_queries(script: str = NEO4J_SCRIPT) -> list:
     return Select.parse(script, Neo4JParser)
 
@@ -191,6 +229,21 @@ def query_for_WHERE_neo4j():
     query(age=gt(18))
     return query_for_neo4J(Not.eq, query)
 
+def query_for_neo4j_params() -> Select:
+    return Select(
+        'Person p', name=[eq('Ann'), OrderBy],
+        age=[gt(18), OrderBy], city=eq('Rio')
+    ).limit(10, 20)
+
+def neo4j_with_params() -> tuple:
+    return parameterize(query_for_neo4j_params(), language=Neo4JLanguage)
+
+def neo4j_params_round_trip() -> tuple:
+    script = query_for_neo4j_params().translate_to(Neo4JLanguage)
+    return Select.parse(script, Neo4JParser)[0], Select(
+        'Person p', name=eq('Ann'), age=gt(18), city=eq('Rio')
+    )
+
 def group_cypher() -> Select:
     return Select(
         'People', age=Avg, gender=[GroupBy, Field],
@@ -0,0 +1,46 @@
+from sql_blocks.sql_blocks import *
+
+
+def template_query(name=Slot('name'), min_price=Slot('min_price')) -> Select:
+    return Select(
+        'Product p', name=eq(name), price=gt(min_price)
+    )
+
+LANGUAGES = {
+    'sql':   (None, SQLParser),
+    'mongo': (MongoDBLanguage, MongoParser),
+    'neo4j': (Neo4JLanguage, Neo4JParser),
+}
+
+def rendered_and_expected(name: str) -> tuple:
+    """
+    The template rendered (and parsed back) x the query with the values.
+    """
+    language, parser = LANGUAGES[name]
+    template = template_query().compile(language)
+    text = template.render(name="Gizmo", min_price=10)
+    expected = template_query('Gizmo', 10)
+    return Select.parse(text, parser)[0], expected
+
+def repeated_slot() -> str:
+    query = Select(
+        'Product p', price=gt(Slot('value')),
+        discount=lt(Slot('value'))
+    )
+    return query.compile().render(value=5)
+
+def quoted_slot_value() -> str:
+    return template_query().compile().render(name="O'Neil", min_price=None)
+
+def missing_slot():
+    template_query().compile().render(name='Gizmo')
+
+PATTERNS = {'contains': contains, 'startswith': startswith, 'endswith': endswith}
+
+def slot_in_pattern(name: str):
+    query = Select('Product p', name=PATTERNS[name]( Slot('name') ))
+    query.compile()
+
+def slot_as_pattern() -> str:
+    query = Select('Product p', name=Where('LIKE {}'.format( Slot('pattern') )))
+    return query.compile().render(pattern='%Giz%')
@@ -0,0 +1,31 @@
+from sql_blocks.sql_blocks import *
+
+
+def cypher_tokens() -> list:
+    return CypherParser.scan('Student(name ? age = 16) <- Class(student_id)')
+
+def neo4j_tokens() -> list:
+    return Neo4JParser.scan('MATCH (p:Person{name:"Ann Lee", age: 30}) RETURN p')
+
+def multi_hop_queries(hops: int=50) -> list:
+    """
+    (table, key_field, join_type, conditions) of each node
+    of a long Cypher pattern.
+    """
+    pattern = ' -> '.join(
+        f'Node{i}(*id, name ? level > {i})' for i in range(hops)
+    )
+    with Context():
+        queries = CypherParser(pattern, Select).queries
+    return [
+        (q.table_name, q.key_field, q.join_type.name, q.values.get(WHERE))
+        for q in queries
+    ]
+
+def shared_tables() -> bool:
+    """
+    The regexes and the methods of the tokens are
+    the same objects for all the parsers.
+    """
+    p1, p2 = [Neo4JParser('(p:Person)', Select) for _ in range(2)]
+    return p1.REGEX is p2.REGEX and p1.dispatch() is p2.dispatch()